@@ -16,7 +16,20 @@ from ui.main_window import CloudMoverUI
 def main():
     """Main application entry point."""
     try:
-        app = CloudMoverUI()
+        # --rcd keeps one rclone daemon running instead of a process per operation;
+        # --bundle-small-files packs small files into tar bundles before upload;
+        # --compress zstd-compresses bundles and large text-like files;
+        # --dedup copies already-archived files server-side;
+        # --pipeline verifies and deletes each folder as soon as it's uploaded;
+        # --delete-as-uploaded deletes each file once its upload is confirmed;
+        # --staged-delete renames verified folders aside and purges them in the background
+        app = CloudMoverUI(use_rc_backend='--rcd' in sys.argv[1:],
+                           bundle_small_files='--bundle-small-files' in sys.argv[1:],
+                           compress='--compress' in sys.argv[1:],
+                           dedup='--dedup' in sys.argv[1:],
+                           pipeline='--pipeline' in sys.argv[1:],
+                           delete_as_uploaded='--delete-as-uploaded' in sys.argv[1:],
+                           staged_delete='--staged-delete' in sys.argv[1:])
         app.run()
     except Exception as e:
         print(f"Error starting Cloud Mover: {e}")
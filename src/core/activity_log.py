@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Thread-safe activity log buffered for the UI and mirrored to a file."""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+_CLOSE = object()
+
+
+class ActivityLog:
+    """Collects log lines from any thread for the UI to pick up in batches.
+
+    write() only appends to a bounded ring buffer, so producers never wait
+    on the UI. The UI calls drain() on a timer and renders everything
+    pending at once. If lines arrive faster than that, the oldest pending
+    lines are dropped and counted, since the widget would trim them anyway.
+    With log_path, every line also goes to a file, written by a background
+    thread.
+    """
+
+    def __init__(self, max_pending: int = 2000, log_path: Optional[str] = None,
+                 flush_interval: float = 1.0):
+        self.log_path = log_path
+        self.flush_interval = flush_interval
+        self._pending: deque = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._file_queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        if log_path:
+            log_dir = os.path.dirname(log_path)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            # Opened here, so the file exists as soon as the log does
+            self._file = open(log_path, 'a', encoding='utf-8')
+            self._file_queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_file, daemon=True)
+            self._writer.start()
+
+    def write(self, message: str, tag: str = 'info'):
+        """Queue a line; safe to call from any thread."""
+        line = f"[{datetime.now().strftime('%H:%M:%S')}] {message}"
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append((line, tag))
+        if self._file_queue is not None:
+            self._file_queue.put(f"{line}\n")
+
+    def drain(self) -> Tuple[List[Tuple[str, str]], int]:
+        """Take all pending (line, tag) pairs and the number dropped since the last drain."""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
+
+    def close(self):
+        """Flush the log file and stop its writer."""
+        if self._writer is not None:
+            self._file_queue.put(_CLOSE)
+            self._writer.join(timeout=5)
+            self._writer = None
+
+    def _write_file(self):
+        with self._file as f:
+            last_flush = time.time()
+            while True:
+                try:
+                    item = self._file_queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = None
+                if item is _CLOSE:
+                    break
+                if item is not None:
+                    f.write(item)
+                if time.time() - last_flush >= self.flush_interval:
+                    f.flush()
+                    last_flush = time.time()
+
+
+def prune_logs(log_dir: str, keep: int = 10):
+    """Remove all but the newest keep session logs in log_dir."""
+    try:
+        names = sorted(n for n in os.listdir(log_dir) if n.endswith('.log'))
+    except OSError:
+        return
+    for name in names[:-keep] if keep else names:
+        try:
+            os.remove(os.path.join(log_dir, name))
+        except OSError:
+            pass
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Packs small files into tar bundles, optionally zstd compressed, streamed with rclone rcat."""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.compression import (
+    CompressionStats, ParallelZstdWriter, decompress, decompressing_reader, is_compressible
+)
+from core.manifest import Manifest, ManifestEntry
+
+# Bundles and their index live in this folder under the uploaded folder
+BUNDLE_DIR = '.cloud-mover'
+INDEX_NAME = 'bundle-index.json'
+
+
+@dataclass
+class BundledFile:
+    """Where one original file lives inside a bundle."""
+    bundle: str
+    offset: int
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class BundleInfo:
+    """One uploaded bundle.
+
+    kind is 'tar' for a bundle of small files or 'file' for a single
+    compressed file. size and md5 describe the uploaded object; when it
+    is zstd compressed, frame_offsets locate each frame_size block of
+    the raw stream.
+    """
+    name: str
+    size: int
+    md5: str
+    file_count: int
+    kind: str = 'tar'
+    compression: Optional[str] = None
+    raw_size: int = 0
+    frame_size: int = 0
+    frame_offsets: List[int] = field(default_factory=list)
+
+
+class BundleIndex:
+    """Maps original relative paths to their bundle and byte offset.
+
+    Uploaded next to the bundles as a JSON sidecar, so verification and
+    restore only need the remote.
+    """
+
+    def __init__(self):
+        self.bundles: Dict[str, BundleInfo] = {}
+        self.files: Dict[str, BundledFile] = {}
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'version': 1,
+            'bundles': [asdict(b) for b in self.bundles.values()],
+            'files': {path: asdict(f) for path, f in self.files.items()}
+        })
+
+    @classmethod
+    def from_json(cls, text: str) -> 'BundleIndex':
+        data = json.loads(text)
+        index = cls()
+        for bundle in data.get('bundles', []):
+            index.bundles[bundle['name']] = BundleInfo(**bundle)
+        for path, info in data.get('files', {}).items():
+            index.files[path] = BundledFile(**info)
+        return index
+
+    @staticmethod
+    def remote_path(name: str) -> str:
+        """Path of a bundle or the index, relative to the uploaded folder."""
+        return f"{BUNDLE_DIR}/{name}"
+
+
+def plan_bundles(manifest: Manifest, threshold: int,
+                 target_size: int = 256 * 1024**2) -> Tuple[List[List[ManifestEntry]], Manifest]:
+    """Group files smaller than threshold into bundles of about target_size.
+
+    Returns the bundle groups and a manifest of the files left to upload
+    individually. A lone small file isn't worth a bundle and stays as is.
+    """
+    small = [e for e in manifest.entries if e.size < threshold]
+    if len(small) < 2:
+        return [], manifest
+
+    # Keep neighbouring paths together so a restore of one folder reads few bundles
+    small.sort(key=lambda e: e.path)
+    groups = []
+    current = []
+    current_size = 0
+    for entry in small:
+        if current and current_size + entry.size > target_size:
+            groups.append(current)
+            current, current_size = [], 0
+        current.append(entry)
+        current_size += entry.size
+    groups.append(current)
+
+    remaining = Manifest(manifest.root,
+                         [e for e in manifest.entries if e.size >= threshold],
+                         manifest.ignored_count)
+    return groups, remaining
+
+
+def plan_compressed_files(manifest: Manifest, min_size: int) -> Tuple[List[ManifestEntry], Manifest]:
+    """Pick files of at least min_size whose type usually compresses well.
+
+    Returns those files and a manifest of the rest.
+    """
+    chosen = [e for e in manifest.entries if e.size >= min_size and is_compressible(e.path)]
+    if not chosen:
+        return [], manifest
+    chosen_paths = {e.path for e in chosen}
+    remaining = Manifest(manifest.root,
+                         [e for e in manifest.entries if e.path not in chosen_paths],
+                         manifest.ignored_count)
+    return chosen, remaining
+
+
+class _CountingWriter:
+    """File-like wrapper that hashes and counts what passes through."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.md5 = hashlib.md5()
+        self.size = 0
+
+    def write(self, data):
+        self.md5.update(data)
+        self.size += len(data)
+        self.fileobj.write(data)
+        return len(data)
+
+
+class BundleUploader:
+    """Streams bundles to the remote; nothing is staged on local disk.
+
+    With a compression level, bundles and the chosen single files are zstd
+    compressed in a process pool on their way into rclone rcat.
+    """
+
+    def __init__(self, rclone_path: str):
+        self.rclone_path = rclone_path
+
+    def upload(self, manifest: Manifest, destination: str, groups: List[List[ManifestEntry]],
+               progress_callback=None, compressed_files: Sequence[ManifestEntry] = (),
+               compression_level: Optional[int] = None) -> Tuple[bool, Dict]:
+        """Upload each group as a tar bundle and each compressed file, then the index sidecar.
+
+        The result holds the index and, when compressing, the job's
+        CompressionStats.
+        """
+        index = BundleIndex()
+        stats = CompressionStats()
+        # Spawned rather than forked workers, so they don't inherit rcat's stdin
+        # pipe and keep it open after we close it
+        pool = (ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+                if compression_level is not None else None)
+        suffix = '.zst' if pool else ''
+
+        try:
+            for number, group in enumerate(groups, 1):
+                name = f"bundle-{number:05d}.tar{suffix}"
+                if progress_callback:
+                    progress_callback(f"Bundling {len(group):,} small files into {name} "
+                                      f"({number}/{len(groups)})")
+                try:
+                    info = self._upload_bundle(manifest, destination, name, group, index,
+                                               pool, compression_level, stats)
+                except (OSError, tarfile.TarError, subprocess.SubprocessError) as e:
+                    return False, {'error': f"Bundle {name} failed: {e}"}
+                index.bundles[name] = info
+
+            for entry in compressed_files:
+                name = f"compressed/{entry.path}.zst"
+                if progress_callback:
+                    progress_callback(f"Compressing {entry.path}")
+                try:
+                    info = self._upload_compressed_file(manifest, destination, name, entry,
+                                                        pool, compression_level, stats)
+                except (OSError, subprocess.SubprocessError) as e:
+                    return False, {'error': f"Compressed upload of {entry.path} failed: {e}"}
+                index.bundles[name] = info
+                index.files[entry.path] = BundledFile(name, 0, entry.size, entry.mtime_ns)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        success, error = self._rcat(f"{destination}/{BundleIndex.remote_path(INDEX_NAME)}",
+                                    index.to_json().encode('utf-8'))
+        if not success:
+            return False, {'error': f"Bundle index upload failed: {error}"}
+        return True, {'index': index, 'compression': stats if pool else None}
+
+    def _upload_bundle(self, manifest: Manifest, destination: str, name: str,
+                       group: List[ManifestEntry], index: BundleIndex,
+                       pool=None, level=None, stats: Optional[CompressionStats] = None) -> BundleInfo:
+        def write_tar(stream):
+            with tarfile.open(fileobj=stream, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+                for entry in group:
+                    local_path = manifest.local_path(entry)
+                    tarinfo = tar.gettarinfo(local_path, arcname=entry.path)
+                    with open(local_path, 'rb') as f:
+                        tar.addfile(tarinfo, f)
+                    # Data ends at the current offset, before the padding to 512 bytes
+                    padded = -(-tarinfo.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                    index.files[entry.path] = BundledFile(
+                        name, tar.offset - padded, tarinfo.size, entry.mtime_ns)
+
+        info = self._stream(destination, name, write_tar, pool, level, stats)
+        info.file_count = len(group)
+        return info
+
+    def _upload_compressed_file(self, manifest: Manifest, destination: str, name: str,
+                                entry: ManifestEntry, pool, level,
+                                stats: CompressionStats) -> BundleInfo:
+        def write_file(stream):
+            with open(manifest.local_path(entry), 'rb') as f:
+                shutil.copyfileobj(f, stream, 1024 * 1024)
+
+        info = self._stream(destination, name, write_file, pool, level, stats)
+        info.kind = 'file'
+        info.file_count = 1
+        return info
+
+    def _stream(self, destination: str, name: str, write_body, pool=None, level=None,
+                stats: Optional[CompressionStats] = None) -> BundleInfo:
+        """Pipe what write_body writes into rclone rcat, compressing it if a pool is given."""
+        process = subprocess.Popen(
+            [self.rclone_path, 'rcat', f"{destination}/{BundleIndex.remote_path(name)}",
+             '--log-level', 'ERROR'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+        writer = _CountingWriter(process.stdin)
+        compressor = ParallelZstdWriter(writer, pool, level) if pool is not None else None
+        try:
+            write_body(compressor or writer)
+            if compressor is not None:
+                compressor.close()
+        finally:
+            process.stdin.close()
+            stderr = process.stderr.read()
+            process.wait()
+
+        if process.returncode != 0:
+            raise subprocess.SubprocessError(stderr.decode('utf-8', 'replace').strip()
+                                             or f"rclone rcat exited with {process.returncode}")
+
+        info = BundleInfo(name, writer.size, writer.md5.hexdigest(), 0)
+        if compressor is not None:
+            info.compression = 'zstd'
+            info.raw_size = compressor.stats.raw_bytes
+            info.frame_size = compressor.frames.frame_size
+            info.frame_offsets = compressor.frames.offsets
+            if stats is not None:
+                stats.add(compressor.stats)
+        return info
+
+    def _rcat(self, remote: str, data: bytes) -> Tuple[bool, str]:
+        result = subprocess.run([self.rclone_path, 'rcat', remote], input=data, capture_output=True)
+        return result.returncode == 0, result.stderr.decode('utf-8', 'replace').strip()
+
+    def _cat(self, destination: str, name: str, offset: int, count: int) -> bytes:
+        result = subprocess.run(
+            [self.rclone_path, 'cat', f"{destination}/{BundleIndex.remote_path(name)}",
+             '--offset', str(offset), '--count', str(count)],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            raise OSError(result.stderr.decode('utf-8', 'replace').strip())
+        return result.stdout
+
+    def fetch_index(self, destination: str) -> Optional[BundleIndex]:
+        """Download the index sidecar, or None if the folder has no bundles."""
+        result = subprocess.run(
+            [self.rclone_path, 'cat', f"{destination}/{BundleIndex.remote_path(INDEX_NAME)}"],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            return None
+        return BundleIndex.from_json(result.stdout.decode('utf-8'))
+
+    def restore_file(self, destination: str, index: BundleIndex, path: str, target: str):
+        """Fetch one bundled file by byte range, without downloading its whole bundle."""
+        info = index.files[path]
+        bundle = index.bundles[info.bundle]
+
+        if info.size == 0:
+            data = b''
+        elif bundle.compression:
+            # Fetch only the frames that cover the file's raw byte range
+            first = info.offset // bundle.frame_size
+            last = (info.offset + info.size - 1) // bundle.frame_size
+            start = bundle.frame_offsets[first]
+            end = (bundle.frame_offsets[last + 1] if last + 1 < len(bundle.frame_offsets)
+                   else bundle.size)
+            raw = decompress(self._cat(destination, info.bundle, start, end - start))
+            skip = info.offset - first * bundle.frame_size
+            data = raw[skip:skip + info.size]
+        else:
+            data = self._cat(destination, info.bundle, info.offset, info.size)
+
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        os.utime(target, ns=(info.mtime_ns, info.mtime_ns))
+
+    def restore_all(self, destination: str, index: BundleIndex, target_dir: str):
+        """Stream every bundle down and unpack it under target_dir."""
+        paths_by_bundle = {info.bundle: path for path, info in index.files.items()}
+        for name, bundle in index.bundles.items():
+            process = subprocess.Popen(
+                [self.rclone_path, 'cat', f"{destination}/{BundleIndex.remote_path(name)}"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            try:
+                stream = decompressing_reader(process.stdout) if bundle.compression else process.stdout
+                if bundle.kind == 'file':
+                    target = os.path.join(target_dir, *paths_by_bundle[name].split('/'))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with open(target, 'wb') as f:
+                        shutil.copyfileobj(stream, f, 1024 * 1024)
+                else:
+                    with tarfile.open(fileobj=stream, mode='r|') as tar:
+                        tar.extractall(target_dir, filter='data')
+            finally:
+                process.stdout.close()
+                process.wait()
+            if process.returncode != 0:
+                raise OSError(f"rclone cat {name} exited with {process.returncode}")
@@ -4,202 +4,638 @@
 import os
 import subprocess
 import json
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, Tuple, Optional, List
 
+from core.bundles import (
+    BUNDLE_DIR, INDEX_NAME, BundleUploader, plan_bundles, plan_compressed_files
+)
+from core.compression import compression_available
+from core.dedup_index import DedupIndex, DedupPlan, ServerSideCopy, plan_dedup
+from core.hash_cache import HashCache
+from core.hashing import HashCancelled, HashingEngine
+from core.ignore_rules import IgnoreRules
+from core.manifest import Manifest
+from core.progress import (
+    FileTransferred, LogMessage, TransferError, TransferStats,
+    format_speed, parse_json_log_line
+)
+from core.quota_cache import QuotaCache
+from core.rc_backend import RcBackend, RcError, RcloneDaemon, RcTimeout
+from core.rclone_output import JsonArrayReader, RcloneOutputPump
+from core.scanner import FolderScanner
+from core.staging import STAGING_DIR
+from core.transfer_tuning import TransferProfile, tune_transfers
+from core.upload_scheduler import UploadScheduler
+
 
 class CloudOperations:
     """Handles all cloud-related operations using rclone."""
     
-    def __init__(self, rclone_path: str = "rclone.exe"):
+    def __init__(self, rclone_path: str = "rclone.exe", scanner: Optional[FolderScanner] = None):
         self.rclone_path = rclone_path
+        self.scanner = scanner or FolderScanner()
         self.remote_name = "gdrive"
         self.archive_folder = "archived"
         
+        # Concurrent batch uploads share one transfer/checker budget
+        self.max_concurrent_uploads = 3
+        self.transfer_budget = 8
+        self.checker_budget = 16
+        
+        # Ceiling for upload chunk buffers across all running transfers
+        self.transfer_memory_limit = 512 * 1024**2
+        
+        # Files below bundle_threshold are packed into tar bundles before
+        # upload; None leaves every file as its own remote object
+        self.bundle_threshold: Optional[int] = None
+        self.bundle_target_size = 256 * 1024**2
+        
+        # zstd level for bundles and large compressible files; None uploads raw bytes.
+        # Needs the optional zstandard package.
+        self.compression_level: Optional[int] = None
+        self.compress_min_size = 8 * 1024**2
+        self.bundles = BundleUploader(rclone_path)
+        
+        # Files of dedup_min_size or more whose content is already archived are
+        # copied server-side instead of uploaded; None turns dedup off
+        self.dedup: Optional[DedupIndex] = None
+        self.dedup_min_size = 1024 * 1024
+        
+        # Persistent local MD5s; with it, verification compares hashes from
+        # the remote listing instead of running rclone check
+        self.hash_cache: Optional[HashCache] = None
+        self.hasher = HashingEngine()
+        
+        # Batch verification runs this many folders at once; each rclone
+        # call it makes is abandoned after verify_timeout seconds
+        self.max_concurrent_verifications = 4
+        self.verify_timeout = 30 * 60
+        
+        # Last known quota, shown at startup before check_config answers
+        self.quota_cache: Optional[QuotaCache] = None
+        
+        # Optional long-lived rclone rcd; None means one process per operation
+        self.rc: Optional[RcBackend] = None
+        self._rc_daemon: Optional[RcloneDaemon] = None
+        
     def check_config(self) -> Tuple[bool, str]:
         """Check if rclone is configured properly."""
+        if self.rc is not None:
+            return self._check_config_rc()
+        
         try:
             # Check if rclone exists
             if not os.path.exists(self.rclone_path):
                 return False, "rclone.exe not found"
                 
-            # Check remotes
-            result = subprocess.run(
+            # Check remotes and test the connection at the same time; an
+            # unneeded about is killed rather than waited for
+            remotes = subprocess.Popen(
                 [self.rclone_path, 'listremotes'], 
-                capture_output=True, 
-                text=True,
-                timeout=30
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
             )
-            
-            print(f"DEBUG: rclone listremotes output: {result.stdout}")
-            print(f"DEBUG: rclone listremotes stderr: {result.stderr}")
-            
-            if f'{self.remote_name}:' not in result.stdout:
-                return False, f"{self.remote_name} remote not configured. Available: {result.stdout.strip()}"
-                
-            # Test connection
-            test = subprocess.run(
+            about = subprocess.Popen(
                 [self.rclone_path, 'about', f'{self.remote_name}:', '--json'],
-                capture_output=True, 
-                text=True,
-                timeout=30
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
             )
+            try:
+                stdout, stderr = remotes.communicate(timeout=30)
+                print(f"DEBUG: rclone listremotes output: {stdout}")
+                print(f"DEBUG: rclone listremotes stderr: {stderr}")
+                
+                if f'{self.remote_name}:' not in stdout:
+                    return False, f"{self.remote_name} remote not configured. Available: {stdout.strip()}"
+                
+                about_stdout, about_stderr = about.communicate(timeout=30)
+                print(f"DEBUG: rclone about return code: {about.returncode}")
+                print(f"DEBUG: rclone about stdout: {about_stdout}")
+                print(f"DEBUG: rclone about stderr: {about_stderr}")
+            finally:
+                for process in (remotes, about):
+                    if process.poll() is None:
+                        process.kill()
+                        process.communicate()
             
-            print(f"DEBUG: rclone about return code: {test.returncode}")
-            print(f"DEBUG: rclone about stdout: {test.stdout}")
-            print(f"DEBUG: rclone about stderr: {test.stderr}")
-            
-            if test.returncode == 0:
-                data = json.loads(test.stdout)
-                total_gb = data.get('total', 0) / (1024**3)
-                used_gb = data.get('used', 0) / (1024**3)
-                free_gb = total_gb - used_gb
-                return True, f"{free_gb:.1f}GB free of {total_gb:.1f}GB"
+            if about.returncode == 0:
+                return True, self._remember_quota(json.loads(about_stdout))
             else:
                 return False, "Token may need refresh"
-                
+        
         except Exception as e:
             return False, str(e)
     
+    def _check_config_rc(self) -> Tuple[bool, str]:
+        """check_config through the rc daemon."""
+        # about runs on a daemon thread, so an unneeded one never holds up exit
+        about = {}
+        
+        def fetch_about():
+            try:
+                about['data'] = self.rc.about(f'{self.remote_name}:')
+            except RcError as e:
+                about['error'] = e
+        
+        thread = threading.Thread(target=fetch_about, daemon=True)
+        thread.start()
+        try:
+            remotes = self.rc.list_remotes()
+            if self.remote_name not in remotes:
+                return False, f"{self.remote_name} remote not configured. Available: {', '.join(remotes)}"
+            thread.join()
+            if 'error' in about:
+                raise about['error']
+            return True, self._remember_quota(about['data'])
+        except RcError:
+            return False, "Token may need refresh"
+    
+    def cached_quota(self) -> Optional[str]:
+        """The last quota check_config saw, if the quota cache still holds it."""
+        if self.quota_cache is None:
+            return None
+        data = self.quota_cache.load(self.remote_name)
+        return self._format_quota(data) if data else None
+    
+    def _remember_quota(self, data: Dict) -> str:
+        if self.quota_cache is not None:
+            self.quota_cache.save(self.remote_name, {'total': data.get('total', 0),
+                                                     'used': data.get('used', 0)})
+        return self._format_quota(data)
+    
+    @staticmethod
+    def _format_quota(data: Dict) -> str:
+        total_gb = data.get('total', 0) / (1024**3)
+        used_gb = data.get('used', 0) / (1024**3)
+        free_gb = total_gb - used_gb
+        return f"{free_gb:.1f}GB free of {total_gb:.1f}GB"
+    
+    def start_rc_backend(self) -> Tuple[bool, str]:
+        """Start one long-lived rclone rcd and route operations through it."""
+        if self.rc is not None:
+            return True, "rclone rcd already running"
+        try:
+            self._rc_daemon = RcloneDaemon(self.rclone_path)
+            self.rc = RcBackend(self._rc_daemon.start())
+            return True, "rclone rcd started"
+        except (RcError, OSError) as e:
+            self._rc_daemon = None
+            return False, str(e)
+    
+    def stop_rc_backend(self):
+        """Stop the rcd daemon; operations go back to one rclone process each."""
+        self.rc = None
+        if self._rc_daemon is not None:
+            self._rc_daemon.stop()
+            self._rc_daemon = None
+    
     def analyze_folder(self, folder: str, ignore_file: str = None) -> Dict:
         """Analyze folder to get file count and size."""
-        total_size = 0
-        file_count = 0
-        ignored_count = 0
-        
-        # Load ignore patterns
-        ignore_patterns = []
-        if ignore_file and os.path.exists(ignore_file):
-            with open(ignore_file, 'r') as f:
-                ignore_patterns = [
-                    line.strip() for line in f 
-                    if line.strip() and not line.startswith('#')
-                ]
-        
-        for root, dirs, files in os.walk(folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, folder)
-                
-                # Check if file should be ignored
-                is_ignored = any(
-                    self._matches_pattern(relative_path, pattern) 
-                    for pattern in ignore_patterns
-                )
-                
-                if is_ignored:
-                    ignored_count += 1
-                else:
-                    try:
-                        total_size += os.path.getsize(file_path)
-                        file_count += 1
-                    except:
-                        pass
+        result = self.scanner.scan(folder, IgnoreRules.from_file(ignore_file))
         
         return {
-            'file_count': file_count,
-            'ignored_count': ignored_count,
-            'total_size': total_size,
-            'size_gb': total_size / (1024**3)
+            'file_count': result.file_count,
+            'ignored_count': result.ignored_count,
+            'ignored_dirs': result.ignored_dirs,
+            'total_size': result.total_size,
+            'size_gb': result.total_size / (1024**3)
         }
     
+    def tune_upload(self, manifest: Manifest, max_transfers: Optional[int] = None,
+                    max_checkers: Optional[int] = None,
+                    memory_limit: Optional[int] = None) -> TransferProfile:
+        """Pick transfer settings from a manifest's file-size distribution."""
+        return tune_transfers(
+            manifest.size_histogram(),
+            memory_limit=memory_limit or self.transfer_memory_limit,
+            max_transfers=max_transfers or self.transfer_budget,
+            max_checkers=max_checkers or self.checker_budget
+        )
+    
     def upload_folder(self, local_folder: str, progress_callback=None, 
-                     ignore_file: str = None) -> Tuple[bool, Dict]:
-        """Upload folder to cloud with progress tracking."""
+                     ignore_file: str = None, manifest: Optional[Manifest] = None,
+                     transfers: int = 4, checkers: Optional[int] = None,
+                     event_callback=None,
+                     profile: Optional[TransferProfile] = None,
+                     dedup_plan: Optional[DedupPlan] = None) -> Tuple[bool, Dict]:
+        """Upload folder to cloud with progress tracking.
+        
+        With a manifest, exactly its files are uploaded via --files-from-raw,
+        so rclone doesn't walk the local tree or re-apply the ignore file,
+        and the transfer settings are tuned to its file sizes unless a
+        profile is given. event_callback receives the typed events from
+        core.progress (TransferStats, FileTransferred, TransferError).
+        
+        When bundle_threshold is set, the manifest's small files are first
+        streamed up as tar bundles and only the rest are copied one by one.
+        When compression_level is set, bundles and large compressible files
+        are zstd compressed on the way up; the result's 'compression' holds
+        the job's ratio and CPU cost.
+        
+        With a dedup index, files already in the archive are copied
+        server-side (dedup_plan, or planned here for this folder alone).
+        """
         folder_name = os.path.basename(local_folder)
         destination = f"{self.remote_name}:{self.archive_folder}/{folder_name}"
+        files_from = None
+        
+        if manifest is not None and self.dedup is not None and dedup_plan is None:
+            dedup_plan = self.plan_dedup({local_folder: manifest})[0][local_folder]
+        if dedup_plan is not None:
+            manifest = dedup_plan.upload_manifest
+            if progress_callback and dedup_plan.saved_bytes:
+                progress_callback(f"Dedup: {len(dedup_plan.copies) + len(dedup_plan.deferred):,} "
+                                  f"duplicate files ({dedup_plan.saved_bytes / 1024**2:.1f} MB) "
+                                  f"will be copied server-side")
+        
+        bundle_groups = []
+        compressed_files = []
+        compression_level = self.compression_level
+        if compression_level is not None and not compression_available():
+            if progress_callback:
+                progress_callback("zstandard is not installed; uploading without compression")
+            compression_level = None
+        if manifest is not None and self.bundle_threshold:
+            bundle_groups, manifest = plan_bundles(manifest, self.bundle_threshold,
+                                                   self.bundle_target_size)
+        if manifest is not None and compression_level is not None:
+            compressed_files, manifest = plan_compressed_files(manifest, self.compress_min_size)
+        compression = None
+        
+        if profile is None and manifest is not None:
+            profile = self.tune_upload(manifest)
+        if profile is not None and progress_callback:
+            progress_callback(f"Transfer profile {profile.describe()}")
+        
+        # Track the last stats record so the profile's throughput can be logged
+        last_stats = [None]
+        started = time.time()
+        
+        def on_event(event):
+            if isinstance(event, TransferStats):
+                last_stats[0] = event
+            if event_callback:
+                event_callback(event)
         
         try:
-            cmd = [self.rclone_path, 'copy', local_folder, destination]
+            if dedup_plan is not None and dedup_plan.copies:
+                failed = self._server_side_copies(dedup_plan.copies, progress_callback)
+                if failed:
+                    return False, {"error": f"{len(failed)} duplicate files could not be copied"}
             
-            if ignore_file and os.path.exists(ignore_file):
-                cmd.extend(['--exclude-from', ignore_file])
-                
-            cmd.extend([
-                '--transfers', '4',
-                '--progress',
-                '--stats', '2s',
-                '--stats-one-line',
-                '--log-level', 'INFO',
-                '--verbose'
-            ])
+            if bundle_groups or compressed_files:
+                success, result = self.bundles.upload(manifest, destination, bundle_groups,
+                                                      progress_callback, compressed_files,
+                                                      compression_level)
+                if not success:
+                    if progress_callback:
+                        progress_callback(f"ERROR: {result['error']}")
+                    return False, result
+                compression = result.get('compression')
+                if compression is not None and progress_callback:
+                    progress_callback(f"Compressed {compression.describe()}")
             
-            if progress_callback:
-                progress_callback(f"Executing: {' '.join(cmd)}")
-                progress_callback(f"Moving from: {local_folder}")
-                progress_callback(f"Moving to: {destination}")
+            if manifest is not None:
+                files_from = manifest.write_files_from()
             
-            process = subprocess.Popen(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                text=True, 
-                bufsize=1
-            )
+            if self.rc is not None:
+                success, result = self._upload_folder_rc(local_folder, destination, files_from,
+                                                         ignore_file, transfers, checkers, profile,
+                                                         progress_callback, on_event)
+            else:
+                success, result = self._upload_folder_cli(local_folder, destination, files_from,
+                                                          ignore_file, transfers, checkers, profile,
+                                                          progress_callback, on_event)
+            if not success:
+                return False, result
             
-            # Monitor progress
-            while True:
-                # Read both stdout and stderr
-                stdout_line = process.stdout.readline()
-                stderr_line = process.stderr.readline()
-                
-                if not stdout_line and not stderr_line and process.poll() is not None:
-                    break
-                    
-                if stdout_line and progress_callback:
-                    progress_callback(f"OUT: {stdout_line.strip()}")
-                    
-                if stderr_line and progress_callback:
-                    progress_info = self._parse_progress(stderr_line)
-                    if progress_info:
-                        progress_callback(f"Moving files... {progress_info['percent']}%")
-                    elif stderr_line.strip():
-                        progress_callback(f"ERR: {stderr_line.strip()}")
+            if dedup_plan is not None:
+                if dedup_plan.deferred:
+                    failed = self._server_side_copies(dedup_plan.deferred, progress_callback)
+                    if failed:
+                        return False, {"error": f"{len(failed)} duplicate files could not be copied"}
+                self._record_dedup(manifest, dedup_plan, destination)
             
-            process.wait()
-            
-            if process.returncode != 0:
-                # Get any remaining output
-                remaining_stdout, remaining_stderr = process.communicate()
-                error_msg = f"rclone failed with code {process.returncode}"
-                if remaining_stderr:
-                    error_msg += f": {remaining_stderr}"
-                if progress_callback:
-                    progress_callback(f"ERROR: {error_msg}")
-                return False, {"error": error_msg}
-                
-            if progress_callback:
-                progress_callback("✅ Move completed successfully!")
-            return True, {"success": "Upload completed successfully"}
+            self._log_throughput(profile, last_stats[0], started, progress_callback, result)
+            self._record_compression(compression, result)
+            return True, result
             
         except Exception as e:
             return False, {"error": str(e)}
+        finally:
+            if files_from:
+                try:
+                    os.remove(files_from)
+                except OSError:
+                    pass
     
-    def verify_upload(self, local_folder: str, cloud_destination: str = None) -> Tuple[bool, Dict]:
-        """Verify files were uploaded correctly."""
+    def _upload_folder_cli(self, local_folder: str, destination: str, files_from: Optional[str],
+                           ignore_file: Optional[str], transfers: int, checkers: Optional[int],
+                           profile: Optional[TransferProfile] = None,
+                           progress_callback=None, event_callback=None) -> Tuple[bool, Dict]:
+        """Upload with one `rclone copy` process, parsing its JSON log."""
+        cmd = [self.rclone_path, 'copy', local_folder, destination]
+        
+        if files_from:
+            cmd.extend(['--files-from-raw', files_from])
+        else:
+            cmd.extend(['--exclude', f"{STAGING_DIR}/**"])
+            if ignore_file and os.path.exists(ignore_file):
+                cmd.extend(['--exclude-from', ignore_file])
+        
+        if profile is not None:
+            cmd.extend(profile.to_flags())
+        else:
+            cmd.extend(['--transfers', str(transfers)])
+            if checkers:
+                cmd.extend(['--checkers', str(checkers)])
+        
+        cmd.extend([
+            '--use-json-log',
+            '--stats', '2s',
+            '--log-level', 'INFO'
+        ])
+        
+        if progress_callback:
+            progress_callback(f"Executing: {' '.join(cmd)}")
+            progress_callback(f"Moving from: {local_folder}")
+            progress_callback(f"Moving to: {destination}")
+        
+        # Both pipes are drained concurrently so neither can fill up and stall rclone
+        pump = RcloneOutputPump(cmd)
+        pump.start()
+        recent_errors = deque(maxlen=20)
+        recent_messages = deque(maxlen=20)
+        
+        # Monitor progress
+        for line in pump:
+            if line.stream == 'stdout':
+                if progress_callback and line.text.strip():
+                    progress_callback(f"OUT: {line.text.strip()}")
+                continue
+            
+            event = parse_json_log_line(line.text)
+            if event is None:
+                continue
+            if event_callback and not isinstance(event, LogMessage):
+                event_callback(event)
+            self._report_event(event, progress_callback, recent_errors, recent_messages)
+        
+        if pump.returncode != 0:
+            error_msg = f"rclone failed with code {pump.returncode}"
+            if recent_errors or recent_messages:
+                error_msg += f": {(recent_errors or recent_messages)[-1]}"
+            if progress_callback:
+                progress_callback(f"ERROR: {error_msg}")
+            return False, {"error": error_msg}
+            
+        if progress_callback:
+            progress_callback("✅ Move completed successfully!")
+        return True, {"success": "Upload completed successfully"}
+    
+    def _upload_folder_rc(self, local_folder: str, destination: str, files_from: Optional[str],
+                          ignore_file: Optional[str], transfers: int, checkers: Optional[int],
+                          profile: Optional[TransferProfile] = None,
+                          progress_callback=None, event_callback=None) -> Tuple[bool, Dict]:
+        """Upload through the rc daemon as a sync/copy job."""
+        filter_opts = {}
+        if files_from:
+            filter_opts['FilesFromRaw'] = [files_from]
+        else:
+            filter_opts['ExcludeRule'] = [f"{STAGING_DIR}/**"]
+            if ignore_file and os.path.exists(ignore_file):
+                filter_opts['ExcludeFrom'] = [os.path.abspath(ignore_file)]
+        
+        if profile is not None:
+            config_opts = profile.to_rc_config()
+            # Backend options have no _config key; pass the chunk size in the
+            # remote's connection string instead
+            remote, path = destination.split(':', 1)
+            destination = f"{remote},chunk_size={profile.drive_chunk_size // 1024**2}M:{path}"
+        else:
+            config_opts = {'Transfers': transfers}
+            if checkers:
+                config_opts['Checkers'] = checkers
+        
+        if progress_callback:
+            progress_callback(f"Moving from: {local_folder}")
+            progress_callback(f"Moving to: {destination} (via rclone rcd)")
+        
+        recent_errors = deque(maxlen=20)
+        
+        def on_event(event):
+            if event_callback:
+                event_callback(event)
+            self._report_event(event, progress_callback, recent_errors, recent_errors)
+        
+        try:
+            success, result = self.rc.copy(local_folder, destination, filter_opts, config_opts, on_event)
+        except RcError as e:
+            success, result = False, {'error': str(e)}
+        
+        if not success:
+            if progress_callback:
+                progress_callback(f"ERROR: {result.get('error')}")
+            return False, result
+        
+        if progress_callback:
+            progress_callback("✅ Move completed successfully!")
+        return True, {"success": "Upload completed successfully"}
+    
+    def destination_for(self, local_folder: str) -> str:
+        """Remote path a local folder is archived to."""
+        return f"{self.remote_name}:{self.archive_folder}/{os.path.basename(local_folder)}"
+    
+    def plan_dedup(self, manifests: Dict[str, Manifest]) -> Tuple[Dict[str, DedupPlan],
+                                                                  Dict[str, List[ServerSideCopy]]]:
+        """Find files in these folders that the archive (or the batch itself) already holds."""
+        destinations = {folder: self.destination_for(folder) for folder in manifests}
+        return plan_dedup(manifests, destinations, self.dedup, self.hash_files,
+                          self.dedup_min_size)
+    
+    def hash_files(self, paths: List[str], progress_callback=None,
+                   cancel_event=None) -> Dict[str, str]:
+        """MD5 of each local path, through the hash cache when there is one.
+        
+        Files not in the cache are hashed in parallel by self.hasher;
+        progress_callback gets HashProgress reports and setting
+        cancel_event raises HashCancelled.
+        """
+        def compute(missing):
+            return self.hasher.hash_files(missing, progress_callback, cancel_event)
+        
+        if self.hash_cache is not None:
+            return self.hash_cache.hash_files(paths, compute=compute)
+        return compute(paths)
+    
+    def remote_hashes(self, manifest: Manifest, destination: str) -> Optional[Dict[str, Tuple[int, Optional[str]]]]:
+        """Size and MD5 of each manifest file found at destination, or None if listing failed.
+        
+        Only the manifest's paths are listed, so this is cheap for a small
+        batch inside a large remote folder.
+        """
+        found = {}
+        files_from = manifest.write_files_from()
+        try:
+            listed = self._scan_remote(
+                destination,
+                lambda item: found.__setitem__(item['Path'],
+                                               (item['Size'], (item.get('Hashes') or {}).get('md5'))),
+                with_hashes=True,
+                files_from=files_from
+            )
+        except subprocess.TimeoutExpired:
+            return None
+        finally:
+            os.remove(files_from)
+        return found if listed else None
+    
+    def hash_manifest(self, manifest: Manifest, progress_callback=None, cancel_event=None):
+        """Fill in the MD5 of every manifest entry that doesn't have one yet.
+        
+        progress_callback and cancel_event are passed on to hash_files.
+        """
+        unhashed = [entry for entry in manifest.entries if entry.hash is None]
+        hashes = self.hash_files([manifest.local_path(entry) for entry in unhashed],
+                                 progress_callback, cancel_event)
+        for entry in unhashed:
+            entry.hash = hashes.get(manifest.local_path(entry))
+    
+    def _server_side_copies(self, copies: List[ServerSideCopy], progress_callback=None,
+                            max_workers: int = 4) -> List[ServerSideCopy]:
+        """Copy duplicates within the remote, uploading the local file if that fails.
+        
+        Returns the copies that failed both ways.
+        """
+        def run(copy):
+            if self._copy_file(copy.source, copy.destination):
+                return True
+            if self.dedup is not None:
+                self.dedup.remove(copy.source)  # Stale entry
+            return self._copy_file(copy.local_path, copy.destination, local_source=True)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(run, copies))
+        
+        failed = [copy for copy, ok in zip(copies, results) if not ok]
+        if progress_callback:
+            progress_callback(f"Copied {len(copies) - len(failed):,} duplicate files server-side")
+            for copy in failed:
+                progress_callback(f"ERR: could not copy {copy.entry.path}")
+        return failed
+    
+    def _copy_file(self, source: str, destination: str, local_source: bool = False) -> bool:
+        """rclone copyto one file; server-side when both ends are on the remote."""
+        if self.rc is not None:
+            if local_source:
+                src_fs, src_remote = os.path.dirname(source), os.path.basename(source)
+            else:
+                src_fs, src_remote = source.split(':', 1)
+                src_fs += ':'
+            dst_fs, dst_remote = destination.split(':', 1)
+            try:
+                self.rc.copyfile(src_fs, src_remote, dst_fs + ':', dst_remote)
+                return True
+            except RcError:
+                return False
+        
+        result = subprocess.run([self.rclone_path, 'copyto', source, destination],
+                                capture_output=True, text=True)
+        return result.returncode == 0
+    
+    def _record_dedup(self, uploaded: Optional[Manifest], plan: DedupPlan, destination: str):
+        """Add a folder's hashed files to the dedup index once they're archived.
+        
+        Only files stored as plain remote objects are recorded; bundled and
+        compressed files can't be the source of a server-side copy.
+        """
+        if self.dedup is None:
+            return
+        entries = list(uploaded.entries) if uploaded is not None else []
+        entries += [copy.entry for copy in plan.copies + plan.deferred]
+        self.dedup.add_many(
+            (entry.hash, entry.size, f"{destination}/{entry.path}")
+            for entry in entries if entry.hash is not None
+        )
+    
+    def _log_throughput(self, profile: Optional[TransferProfile], stats: Optional[TransferStats],
+                        started: float, progress_callback, result: Dict):
+        """Record how fast a tuned upload ran so profiles can be compared."""
+        if profile is None:
+            return
+        elapsed = max(time.time() - started, 0.001)
+        transferred = stats.bytes if stats is not None else 0
+        result['profile'] = profile.name
+        result['bytes'] = transferred
+        result['elapsed'] = elapsed
+        if progress_callback:
+            progress_callback(f"Profile {profile.name}: {transferred / 1024**2:.1f} MB in "
+                              f"{elapsed:.0f}s ({format_speed(transferred / elapsed)})")
+    
+    @staticmethod
+    def _record_compression(compression, result: Dict):
+        """Add a job's compression ratio and CPU cost to its result."""
+        if compression is None:
+            return
+        result['compression'] = {
+            'raw_bytes': compression.raw_bytes,
+            'compressed_bytes': compression.compressed_bytes,
+            'ratio': compression.ratio,
+            'cpu_seconds': compression.cpu_seconds
+        }
+    
+    def _report_event(self, event, progress_callback, recent_errors, recent_messages):
+        """Turn a progress event into a log message and remember recent errors."""
+        if isinstance(event, TransferStats):
+            if progress_callback:
+                progress_callback(f"Moving files... {event.percent}% "
+                                  f"({event.transfers}/{event.total_transfers} files, "
+                                  f"{format_speed(event.speed)})")
+        elif isinstance(event, TransferError):
+            recent_errors.append(event.message)
+            if progress_callback:
+                name = f"{event.name}: " if event.name else ""
+                progress_callback(f"ERR: {name}{event.message}")
+        elif isinstance(event, FileTransferred):
+            if progress_callback:
+                progress_callback(f"{event.action}: {event.name}")
+        elif event.message:
+            recent_messages.append(event.message)
+            if progress_callback:
+                progress_callback(event.message)
+    
+    def verify_upload(self, local_folder: str, cloud_destination: str = None,
+                      manifest: Optional[Manifest] = None, progress_callback=None,
+                      cancel_event: Optional[threading.Event] = None) -> Tuple[bool, Dict]:
+        """Verify files were uploaded correctly.
+        
+        With a manifest, progress_callback gets HashProgress reports while
+        local files are hashed, and setting cancel_event stops the hashing
+        and fails the verification.
+        """
         if not cloud_destination:
             folder_name = os.path.basename(local_folder)
             cloud_destination = f"{self.remote_name}:{self.archive_folder}/{folder_name}"
+        
+        if manifest is not None:
+            return self._verify_against_manifest(manifest, cloud_destination,
+                                                 progress_callback, cancel_event)
             
         try:
             # Get cloud file count and size
-            result = subprocess.run(
-                [self.rclone_path, 'size', cloud_destination, '--json'],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
+            data = self._remote_size(cloud_destination)
+            if data is None:
                 return False, {"error": "Failed to check cloud files"}
-                
-            data = json.loads(result.stdout)
             
             # Run integrity check
-            check_cmd = [self.rclone_path, 'check', local_folder, cloud_destination, '--one-way']
-            check_result = subprocess.run(check_cmd, capture_output=True, text=True)
-            
-            verification_passed = check_result.returncode == 0
+            verification_passed = self._check(local_folder, cloud_destination)
             
             return verification_passed, {
                 'cloud_count': data.get('count', 0),
@@ -207,111 +643,351 @@ class CloudOperations:
                 'verification_passed': verification_passed
             }
             
+        except subprocess.TimeoutExpired as e:
+            return False, {"error": f"rclone timed out after {e.timeout:.0f}s"}
         except Exception as e:
             return False, {"error": str(e)}
     
-    def _matches_pattern(self, path: str, pattern: str) -> bool:
-        """Simple pattern matching for ignore files."""
-        import fnmatch
-        path_parts = path.replace('\\', '/').split('/')
-        pattern_parts = pattern.replace('\\', '/').split('/')
-        
-        for part, pat in zip(path_parts, pattern_parts):
-            if pat.startswith('**'):
-                return True
-            if not fnmatch.fnmatch(part, pat):
-                return False
-        return True
-    
-    def _parse_progress(self, line: str) -> Optional[Dict]:
-        """Parse rclone progress output."""
-        if 'Transferred:' in line and '%' in line:
-            try:
-                # Extract percentage
-                percent_match = line.split('%')[0].split()[-1]
-                percent = int(percent_match)
-                
-                # Extract speed
-                speed = ""
-                if 'ETA' in line:
-                    parts = line.split(',')
-                    for part in parts:
-                        if '/s' in part:
-                            speed = part.strip()
-                            break
-                
-                # Extract ETA
-                eta = ""
-                if 'ETA' in line:
-                    eta_part = line.split('ETA')[1].strip()
-                    eta = eta_part.split()[0] if eta_part else ""
-                
-                return {
-                    'percent': percent,
-                    'speed': speed,
-                    'eta': eta
-                }
-            except:
-                pass
-        return None
-    
-    def upload_multiple_folders(self, folders: List[str], progress_callback=None, 
-                               ignore_file: str = None) -> Tuple[bool, Dict]:
-        """Upload multiple folders to cloud storage."""
-        total_folders = len(folders)
-        upload_results = []
+    def _verify_against_manifest(self, manifest: Manifest, cloud_destination: str,
+                                 progress_callback=None,
+                                 cancel_event: Optional[threading.Event] = None) -> Tuple[bool, Dict]:
+        """Compare one streamed remote listing with the manifest and local MD5s.
         
+        The remote is listed once with hashes while local files are hashed
+        alongside (through the hash cache when there is one). Only files
+        without a remote hash go through rclone check.
+        """
+        files_from = None
         try:
-            for i, folder in enumerate(folders):
-                folder_name = os.path.basename(folder)
-                
-                if progress_callback:
-                    progress_callback(f"Uploading folder {i+1}/{total_folders}: {folder_name}")
-                
-                # Upload individual folder
-                success, result = self.upload_folder(
-                    folder, 
-                    progress_callback=lambda msg, f=folder_name: progress_callback(f"{f}: {msg}") if progress_callback else None,
-                    ignore_file=ignore_file
-                )
-                
-                upload_results.append({
-                    'folder': folder,
-                    'success': success,
-                    'result': result
-                })
-                
-                if not success:
-                    return False, {
-                        'error': f"Failed to upload {folder_name}",
-                        'results': upload_results
-                    }
+            expected = {entry.path for entry in manifest.entries}
+            remote_sizes: Dict[str, int] = {}
+            remote_hashes: Dict[str, Optional[str]] = {}
+            totals = {'count': 0, 'bytes': 0}
+            
+            def on_item(item):
+                path = item['Path']
+                totals['count'] += 1
+                totals['bytes'] += item.get('Size', 0)
+                # Keep only what the comparison needs, not the whole listing
+                if path in expected or path.startswith(f"{BUNDLE_DIR}/"):
+                    remote_sizes[path] = item['Size']
+                    remote_hashes[path] = (item.get('Hashes') or {}).get('md5')
+            
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                hashing = pool.submit(self.hash_manifest, manifest, progress_callback, cancel_event)
+                listed = self._scan_remote(cloud_destination, on_item, with_hashes=True)
+                hashing.result()
+            if not listed:
+                return False, {"error": "Failed to list cloud files"}
             
-            return True, {
-                'message': f"Successfully uploaded {total_folders} folders",
-                'results': upload_results
+            # Files packed into bundles are checked against the bundle index
+            bundle_problems = []
+            if f"{BUNDLE_DIR}/{INDEX_NAME}" in remote_sizes:
+                index = self.bundles.fetch_index(cloud_destination)
+                if index is None:
+                    return False, {"error": "Failed to read bundle index"}
+                bundle_problems = self._verify_bundles(manifest, index, remote_sizes, remote_hashes)
+                manifest = Manifest(manifest.root,
+                                    [e for e in manifest.entries if e.path not in index.files],
+                                    manifest.ignored_count)
+            
+            differences = manifest.diff(remote_sizes)
+            mismatched = [e.path for e in manifest.entries
+                          if remote_hashes.get(e.path) and e.hash
+                          and e.size == remote_sizes[e.path]
+                          and remote_hashes[e.path] != e.hash]
+            details = {
+                'cloud_count': totals['count'],
+                'cloud_size_gb': totals['bytes'] / (1024**3),
+                'missing': differences['missing'],
+                'size_mismatch': differences['size_mismatch'],
+                'hash_mismatch': mismatched
             }
             
+            if bundle_problems:
+                details['verification_passed'] = False
+                details['bundle_errors'] = bundle_problems
+                details['error'] = f"{len(bundle_problems)} bundled files failed verification"
+                return False, details
+            
+            if differences['missing'] or differences['size_mismatch'] or mismatched:
+                details['verification_passed'] = False
+                details['error'] = (f"{len(differences['missing'])} missing, "
+                                    f"{len(differences['size_mismatch'])} size mismatches, "
+                                    f"{len(mismatched)} hash mismatches in cloud")
+                return False, details
+            # Anything without a hash on either side still gets a full check
+            manifest = Manifest(manifest.root,
+                                [e for e in manifest.entries
+                                 if not (remote_hashes.get(e.path) and e.hash)],
+                                manifest.ignored_count)
+            if not manifest.entries:
+                details['verification_passed'] = True
+                return True, details
+            
+            # Integrity check limited to the manifest, so the local tree isn't walked
+            files_from = manifest.write_files_from()
+            verification_passed = self._check(manifest.root, cloud_destination, files_from)
+            details['verification_passed'] = verification_passed
+            if not verification_passed:
+                details['error'] = "Checksum differences found"
+            return verification_passed, details
+            
+        except subprocess.TimeoutExpired as e:
+            return False, {"error": f"rclone timed out after {e.timeout:.0f}s"}
+        except HashCancelled:
+            return False, {"error": "Verification cancelled"}
         except Exception as e:
-            return False, {'error': str(e), 'results': upload_results}
+            return False, {"error": str(e)}
+        finally:
+            if files_from:
+                try:
+                    os.remove(files_from)
+                except OSError:
+                    pass
     
-    def verify_multiple_uploads(self, folders: List[str]) -> Tuple[bool, Dict]:
-        """Verify multiple folder uploads."""
-        verification_results = []
-        
-        for folder in folders:
-            success, result = self.verify_upload(folder)
-            verification_results.append({
-                'folder': folder,
-                'success': success,
-                'result': result
-            })
-            
-            if not success:
-                return False, {
-                    'error': f"Verification failed for {os.path.basename(folder)}",
-                    'results': verification_results
-                }
+    @staticmethod
+    def _verify_bundles(manifest: Manifest, index, remote_sizes: Dict[str, int],
+                        remote_hashes: Dict[str, Optional[str]]) -> List[str]:
+        """Check the uploaded bundles' MD5s, and that bundled files haven't changed since packing.
+        
+        Each bundle's MD5 was taken from the bytes streamed to rclone, so a
+        matching remote MD5 proves the bundle arrived intact. A bundled
+        local file whose size or mtime differs from what was packed is not
+        what the bundle holds.
+        """
+        problems = []
+        for name, bundle in index.bundles.items():
+            path = f"{BUNDLE_DIR}/{name}"
+            if remote_sizes.get(path) != bundle.size:
+                problems.append(f"{name}: bundle missing or wrong size")
+            elif remote_hashes.get(path) != bundle.md5:
+                problems.append(f"{name}: bundle MD5 missing or different in cloud")
+        for entry in manifest.entries:
+            bundled = index.files.get(entry.path)
+            if bundled is None:
+                continue
+            if bundled.bundle not in index.bundles:
+                problems.append(f"{entry.path}: bundle {bundled.bundle} not in index")
+                continue
+            try:
+                st = os.stat(manifest.local_path(entry))
+            except OSError as e:
+                problems.append(f"{entry.path}: {e}")
+                continue
+            if (bundled.size != entry.size or st.st_size != bundled.size
+                    or st.st_mtime_ns != bundled.mtime_ns):
+                problems.append(f"{entry.path}: changed since it was bundled")
+        return problems
+    
+    def _remote_size(self, fs: str) -> Optional[Dict]:
+        """Count and bytes of a remote path, or None on failure."""
+        if self.rc is not None:
+            try:
+                return self.rc.size(fs, timeout=self.verify_timeout)
+            except RcTimeout:
+                raise subprocess.TimeoutExpired('operations/size', self.verify_timeout)
+            except RcError:
+                return None
+        
+        result = subprocess.run(
+            [self.rclone_path, 'size', fs, '--json'],
+            capture_output=True,
+            text=True,
+            timeout=self.verify_timeout
+        )
+        if result.returncode != 0:
+            return None
+        return json.loads(result.stdout)
+    
+    def _scan_remote(self, fs: str, on_item, with_hashes: bool = False,
+                     files_from: Optional[str] = None) -> bool:
+        """Recursively list a remote path, passing each lsjson item to on_item.
+        
+        The CLI listing uses --fast-list and is parsed as it streams in, so
+        it is never held in memory whole. with_hashes adds each file's MD5
+        under 'Hashes'; files_from limits the listing to the paths in that
+        file. Returns False if the listing failed; raises
+        subprocess.TimeoutExpired after verify_timeout.
+        """
+        if self.rc is not None:
+            opt = {'recurse': True, 'filesOnly': True}
+            if with_hashes:
+                opt.update(showHash=True, hashTypes=['md5'])
+            filter_opts = {'FilesFromRaw': [files_from]} if files_from else None
+            try:
+                items = self.rc.list(fs, filter_opts=filter_opts, timeout=self.verify_timeout, **opt)
+            except RcTimeout:
+                raise subprocess.TimeoutExpired('operations/list', self.verify_timeout)
+            except RcError:
+                return False
+            for item in items:
+                on_item(item)
+            return True
+        
+        cmd = [self.rclone_path, 'lsjson', fs, '-R', '--files-only', '--fast-list']
+        if with_hashes:
+            cmd.extend(['--hash', '--hash-type', 'md5'])
+        if files_from:
+            cmd.extend(['--files-from-raw', files_from])
+        pump = RcloneOutputPump(cmd)
+        pump.start()
+        timed_out = threading.Event()
+        
+        def expire():
+            timed_out.set()
+            pump.terminate()
+        
+        timer = threading.Timer(self.verify_timeout, expire)
+        timer.daemon = True
+        timer.start()
+        reader = JsonArrayReader()
+        try:
+            for line in pump:
+                if line.stream == 'stdout':
+                    for item in reader.feed(line.text + line.terminator):
+                        on_item(item)
+        except ValueError:
+            pump.terminate()
+            for _ in pump:
+                pass
+            return False
+        finally:
+            timer.cancel()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, self.verify_timeout)
+        return pump.returncode == 0 and reader.finished
+    
+    def _check(self, local_folder: str, cloud_destination: str, files_from: Optional[str] = None) -> bool:
+        """One-way rclone check of local files against the cloud copy."""
+        if self.rc is not None:
+            filter_opts = {'FilesFromRaw': [files_from]} if files_from else None
+            try:
+                success, _ = self.rc.check(local_folder, cloud_destination, True, filter_opts,
+                                           timeout=self.verify_timeout)
+            except RcError:
+                return False
+            return success
+        
+        check_cmd = [self.rclone_path, 'check', local_folder, cloud_destination, '--one-way']
+        if files_from:
+            check_cmd.extend(['--files-from-raw', files_from])
+        check_result = subprocess.run(check_cmd, capture_output=True, text=True,
+                                      timeout=self.verify_timeout)
+        return check_result.returncode == 0
+    
+    def upload_multiple_folders(self, folders: List[str], progress_callback=None, 
+                               ignore_file: str = None,
+                               manifests: Optional[Dict[str, Manifest]] = None,
+                               batch_progress_callback=None,
+                               event_callback=None,
+                               folder_done_callback=None) -> Tuple[bool, Dict]:
+        """Upload multiple folders to cloud storage concurrently.
+        
+        A failed folder doesn't stop the others; check 'failed' in the result.
+        With a dedup index, a file is uploaded once per batch and its other
+        copies are made server-side after the batch.
+        
+        folder_done_callback(folder, success, result) is called once a
+        folder is fully in the cloud (or has failed), while the rest of the
+        batch may still be uploading. A folder waiting on copies from
+        another folder is reported after the batch, once they are made.
+        """
+        scheduler = UploadScheduler(
+            self,
+            max_concurrent_jobs=self.max_concurrent_uploads,
+            transfer_budget=self.transfer_budget,
+            checker_budget=self.checker_budget
+        )
+        
+        dedup_plans, cross_folder = None, {}
+        if self.dedup is not None and manifests:
+            dedup_plans, cross_folder = self.plan_dedup(
+                {f: manifests[f] for f in folders if f in manifests})
+        
+        def on_folder_done(folder, success, result):
+            if folder_done_callback and not (success and cross_folder.get(folder)):
+                folder_done_callback(folder, success, result)
+        
+        success, result = scheduler.run(
+            folders,
+            progress_callback=progress_callback,
+            ignore_file=ignore_file,
+            manifests=manifests,
+            batch_progress_callback=batch_progress_callback,
+            event_callback=event_callback,
+            dedup_plans=dedup_plans,
+            folder_done_callback=on_folder_done
+        )
+        
+        # Duplicates of files uploaded by other folders in this batch
+        failed = list(result.get('failed', []))
+        for folder, copies in cross_folder.items():
+            if folder in failed:
+                continue
+            if self._server_side_copies(copies, progress_callback):
+                failed.append(folder)
+                if folder_done_callback:
+                    folder_done_callback(folder, False, {'error': "Server-side copies failed"})
+                continue
+            self.dedup.add_many((c.entry.hash, c.entry.size, c.destination) for c in copies)
+            if folder_done_callback:
+                folder_done_callback(folder, True, {})
+        
+        if len(failed) > len(result.get('failed', [])):
+            result['failed'] = failed
+            result['error'] = f"Failed to upload {len(failed)} of {len(folders)} folders"
+            success = False
+        return success, result
+    
+    def verify_multiple_uploads(self, folders: List[str],
+                                manifests: Optional[Dict[str, Manifest]] = None,
+                                result_callback=None,
+                                stop_on_failure: bool = True, progress_callback=None,
+                                cancel_event: Optional[threading.Event] = None) -> Tuple[bool, Dict]:
+        """Verify multiple folder uploads, up to max_concurrent_verifications at once.
+        
+        result_callback(folder, success, result) is called as each folder
+        finishes. The batch passes only if every folder does; with
+        stop_on_failure, folders not yet started are skipped after the
+        first failure. Results are returned in folder order.
+        progress_callback(folder, HashProgress) reports local hashing and
+        cancel_event is passed to every verify_upload.
+        """
+        manifests = manifests or {}
+        outcomes: Dict[str, Tuple[bool, Dict]] = {}
+        
+        def verify(folder):
+            folder_progress = None
+            if progress_callback:
+                folder_progress = lambda progress: progress_callback(folder, progress)
+            return self.verify_upload(folder, manifest=manifests.get(folder),
+                                      progress_callback=folder_progress, cancel_event=cancel_event)
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_verifications) as pool:
+            futures = {pool.submit(verify, folder): folder for folder in folders}
+            for future in as_completed(futures):
+                folder = futures[future]
+                if future.cancelled():
+                    continue
+                outcomes[folder] = future.result()
+                if result_callback:
+                    result_callback(folder, *outcomes[folder])
+                if not outcomes[folder][0] and stop_on_failure:
+                    for pending in futures:
+                        pending.cancel()
+        
+        verification_results = [
+            {'folder': folder, 'success': outcomes[folder][0], 'result': outcomes[folder][1]}
+            for folder in folders if folder in outcomes
+        ]
+        failed = [r['folder'] for r in verification_results if not r['success']]
+        if failed or len(outcomes) < len(folders):
+            names = ', '.join(os.path.basename(f) for f in failed)
+            return False, {
+                'error': f"Verification failed for {names}",
+                'results': verification_results
+            }
         
         return True, {
             'message': f"All {len(folders)} folders verified successfully",
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Optional zstd compression of upload streams in a process pool."""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency; compression is simply unavailable
+    zstandard = None
+
+# Extensions that usually compress well; already-compressed formats are left alone
+COMPRESSIBLE_EXTENSIONS = {
+    '.log', '.txt', '.csv', '.tsv', '.json', '.jsonl', '.xml', '.html', '.htm',
+    '.md', '.sql', '.yaml', '.yml', '.ini', '.cfg', '.conf', '.tar',
+    '.py', '.js', '.ts', '.java', '.c', '.h', '.cpp', '.hpp', '.cs', '.go',
+    '.rs', '.rb', '.php', '.sh', '.css', '.svg',
+}
+
+
+def compression_available() -> bool:
+    return zstandard is not None
+
+
+def is_compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def _compress_frame(data: bytes, level: int):
+    """Compress one independent zstd frame; runs in a worker process."""
+    started = time.process_time()
+    compressed = zstandard.ZstdCompressor(level=level).compress(data)
+    return compressed, time.process_time() - started
+
+
+@dataclass
+class CompressionStats:
+    """Totals for one job, to judge whether compression paid off."""
+    raw_bytes: int = 0
+    compressed_bytes: int = 0
+    cpu_seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        if not self.compressed_bytes:
+            return 1.0
+        return self.raw_bytes / self.compressed_bytes
+
+    def add(self, other: 'CompressionStats'):
+        self.raw_bytes += other.raw_bytes
+        self.compressed_bytes += other.compressed_bytes
+        self.cpu_seconds += other.cpu_seconds
+
+    def describe(self) -> str:
+        return (f"{self.raw_bytes / 1024**2:.1f} MB -> {self.compressed_bytes / 1024**2:.1f} MB "
+                f"({self.ratio:.1f}x, {self.cpu_seconds:.1f}s CPU)")
+
+
+@dataclass
+class FrameIndex:
+    """Compressed offset of every frame; frame i holds raw bytes [i*frame_size, (i+1)*frame_size)."""
+    frame_size: int
+    offsets: List[int] = field(default_factory=list)
+
+
+class ParallelZstdWriter:
+    """File-like object that compresses what it's given and writes it to fileobj.
+
+    Input is cut into fixed-size frames that are compressed independently
+    in the process pool, several at a time, and written out in order. The
+    concatenated frames form one valid zstd stream, and the frame index
+    lets a reader start decompressing at any frame boundary.
+    """
+
+    def __init__(self, fileobj, pool: ProcessPoolExecutor, level: int = 3,
+                 frame_size: int = 4 * 1024**2, max_in_flight: int = 8):
+        self.fileobj = fileobj
+        self.pool = pool
+        self.level = level
+        self.stats = CompressionStats()
+        self.frames = FrameIndex(frame_size)
+        self._buffer = bytearray()
+        self._pending = deque()
+        self._max_in_flight = max_in_flight
+
+    def write(self, data) -> int:
+        self._buffer += data
+        frame_size = self.frames.frame_size
+        while len(self._buffer) >= frame_size:
+            self._submit(bytes(self._buffer[:frame_size]))
+            del self._buffer[:frame_size]
+        return len(data)
+
+    def close(self):
+        """Compress the remaining input and wait for every frame to be written."""
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._write_oldest()
+
+    def _submit(self, data: bytes):
+        if len(self._pending) >= self._max_in_flight:
+            self._write_oldest()
+        self.stats.raw_bytes += len(data)
+        self._pending.append(self.pool.submit(_compress_frame, data, self.level))
+
+    def _write_oldest(self):
+        compressed, cpu_seconds = self._pending.popleft().result()
+        self.frames.offsets.append(self.stats.compressed_bytes)
+        self.fileobj.write(compressed)
+        self.stats.compressed_bytes += len(compressed)
+        self.stats.cpu_seconds += cpu_seconds
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompress one or more concatenated zstd frames."""
+    reader = zstandard.ZstdDecompressor().stream_reader(data, read_across_frames=True)
+    return reader.read()
+
+
+def decompressing_reader(fileobj):
+    """Wrap a binary stream of zstd frames in a reader of the raw bytes."""
+    return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Index of archived file contents, used to copy duplicates server-side."""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from core.manifest import Manifest, ManifestEntry
+
+
+@dataclass
+class ServerSideCopy:
+    """A file whose content is already in the archive at source.
+
+    local_path is uploaded instead if the server-side copy fails.
+    """
+    source: str
+    destination: str
+    local_path: str
+    entry: ManifestEntry
+
+
+@dataclass
+class DedupPlan:
+    """How one folder's upload splits into real uploads and server-side copies.
+
+    copies can run right away; deferred copies have a source that is
+    uploaded by the same job, so they must wait for it.
+    """
+    upload_manifest: Manifest
+    copies: List[ServerSideCopy] = field(default_factory=list)
+    deferred: List[ServerSideCopy] = field(default_factory=list)
+
+    @property
+    def saved_bytes(self) -> int:
+        return sum(c.entry.size for c in self.copies + self.deferred)
+
+
+class DedupIndex:
+    """SQLite map of (md5, size) to remote paths already in the archive.
+
+    Entries are added as uploads succeed, so the index covers every earlier
+    job run on this machine. A stale entry (the remote file was removed)
+    only costs a failed server-side copy, after which the file is uploaded.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS objects (
+                    md5 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    remote TEXT NOT NULL,
+                    PRIMARY KEY (md5, size, remote)
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one transaction; commits on success."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup_many(self, keys: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], str]:
+        """Find one remote path for each (md5, size) that's already archived."""
+        found = {}
+        with self._connect() as conn:
+            for md5, size in set(keys):
+                row = conn.execute('SELECT remote FROM objects WHERE md5 = ? AND size = ? LIMIT 1',
+                                   (md5, size)).fetchone()
+                if row:
+                    found[(md5, size)] = row[0]
+        return found
+
+    def add_many(self, objects: Iterable[Tuple[str, int, str]]):
+        """Record (md5, size, remote path) triples."""
+        with self._connect() as conn:
+            conn.executemany('INSERT OR IGNORE INTO objects VALUES (?, ?, ?)', list(objects))
+
+    def remove(self, remote: str):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM objects WHERE remote = ?', (remote,))
+
+
+def plan_dedup(manifests: Dict[str, Manifest], destinations: Dict[str, str],
+               index: DedupIndex, hash_files: Callable[[List[str]], Dict[str, str]],
+               min_size: int = 1024 * 1024) -> Tuple[Dict[str, DedupPlan],
+                                                     Dict[str, List[ServerSideCopy]]]:
+    """Split each folder's manifest into uploads and server-side copies.
+
+    Files of at least min_size are hashed with hash_files, which maps a
+    list of paths to their MD5s (the hash is kept on the manifest entry).
+    A file already in the index becomes a copy; a file whose content
+    appears earlier in the same batch is deferred until that copy is
+    uploaded. Deferred copies whose source is in another folder are returned
+    separately, by destination folder, since they can only run once the
+    whole batch is up.
+    """
+    unhashed = [(manifest, entry) for manifest in manifests.values() for entry in manifest.entries
+                if entry.size >= min_size and entry.hash is None]
+    hashes = hash_files([manifest.local_path(entry) for manifest, entry in unhashed])
+    for manifest, entry in unhashed:
+        entry.hash = hashes.get(manifest.local_path(entry))
+
+    archived = index.lookup_many(
+        (e.hash, e.size) for m in manifests.values() for e in m.entries if e.hash is not None
+    )
+
+    plans = {}
+    cross_folder: Dict[str, List[ServerSideCopy]] = {}
+    first_seen: Dict[Tuple[str, int], Tuple[str, str]] = {}
+    for folder, manifest in manifests.items():
+        destination = destinations[folder]
+        plan = DedupPlan(Manifest(manifest.root, [], manifest.ignored_count))
+        for entry in manifest.entries:
+            key = (entry.hash, entry.size)
+            target = f"{destination}/{entry.path}"
+            if entry.hash is None:
+                plan.upload_manifest.entries.append(entry)
+            elif key in archived:
+                plan.copies.append(ServerSideCopy(archived[key], target,
+                                                  manifest.local_path(entry), entry))
+            elif key in first_seen:
+                source_folder, source = first_seen[key]
+                copy = ServerSideCopy(source, target, manifest.local_path(entry), entry)
+                if source_folder == folder:
+                    plan.deferred.append(copy)
+                else:
+                    cross_folder.setdefault(folder, []).append(copy)
+            else:
+                first_seen[key] = (folder, target)
+                plan.upload_manifest.entries.append(entry)
+        plans[folder] = plan
+    return plans, cross_folder
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Parallel local deletion of moved folders."""
+
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.ignore_rules import IgnoreRules
+from core.manifest import Manifest
+
+
+@dataclass
+class DeletionResult:
+    """What a deletion removed, and every path it could not."""
+    files_deleted: int = 0
+    dirs_removed: int = 0
+    bytes_freed: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return not self.failed
+
+    def describe(self) -> str:
+        text = f"Deleted {self.files_deleted:,} files"
+        if self.failed:
+            text += f"; {len(self.failed):,} items could not be deleted"
+        return text
+
+
+class DeletionEngine:
+    """Deletes a folder with files unlinked in parallel and directories removed bottom-up.
+
+    Files come from the manifest when there is one. A single scandir pass
+    then picks up whatever is left (ignored files and the directories
+    themselves), so the tree is walked once instead of once per stage.
+    With a manifest, that pass only removes symlinks and what the ignore
+    rules match; any other file was not moved (it may have been created
+    after analysis), so it is reported as failed and kept with its parents.
+    Each directory's files go to the pool as one task, split into chunks
+    of chunk_size, so big and small directories are worked on together.
+    Failures are collected rather than skipped, and read-only files are
+    made writable and retried, as Windows requires.
+    """
+
+    def __init__(self, max_workers: int = 8, chunk_size: int = 256,
+                 report_interval: float = 0.25):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.report_interval = report_interval
+
+    def delete_tree(self, root: str, manifest: Optional[Manifest] = None,
+                    progress_callback: Optional[Callable[[DeletionResult, int], None]] = None,
+                    ignore_rules: Optional[IgnoreRules] = None) -> DeletionResult:
+        """Delete root and everything in it that was moved or ignored.
+
+        ignore_rules should be the rules the manifest was built with; without
+        a manifest everything under root is deleted.
+        progress_callback receives the running result and the number of
+        files known so far, at most every report_interval seconds.
+        """
+        result = DeletionResult()
+        lock = threading.Lock()
+        total = [0]
+        last_report = [0.0]
+
+        def report(force=False):
+            now = time.time()
+            if progress_callback and (force or now - last_report[0] >= self.report_interval):
+                last_report[0] = now
+                progress_callback(result, total[0])
+
+        def unlink_batch(files: List[Tuple[str, int]]):
+            for path, size in files:
+                error = _unlink(path)
+                with lock:
+                    if error is None:
+                        result.files_deleted += 1
+                        result.bytes_freed += size
+                    elif not isinstance(error, FileNotFoundError):
+                        result.failed.append((path, str(error)))
+                    report()
+
+        def unlink_all(files: List[Tuple[str, int]]):
+            by_dir: Dict[str, List[Tuple[str, int]]] = {}
+            for path, size in files:
+                by_dir.setdefault(os.path.dirname(path), []).append((path, size))
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [pool.submit(unlink_batch, group[start:start + self.chunk_size])
+                           for group in by_dir.values()
+                           for start in range(0, len(group), self.chunk_size)]
+                for future in futures:
+                    future.result()
+
+        if manifest is not None:
+            total[0] = manifest.file_count
+            unlink_all([(manifest.local_path(e), e.size) for e in manifest.entries])
+
+        if manifest is not None and ignore_rules is None:
+            ignore_rules = IgnoreRules()
+        leftover, dirs, kept = self._scan(root, result, ignore_rules if manifest is not None else None)
+        total[0] += len(leftover)
+        unlink_all(leftover)
+
+        kept_dirs = set()
+        for path in kept:
+            result.failed.append((path, "Not in the manifest; kept"))
+            parent = os.path.dirname(path)
+            while parent not in kept_dirs and len(parent) >= len(root):
+                kept_dirs.add(parent)
+                parent = os.path.dirname(parent)
+
+        # Deepest first, so each directory is empty by the time it's removed
+        for path in sorted((d for d in dirs if d not in kept_dirs),
+                           key=lambda d: d.count(os.sep), reverse=True):
+            try:
+                os.rmdir(path)
+                result.dirs_removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                result.failed.append((path, str(e)))
+
+        report(force=True)
+        return result
+
+    @staticmethod
+    def _scan(root: str, result: DeletionResult, ignore_rules: Optional[IgnoreRules] = None
+              ) -> Tuple[List[Tuple[str, int]], List[str], List[str]]:
+        """One walk of the remaining tree: (files to delete with sizes, directories
+        including root, files to keep).
+
+        Without ignore_rules every file is deleted; with them only symlinks
+        and ignored files or directories are, and the rest are kept.
+        """
+        files: List[Tuple[str, int]] = []
+        kept: List[str] = []
+        dirs = [root]
+        # (path, path relative to root, inside an ignored directory)
+        stack = [(root, '', ignore_rules is None)]
+        while stack:
+            path, rel_dir, removable = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.path)
+                            stack.append((entry.path, rel,
+                                          removable or ignore_rules.is_ignored_dir(rel)))
+                            continue
+                        if not (removable or entry.is_symlink() or ignore_rules.is_ignored_file(rel)):
+                            kept.append(entry.path)
+                            continue
+                        try:
+                            size = entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            size = 0
+                        files.append((entry.path, size))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                result.failed.append((path, str(e)))
+        return files, dirs, kept
+
+
+def _unlink(path: str) -> Optional[OSError]:
+    """Remove one file, clearing a read-only flag if needed; returns the error on failure."""
+    try:
+        os.unlink(path)
+        return None
+    except PermissionError as e:
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
+            return None
+        except OSError:
+            return e
+    except OSError as e:
+        return e
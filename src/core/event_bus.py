@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Typed, coalescing event bus from worker threads to the UI."""
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Hashable, List, Optional
+
+
+@dataclass
+class ProgressEvent:
+    """Overall progress; only the latest one pending is kept."""
+    percent: int
+    speed: str = ""
+    eta: str = ""
+
+    def coalesce_key(self) -> Optional[Hashable]:
+        return 'progress'
+
+
+@dataclass
+class DetailEvent:
+    """Text for the line under the progress bar; only the latest is kept."""
+    text: str
+
+    def coalesce_key(self) -> Optional[Hashable]:
+        return 'detail'
+
+
+@dataclass
+class FileDoneEvent:
+    """A file finished uploading; only the latest per folder is kept."""
+    folder: str
+    name: str
+    size: int
+
+    def coalesce_key(self) -> Optional[Hashable]:
+        return ('file', self.folder)
+
+
+@dataclass
+class PhaseEvent:
+    """A folder entered or finished a phase (upload, verify, delete)."""
+    folder: str
+    phase: str
+    status: str
+
+    def coalesce_key(self) -> Optional[Hashable]:
+        return None
+
+
+@dataclass
+class ErrorEvent:
+    """A failed transfer to flag under the progress bar (the log already has it)."""
+    message: str
+
+    def coalesce_key(self) -> Optional[Hashable]:
+        return None
+
+
+class EventBus:
+    """Bounded queue of events that workers publish and the UI drains on a timer.
+
+    An event with a coalesce key replaces the pending event with the same
+    key, so however fast a worker reports progress, the UI renders at most
+    one progress update per drain. Other events are kept in order, up to
+    max_events; past that the oldest are dropped and counted.
+    """
+
+    def __init__(self, max_events: int = 1000):
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=max_events)
+        self._latest: OrderedDict = OrderedDict()
+        self.dropped = 0
+
+    def publish(self, event):
+        """Queue an event; never blocks, safe from any thread."""
+        key = event.coalesce_key()
+        with self._lock:
+            if key is not None:
+                self._latest.pop(key, None)
+                self._latest[key] = event
+                return
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+
+    def drain(self) -> List:
+        """Take everything pending: ordered events first, then the latest coalesced state."""
+        with self._lock:
+            events = list(self._events) + list(self._latest.values())
+            self._events.clear()
+            self._latest.clear()
+        return events
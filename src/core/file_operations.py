@@ -1,110 +1,81 @@
 #!/usr/bin/env python3
 """File operations module for local file management."""
 
-import os
-import shutil
-import fnmatch
-from pathlib import Path
-from typing import Callable, Optional, List, Tuple
+from typing import Callable, Optional, Tuple
+
+from core.deletion import DeletionEngine, DeletionResult
+from core.ignore_rules import IgnoreRules
+from core.manifest import Manifest
+from core.scanner import FolderScanner
+
+# Shared scanner used when callers don't supply their own
+_default_scanner = FolderScanner()
+_deletion_engine = DeletionEngine()
 
 
 class FileOperations:
     """Handles local file operations like deletion and cleanup."""
     
     @staticmethod
-    def load_ignore_patterns(ignore_file_path: str) -> List[str]:
-        """Load ignore patterns from file."""
-        patterns = []
-        if os.path.exists(ignore_file_path):
-            with open(ignore_file_path, 'r') as f:
-                patterns = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-        return patterns
+    def load_ignore_rules(ignore_file_path: str) -> IgnoreRules:
+        """Load and compile ignore patterns from file."""
+        return IgnoreRules.from_file(ignore_file_path)
     
     @staticmethod
-    def matches_pattern(path: str, pattern: str) -> bool:
-        """Check if path matches ignore pattern."""
-        path_parts = path.replace('\\', '/').split('/')
-        pattern_parts = pattern.replace('\\', '/').split('/')
-        
-        # Handle ** patterns
-        if '**' in pattern:
-            return fnmatch.fnmatch(path.replace('\\', '/'), pattern.replace('\\', '/'))
+    def analyze_folder(folder: str, ignore_rules: IgnoreRules,
+                       scanner: Optional[FolderScanner] = None) -> Tuple[int, int, int]:
+        """Analyze folder and return (total_size, file_count, ignored_count).
         
-        # Simple pattern matching
-        for part, pat in zip(path_parts, pattern_parts):
-            if not fnmatch.fnmatch(part, pat):
-                return False
-        return True
+        ignored_count includes ignored folders, which are skipped without
+        being listed.
+        """
+        scanner = scanner or _default_scanner
+        result = scanner.scan(folder, ignore_rules)
+        return result.total_size, result.file_count, result.ignored_count + result.ignored_dirs
     
     @staticmethod
-    def analyze_folder(folder: str, ignore_patterns: List[str]) -> Tuple[int, int, int]:
-        """Analyze folder and return (total_size, file_count, ignored_count)."""
-        total_size = 0
-        file_count = 0
-        ignored_count = 0
-        
-        for root, dirs, files in os.walk(folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, folder)
-                
-                # Check if file should be ignored
-                is_ignored = any(FileOperations.matches_pattern(relative_path, pattern) 
-                               for pattern in ignore_patterns)
-                
-                if is_ignored:
-                    ignored_count += 1
-                else:
-                    try:
-                        total_size += os.path.getsize(file_path)
-                        file_count += 1
-                    except:
-                        pass
-        
-        return total_size, file_count, ignored_count
+    def build_manifest(folder: str, ignore_rules: IgnoreRules,
+                       scanner: Optional[FolderScanner] = None) -> Manifest:
+        """Scan folder once and return the manifest of files to move."""
+        scanner = scanner or _default_scanner
+        result = scanner.scan(folder, ignore_rules, collect_files=True)
+        return Manifest(folder, result.files, result.ignored_count + result.ignored_dirs)
     
     @staticmethod
-    def delete_folder(folder: str, progress_callback: Optional[Callable] = None) -> tuple[bool, str]:
+    def delete_folder(folder: str, progress_callback: Optional[Callable] = None,
+                      manifest: Optional[Manifest] = None,
+                      ignore_rules: Optional[IgnoreRules] = None) -> tuple[bool, str]:
         """Delete a folder and all its contents with progress tracking."""
+        result = FileOperations.delete_tree(folder, progress_callback, manifest, ignore_rules)
+        return result.success, result.describe()
+    
+    @staticmethod
+    def delete_tree(folder: str, progress_callback: Optional[Callable] = None,
+                    manifest: Optional[Manifest] = None,
+                    ignore_rules: Optional[IgnoreRules] = None) -> DeletionResult:
+        """Delete a folder and return what was freed and every path that failed.
+        
+        With a manifest, its files are deleted from the list instead of
+        walking the tree to find them, and of the files it doesn't list only
+        those ignore_rules match are deleted. progress_callback gets
+        (percent, message) like the other file operations.
+        """
+        def report(result: DeletionResult, total: int):
+            if progress_callback:
+                percent = int(result.files_deleted * 100 / total) if total else 100
+                progress_callback(percent, f"Deleting... {percent}% ({result.files_deleted:,} files, "
+                                           f"{FileOperations.format_size(result.bytes_freed)} freed)")
+        
         try:
-            # Count total items for progress
-            total_items = sum(1 for _ in Path(folder).rglob('*'))
-            deleted = 0
-            
-            # Delete files first
-            for item in Path(folder).rglob('*'):
-                if item.is_file():
-                    try:
-                        item.unlink()
-                        deleted += 1
-                        
-                        if progress_callback and deleted % 100 == 0:
-                            percent = int((deleted / total_items) * 100)
-                            progress_callback(percent, f"Deleting... {percent}%")
-                    except Exception as e:
-                        # Log but continue
-                        pass
-            
-            # Remove the directory tree
-            shutil.rmtree(folder)
-            
-            return True, f"Deleted {total_items:,} items"
-            
+            return _deletion_engine.delete_tree(folder, manifest, report, ignore_rules)
         except Exception as e:
-            return False, f"Delete error: {str(e)}"
+            return DeletionResult(failed=[(folder, f"Delete error: {str(e)}")])
     
     @staticmethod
-    def get_folder_size(folder: str) -> int:
+    def get_folder_size(folder: str, scanner: Optional[FolderScanner] = None) -> int:
         """Get total size of a folder in bytes."""
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(folder):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    total_size += os.path.getsize(filepath)
-                except:
-                    pass
-        return total_size
+        scanner = scanner or _default_scanner
+        return scanner.scan(folder).total_size
     
     @staticmethod
     def format_size(bytes_size: int) -> str:
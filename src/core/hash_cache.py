@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Persistent cache of local file MD5s."""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from core.hashing import HashingEngine
+
+
+class HashCache:
+    """SQLite store of MD5s keyed by (device, inode).
+
+    A cached hash is reused only while the file's size and mtime are also
+    unchanged, so only new or modified files are read again. Hashes are
+    stored as 16 raw bytes in a WITHOUT ROWID table to keep the database
+    small; evict() drops files that are gone and the least recently used
+    entries beyond max_entries.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 2_000_000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS hashes (
+                    dev INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    md5 BLOB NOT NULL,
+                    path TEXT NOT NULL,
+                    used INTEGER NOT NULL,
+                    PRIMARY KEY (dev, inode)
+                ) WITHOUT ROWID
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one transaction; commits on success."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def hash_files(self, paths: List[str],
+                   compute: Optional[Callable[[List[str]], Dict[str, str]]] = None) -> Dict[str, str]:
+        """MD5 of each path, hashing only files the cache doesn't know in their current state.
+
+        compute hashes a list of paths and returns path -> md5; the default
+        is a HashingEngine. Files that vanish are left out of the result.
+        """
+        stats = {}
+        for path in paths:
+            try:
+                stats[path] = os.stat(path)
+            except OSError:
+                continue
+
+        hashes = {}
+        now = int(time.time())
+        with self._connect() as conn:
+            for path, st in stats.items():
+                row = conn.execute(
+                    'SELECT md5 FROM hashes WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ?',
+                    (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+                ).fetchone()
+                if row:
+                    hashes[path] = row[0].hex()
+            conn.executemany(
+                'UPDATE hashes SET used = ? WHERE dev = ? AND inode = ?',
+                [(now, stats[p].st_dev, stats[p].st_ino) for p in hashes]
+            )
+
+        missing = [p for p in stats if p not in hashes]
+        if not missing:
+            return hashes
+
+        computed = (compute or HashingEngine().hash_files)(missing)
+
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (stats[p].st_dev, stats[p].st_ino, stats[p].st_size, stats[p].st_mtime_ns,
+                     bytes.fromhex(md5), p, now)
+                    for p, md5 in computed.items()
+                ]
+            )
+        hashes.update(computed)
+        return hashes
+
+    def evict(self) -> int:
+        """Drop entries for files that no longer exist or were replaced, then trim to max_entries.
+
+        Returns the number of entries removed.
+        """
+        stale = []
+        with self._connect() as conn:
+            for dev, inode, path in conn.execute('SELECT dev, inode, path FROM hashes'):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    stale.append((dev, inode))
+                    continue
+                if st.st_dev != dev or st.st_ino != inode:
+                    stale.append((dev, inode))
+
+        with self._connect() as conn:
+            conn.executemany('DELETE FROM hashes WHERE dev = ? AND inode = ?', stale)
+            removed = len(stale)
+            count = conn.execute('SELECT COUNT(*) FROM hashes').fetchone()[0]
+            if count > self.max_entries:
+                removed += count - self.max_entries
+                conn.execute(
+                    'DELETE FROM hashes WHERE (dev, inode) IN '
+                    '(SELECT dev, inode FROM hashes ORDER BY used LIMIT ?)',
+                    (count - self.max_entries,)
+                )
+        return removed
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Compiled .rcloneignore rules with directory pruning."""
+
+import hashlib
+import os
+import re
+from typing import List, Optional
+
+from core.staging import STAGING_DIR
+
+
+class IgnoreRules:
+    """Matches paths against .rcloneignore patterns using one compiled regex.
+
+    Patterns follow rclone's filter syntax:
+    - `*` matches within a path segment, `**` matches across segments
+    - `?`, `[abc]` and `{a,b}` work as in rclone
+    - a leading `/` anchors the pattern at the folder root, otherwise it
+      matches at the end of the path (`*.tmp` matches `a/b/c.tmp`)
+    - a trailing `/` makes it a directory rule; everything under a matching
+      directory is ignored, so scanners can skip the directory entirely
+
+    All file patterns are folded into a single regex and all directory
+    patterns into another, so each path costs one match call regardless of
+    how many patterns there are. The staging area that --staged-delete
+    creates beside moved folders is always ignored.
+    """
+
+    def __init__(self, patterns: Optional[List[str]] = None):
+        self.patterns = [p.strip() for p in (patterns or []) if p.strip()]
+        file_regexes = []
+        dir_regexes = []
+
+        for pattern in self.patterns:
+            pattern = pattern.replace('\\', '/')
+            if pattern.endswith('/'):
+                dir_regexes.append(self._translate(pattern.rstrip('/')))
+            else:
+                file_regexes.append(self._translate(pattern))
+
+        self._file_regex = self._combine(file_regexes)
+        self._dir_regex = self._combine(dir_regexes)
+
+    @classmethod
+    def from_file(cls, ignore_file: Optional[str]) -> 'IgnoreRules':
+        """Load rules from an ignore file; a missing file yields no rules."""
+        patterns = []
+        if ignore_file and os.path.exists(ignore_file):
+            with open(ignore_file, 'r') as f:
+                patterns = [
+                    line.strip() for line in f
+                    if line.strip() and not line.lstrip().startswith(('#', ';'))
+                ]
+        return cls(patterns)
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable identifier for this rule set, used to key cached scans."""
+        return hashlib.sha1('\n'.join(self.patterns).encode('utf-8')).hexdigest()
+
+    def is_ignored_dir(self, relative_path: str) -> bool:
+        """Check whether a directory (and so its whole subtree) is ignored."""
+        relative_path = relative_path.replace('\\', '/')
+        if relative_path.rsplit('/', 1)[-1] == STAGING_DIR:
+            return True
+        if self._dir_regex is None:
+            return False
+        return self._dir_regex.search(relative_path) is not None
+
+    def is_ignored_file(self, relative_path: str) -> bool:
+        """Check a file whose parent directories are already known not to be ignored."""
+        if self._file_regex is None:
+            return False
+        return self._file_regex.search(relative_path.replace('\\', '/')) is not None
+
+    def is_ignored(self, relative_path: str) -> bool:
+        """Check a file path, including every parent directory on the way."""
+        relative_path = relative_path.replace('\\', '/').strip('/')
+        parts = relative_path.split('/')
+        for depth in range(1, len(parts)):
+            if self.is_ignored_dir('/'.join(parts[:depth])):
+                return True
+        return self.is_ignored_file(relative_path)
+
+    @staticmethod
+    def _combine(regexes: List[str]):
+        if not regexes:
+            return None
+        return re.compile('|'.join(f'(?:{regex})' for regex in regexes))
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Translate one rclone glob into a regex fragment."""
+        if pattern.startswith('/'):
+            return '^' + IgnoreRules._translate_glob(pattern[1:]) + '$'
+        return '(?:^|/)' + IgnoreRules._translate_glob(pattern) + '$'
+
+    @staticmethod
+    def _translate_glob(pattern: str) -> str:
+        out = []
+        i = 0
+        n = len(pattern)
+        while i < n:
+            c = pattern[i]
+            if c == '*':
+                if pattern.startswith('**', i):
+                    i += 2
+                    if pattern.startswith('/', i):
+                        # `**/` also matches zero directories
+                        out.append('(?:.*/)?')
+                        i += 1
+                    else:
+                        out.append('.*')
+                    continue
+                out.append('[^/]*')
+            elif c == '?':
+                out.append('[^/]')
+            elif c == '[':
+                end = pattern.find(']', i + 1)
+                if end == -1:
+                    out.append(re.escape(c))
+                else:
+                    body = pattern[i + 1:end]
+                    if body.startswith('!'):
+                        body = '^' + body[1:]
+                    out.append(f'[{body}]')
+                    i = end
+            elif c == '{':
+                end = pattern.find('}', i + 1)
+                if end == -1:
+                    out.append(re.escape(c))
+                else:
+                    options = pattern[i + 1:end].split(',')
+                    out.append('(?:' + '|'.join(IgnoreRules._translate_glob(o) for o in options) + ')')
+                    i = end
+            else:
+                out.append(re.escape(c))
+            i += 1
+
+        return ''.join(out)
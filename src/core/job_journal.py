@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Append-only journal of a move job, so an interrupted move can be resumed."""
+
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+# A folder goes through these phases in order
+PHASES = ('upload', 'verify', 'delete')
+
+
+@dataclass
+class JobState:
+    """What a journal says about a job, rebuilt by replaying its records."""
+    job_id: str
+    path: str
+    folders: List[str] = field(default_factory=list)
+    started: float = 0.0
+    phases: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    uploaded: Dict[str, Set[str]] = field(default_factory=dict)
+    deleted: Dict[str, Set[str]] = field(default_factory=dict)
+    finished: bool = False
+
+    def is_done(self, folder: str, phase: str) -> bool:
+        return self.phases.get(folder, {}).get(phase) == 'done'
+
+    def pending_phase(self, folder: str) -> Optional[str]:
+        """First phase the folder hasn't completed, or None if it's fully moved."""
+        for phase in PHASES:
+            if not self.is_done(folder, phase):
+                return phase
+        return None
+
+    def describe(self) -> str:
+        pending = [f for f in self.folders if self.pending_phase(f)]
+        started = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.started))
+        names = ', '.join(os.path.basename(f) for f in pending[:3])
+        if len(pending) > 3:
+            names += f" and {len(pending) - 3} more"
+        text = f"{len(pending)} of {len(self.folders)} folders unfinished ({names}), started {started}"
+        deleted = sum(len(paths) for paths in self.deleted.values())
+        if deleted:
+            # Already gone from disk, so the resumed scan won't see them
+            text += f"; {deleted:,} files already deleted after upload"
+        return text
+
+
+class JobJournal:
+    """One JSON record per line, appended and fsynced as the job progresses.
+
+    File confirmations are batched so a fast upload doesn't fsync per file;
+    phase changes flush immediately. A torn last line after a crash is
+    ignored on replay. The file is removed once the job finishes.
+    """
+
+    def __init__(self, path: str, flush_every: int = 500, flush_interval: float = 2.0):
+        self.path = path
+        self.job_id = os.path.splitext(os.path.basename(path))[0]
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[str]] = {}
+        self._pending_count = 0
+        self._last_flush = time.time()
+        self._repair_tail()
+
+    @classmethod
+    def create(cls, journal_dir: str, folders: List[str]) -> 'JobJournal':
+        """Start a journal for a new job."""
+        os.makedirs(journal_dir, exist_ok=True)
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        journal = cls(os.path.join(journal_dir, f"{job_id}.jsonl"))
+        journal._append([{'type': 'start', 'job': job_id, 'folders': folders, 'time': time.time()}])
+        return journal
+
+    def record_phase(self, folder: str, phase: str, status: str):
+        """Record a folder entering ('started'), finishing ('done') or failing ('failed') a phase."""
+        with self._lock:
+            records = self._take_pending()
+            records.append({'type': 'phase', 'folder': folder, 'phase': phase,
+                            'status': status, 'time': time.time()})
+            self._append(records)
+
+    def confirm_uploaded(self, folder: str, path: str):
+        """Note that rclone reported a file as copied."""
+        with self._lock:
+            self._pending.setdefault(folder, []).append(path)
+            self._pending_count += 1
+            if (self._pending_count >= self.flush_every
+                    or time.time() - self._last_flush >= self.flush_interval):
+                self._append(self._take_pending())
+
+    def record_deleted(self, folder: str, paths: List[str]):
+        """Record files about to be deleted ahead of the folder's delete phase.
+
+        Written and fsynced before the files are unlinked, so the journal
+        never misses a deletion.
+        """
+        with self._lock:
+            records = self._take_pending()
+            records.append({'type': 'deleted', 'folder': folder, 'paths': paths})
+            self._append(records)
+
+    def flush(self):
+        with self._lock:
+            records = self._take_pending()
+            if records:
+                self._append(records)
+
+    def finish(self):
+        """Mark the job complete and drop its journal."""
+        self.flush()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def state(self) -> JobState:
+        self.flush()
+        return replay(self.path)
+
+    def _repair_tail(self):
+        # A crash mid-write leaves a partial last line; end it so new records start cleanly
+        try:
+            with open(self.path, 'rb+') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        except FileNotFoundError:
+            pass
+
+    def _take_pending(self) -> List[Dict]:
+        records = [{'type': 'uploaded', 'folder': folder, 'paths': paths}
+                   for folder, paths in self._pending.items()]
+        self._pending = {}
+        self._pending_count = 0
+        return records
+
+    def _append(self, records: List[Dict]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._last_flush = time.time()
+
+
+def replay(path: str) -> JobState:
+    """Rebuild a job's state from its journal."""
+    state = JobState(job_id=os.path.splitext(os.path.basename(path))[0], path=path)
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn write from a crash
+            kind = record.get('type')
+            if kind == 'start':
+                state.folders = record['folders']
+                state.started = record.get('time', 0.0)
+            elif kind == 'phase':
+                state.phases.setdefault(record['folder'], {})[record['phase']] = record['status']
+            elif kind == 'uploaded':
+                state.uploaded.setdefault(record['folder'], set()).update(record['paths'])
+            elif kind == 'deleted':
+                state.deleted.setdefault(record['folder'], set()).update(record['paths'])
+    state.finished = bool(state.folders) and all(state.pending_phase(f) is None
+                                                  for f in state.folders)
+    return state
+
+
+def find_unfinished(journal_dir: str) -> List[JobState]:
+    """Unfinished jobs in journal_dir, newest first."""
+    if not os.path.isdir(journal_dir):
+        return []
+    states = []
+    for name in os.listdir(journal_dir):
+        if not name.endswith('.jsonl'):
+            continue
+        try:
+            state = replay(os.path.join(journal_dir, name))
+        except OSError:
+            continue
+        if state.finished:
+            # Finished but not yet removed when the app stopped
+            try:
+                os.remove(state.path)
+            except OSError:
+                pass
+        elif state.folders:
+            states.append(state)
+    states.sort(key=lambda s: s.started, reverse=True)
+    return states
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Manifest of the files a move job includes, built from a single scan."""
+
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from core.transfer_tuning import SizeHistogram
+
+
+@dataclass
+class ManifestEntry:
+    """One included file, relative to the manifest root with '/' separators."""
+    path: str
+    size: int
+    mtime_ns: int
+    hash: Optional[str] = None
+
+
+class Manifest:
+    """The included files of one folder, reused by upload, verify and delete."""
+
+    def __init__(self, root: str, entries: Optional[List[ManifestEntry]] = None,
+                 ignored_count: int = 0):
+        self.root = root
+        self.entries = entries or []
+        self.ignored_count = ignored_count
+
+    @property
+    def file_count(self) -> int:
+        return len(self.entries)
+
+    @property
+    def total_size(self) -> int:
+        return sum(entry.size for entry in self.entries)
+
+    def size_histogram(self) -> SizeHistogram:
+        """File-size distribution of the included files."""
+        return SizeHistogram.from_sizes(entry.size for entry in self.entries)
+
+    def local_path(self, entry: ManifestEntry) -> str:
+        """Absolute local path of an entry."""
+        return os.path.join(self.root, *entry.path.split('/'))
+
+    def write_files_from(self) -> str:
+        """Write the entry paths to a temp file for rclone --files-from-raw.
+
+        The caller removes the file when done.
+        """
+        fd, path = tempfile.mkstemp(prefix='cloud-mover-', suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+            for entry in self.entries:
+                f.write(entry.path + '\n')
+        return path
+
+    def diff(self, remote_sizes: Dict[str, int]) -> Dict[str, List[str]]:
+        """Compare against a remote listing of path -> size."""
+        missing = []
+        size_mismatch = []
+        for entry in self.entries:
+            remote_size = remote_sizes.get(entry.path)
+            if remote_size is None:
+                missing.append(entry.path)
+            elif remote_size != entry.size:
+                size_mismatch.append(entry.path)
+        return {'missing': missing, 'size_mismatch': size_mismatch}
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Typed progress events parsed from rclone's JSON log (--use-json-log)."""
+
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class FileProgress:
+    """A file rclone is currently transferring."""
+    name: str
+    bytes: int
+    size: int
+    speed: float = 0.0
+
+
+@dataclass
+class TransferStats:
+    """A periodic stats record covering the whole rclone job."""
+    bytes: int = 0
+    total_bytes: int = 0
+    speed: float = 0.0
+    eta: Optional[int] = None
+    transfers: int = 0
+    total_transfers: int = 0
+    checks: int = 0
+    total_checks: int = 0
+    errors: int = 0
+    transferring: List[FileProgress] = field(default_factory=list)
+
+    @property
+    def percent(self) -> int:
+        if self.total_bytes <= 0:
+            return 0
+        return min(100, int(self.bytes * 100 / self.total_bytes))
+
+
+@dataclass
+class FileTransferred:
+    """A file rclone reports as finished, e.g. 'Copied (new)'."""
+    name: str
+    size: int
+    action: str
+
+
+@dataclass
+class TransferError:
+    """An error-level log record."""
+    message: str
+    name: Optional[str] = None
+
+
+@dataclass
+class LogMessage:
+    """Any other log record, or a line that wasn't JSON."""
+    level: str
+    message: str
+    name: Optional[str] = None
+
+
+def stats_from_dict(stats: dict) -> TransferStats:
+    """Build TransferStats from rclone's stats JSON (JSON log or rc core/stats)."""
+    return TransferStats(
+        bytes=stats.get('bytes', 0),
+        total_bytes=stats.get('totalBytes', 0),
+        speed=stats.get('speed', 0.0) or 0.0,
+        eta=stats.get('eta'),
+        transfers=stats.get('transfers', 0),
+        total_transfers=stats.get('totalTransfers', 0),
+        checks=stats.get('checks', 0),
+        total_checks=stats.get('totalChecks', 0),
+        errors=stats.get('errors', 0),
+        transferring=[
+            FileProgress(
+                name=item.get('name', ''),
+                bytes=item.get('bytes', 0),
+                size=item.get('size', 0),
+                speed=item.get('speed', 0.0) or 0.0
+            )
+            for item in stats.get('transferring') or []
+        ]
+    )
+
+
+def parse_json_log_line(line: str):
+    """Turn one line of rclone --use-json-log output into an event.
+
+    Returns None for blank lines.
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return LogMessage('info', line)
+    if not isinstance(record, dict):
+        return LogMessage('info', line)
+
+    level = record.get('level', 'info')
+    message = (record.get('msg') or '').strip()
+    name = record.get('object')
+
+    stats = record.get('stats')
+    if isinstance(stats, dict):
+        return stats_from_dict(stats)
+
+    if level in ('error', 'critical', 'fatal'):
+        return TransferError(message, name)
+
+    if name and message.startswith(('Copied', 'Moved', 'Multi-thread Copied')):
+        return FileTransferred(name, record.get('size', 0), message)
+
+    return LogMessage(level, message, name)
+
+
+def format_speed(bytes_per_second: float) -> str:
+    """Format a transfer rate for display."""
+    for unit in ['B/s', 'KB/s', 'MB/s', 'GB/s']:
+        if bytes_per_second < 1024.0:
+            return f"{bytes_per_second:.1f} {unit}"
+        bytes_per_second /= 1024.0
+    return f"{bytes_per_second:.1f} TB/s"
+
+
+def format_eta(seconds: Optional[int]) -> str:
+    """Format an ETA in seconds as h:mm:ss or m:ss."""
+    if seconds is None:
+        return ""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Last known remote quota, kept on disk for the next launch."""
+
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+class QuotaCache:
+    """JSON file holding the most recent `rclone about` result per remote.
+
+    The UI shows it while the live check is still running. An entry older
+    than ttl seconds is treated as missing, so stale numbers aren't shown
+    as current. Writes go to a temporary file first and are then renamed
+    over the old one, so a crash never leaves a half-written cache.
+    """
+
+    def __init__(self, path: str, ttl: float = 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+
+    def load(self, remote: str, now: Optional[float] = None) -> Optional[Dict]:
+        """The cached about data for remote, or None if there is none or it has expired."""
+        now = time.time() if now is None else now
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entry = json.load(f).get(remote)
+        except (OSError, ValueError, AttributeError):
+            return None
+        if not isinstance(entry, dict) or now - entry.get('checked_at', 0) > self.ttl:
+            return None
+        return entry.get('about')
+
+    def save(self, remote: str, about: Dict):
+        """Remember about data for remote; failures to write are ignored."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                data = {}
+        except (OSError, ValueError):
+            data = {}
+        data[remote] = {'checked_at': time.time(), 'about': about}
+
+        cache_dir = os.path.dirname(self.path)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
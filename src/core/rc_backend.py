@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Long-lived rclone remote-control (rcd) backend."""
+
+import base64
+import json
+import secrets
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from core.progress import FileTransferred, stats_from_dict
+
+
+class RcError(Exception):
+    """An rc call failed or returned an error."""
+
+
+class RcTimeout(RcError):
+    """An rc job was stopped because it ran past its timeout."""
+
+
+class RcClient:
+    """Minimal JSON client for rclone's rc HTTP API.
+
+    Takes any base URL, so it can talk to a real `rclone rcd` or to a local
+    stand-in server in tests.
+    """
+
+    def __init__(self, url: str, user: Optional[str] = None, password: Optional[str] = None,
+                 timeout: float = 30):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self._auth = None
+        if user is not None:
+            token = base64.b64encode(f"{user}:{password or ''}".encode('utf-8')).decode('ascii')
+            self._auth = f"Basic {token}"
+
+    def call(self, method: str, **params) -> Dict:
+        """POST params to url/method and return the decoded JSON reply."""
+        request = urllib.request.Request(
+            f"{self.url}/{method}",
+            data=json.dumps(params).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        if self._auth:
+            request.add_header('Authorization', self._auth)
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read() or b'{}')
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', str(e))
+            except ValueError:
+                message = str(e)
+            raise RcError(f"{method}: {message}") from e
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise RcError(f"{method}: {e}") from e
+
+
+class RcloneDaemon:
+    """Starts and stops one `rclone rcd` bound to localhost."""
+
+    def __init__(self, rclone_path: str):
+        self.rclone_path = rclone_path
+        self.process: Optional[subprocess.Popen] = None
+        self.client: Optional[RcClient] = None
+
+    def start(self, startup_timeout: float = 15) -> RcClient:
+        """Launch rcd on a free port with random credentials and wait until it answers."""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        user = 'cloud-mover'
+        password = secrets.token_urlsafe(16)
+
+        self.process = subprocess.Popen(
+            [self.rclone_path, 'rcd',
+             '--rc-addr', f'127.0.0.1:{port}',
+             '--rc-user', user,
+             '--rc-pass', password],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        self.client = RcClient(f"http://127.0.0.1:{port}", user, password)
+
+        deadline = time.time() + startup_timeout
+        while True:
+            try:
+                self.client.call('rc/noop')
+                return self.client
+            except RcError:
+                if self.process.poll() is not None or time.time() > deadline:
+                    self.stop()
+                    raise RcError("rclone rcd did not start")
+                time.sleep(0.2)
+
+    def stop(self):
+        """Ask rcd to quit, killing it if it doesn't."""
+        if self.process is None:
+            return
+        try:
+            if self.client is not None:
+                self.client.call('core/quit')
+        except RcError:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+        self.client = None
+
+
+class RcBackend:
+    """Runs copy, size, check and about as rc jobs on a running daemon.
+
+    Every call reuses the daemon's already-loaded config and warmed-up
+    remote instead of starting a new rclone process.
+    """
+
+    def __init__(self, client: RcClient, poll_interval: float = 1.0):
+        self.client = client
+        self.poll_interval = poll_interval
+
+    def list_remotes(self) -> List[str]:
+        return self.client.call('config/listremotes').get('remotes', [])
+
+    def about(self, fs: str) -> Dict:
+        return self.client.call('operations/about', fs=fs)
+
+    def size(self, fs: str, timeout: Optional[float] = None) -> Dict:
+        """operations/size as an async job, so a large remote isn't cut off by the HTTP timeout."""
+        return self._job_output('operations/size', {'fs': fs}, timeout)
+
+    def list(self, fs: str, remote: str = '', filter_opts: Optional[Dict] = None,
+             timeout: Optional[float] = None, **opt) -> List[Dict]:
+        """operations/list as an async job, returning the lsjson-style items."""
+        params = {'fs': fs, 'remote': remote, 'opt': opt}
+        if filter_opts:
+            params['_filter'] = filter_opts
+        return self._job_output('operations/list', params, timeout).get('list', [])
+
+    def copyfile(self, src_fs: str, src_remote: str, dst_fs: str, dst_remote: str):
+        """Copy one file; server-side when both ends are on the same remote."""
+        self.client.call('operations/copyfile', srcFs=src_fs, srcRemote=src_remote,
+                         dstFs=dst_fs, dstRemote=dst_remote)
+
+    def copy(self, src_fs: str, dst_fs: str, filter_opts: Optional[Dict] = None,
+             config_opts: Optional[Dict] = None, event_callback=None) -> Tuple[bool, Dict]:
+        """Run sync/copy as an async job, polling its stats until it finishes."""
+        params = {'srcFs': src_fs, 'dstFs': dst_fs, 'createEmptySrcDirs': False}
+        if filter_opts:
+            params['_filter'] = filter_opts
+        if config_opts:
+            params['_config'] = config_opts
+        return self._run_job('sync/copy', params, event_callback)
+
+    def check(self, src_fs: str, dst_fs: str, one_way: bool = True,
+              filter_opts: Optional[Dict] = None,
+              timeout: Optional[float] = None) -> Tuple[bool, Dict]:
+        """Run operations/check as an async job, stopping it after timeout seconds."""
+        params = {'srcFs': src_fs, 'dstFs': dst_fs, 'oneWay': one_way}
+        if filter_opts:
+            params['_filter'] = filter_opts
+        success, output = self._run_job('operations/check', params, timeout=timeout)
+        if success and output.get('success') is False:
+            return False, {'error': output.get('status') or "Differences found"}
+        return success, output
+
+    def _job_output(self, method: str, params: Dict, timeout: Optional[float]) -> Dict:
+        """Run an async job and return its output; raises RcError, or RcTimeout after timeout."""
+        success, output = self._run_job(method, params, timeout=timeout)
+        if not success:
+            raise (RcTimeout if output.get('timed_out') else RcError)(output['error'])
+        return output
+
+    def _run_job(self, method: str, params: Dict, event_callback=None,
+                 timeout: Optional[float] = None) -> Tuple[bool, Dict]:
+        job_id = self.client.call(method, _async=True, **params)['jobid']
+        group = f"job/{job_id}"
+        reported = set()
+        deadline = time.time() + timeout if timeout is not None else None
+
+        while True:
+            status = self.client.call('job/status', jobid=job_id)
+
+            if event_callback:
+                event_callback(stats_from_dict(self.client.call('core/stats', group=group)))
+                transferred = self.client.call('core/transferred', group=group).get('transferred', [])
+                for item in transferred:
+                    name = item.get('name', '')
+                    if name in reported or item.get('error') or item.get('checked'):
+                        continue
+                    reported.add(name)
+                    event_callback(FileTransferred(name, item.get('size', 0), "Copied"))
+
+            if status.get('finished'):
+                if status.get('success'):
+                    return True, status.get('output') or {}
+                return False, {'error': status.get('error') or f"{method} failed"}
+
+            if deadline is not None and time.time() > deadline:
+                self.client.call('job/stop', jobid=job_id)
+                return False, {'error': f"{method} timed out after {timeout:.0f}s", 'timed_out': True}
+
+            time.sleep(self.poll_interval)
+
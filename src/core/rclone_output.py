@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Non-blocking reader for rclone's stdout and stderr."""
+
+import asyncio
+import codecs
+import json
+import queue
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional
+
+_LINE_BREAK = re.compile(r'(\r\n|\r|\n)')
+_DONE = object()
+
+
+@dataclass
+class OutputLine:
+    """One line from rclone; terminator is '\\r' for in-place stats updates."""
+    stream: str
+    text: str
+    terminator: str = '\n'
+
+
+class LineSplitter:
+    """Incrementally splits a byte stream on \\n, \\r\\n and bare \\r."""
+
+    def __init__(self, encoding: str = 'utf-8'):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._buffer = ''
+
+    def feed(self, data: bytes) -> List[OutputLine]:
+        """Add a chunk and return the lines it completed."""
+        text = self._buffer + self._decoder.decode(data)
+
+        # A trailing \r may be the first half of \r\n, so hold it back
+        held_cr = text.endswith('\r')
+        if held_cr:
+            text = text[:-1]
+
+        parts = _LINE_BREAK.split(text)
+        lines = [OutputLine('', parts[i], parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        self._buffer = parts[-1] + ('\r' if held_cr else '')
+        return lines
+
+    def flush(self) -> List[OutputLine]:
+        """Return whatever is left once the stream has ended."""
+        text = self._buffer + self._decoder.decode(b'', final=True)
+        self._buffer = ''
+        terminator = '\r' if text.endswith('\r') else ''
+        text = text.rstrip('\r')
+        return [OutputLine('', text, terminator)] if text else []
+
+
+class JsonArrayReader:
+    """Incrementally parses a JSON array, such as lsjson output, item by item.
+
+    Feed text as it arrives and each complete element is returned
+    straight away, so a listing of millions of files is never held as one
+    string or one parsed list.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._started = False
+        self.finished = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Add text and return the elements it completed."""
+        self._buffer += text
+        items = []
+        pos = 0
+        buffer = self._buffer
+        while not self.finished:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not self._started:
+                if buffer[pos] != '[':
+                    raise ValueError(f"Expected a JSON array, got {buffer[pos]!r}")
+                self._started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                self.finished = True
+                pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Element not complete yet
+            items.append(item)
+            pos = end
+        self._buffer = buffer[pos:]
+        return items
+
+
+class RcloneOutputPump:
+    """Runs a command and delivers its stdout/stderr lines through a bounded queue.
+
+    Both pipes are read concurrently by an asyncio loop on a background
+    thread, so a burst on one stream can never fill its pipe while we wait
+    on the other. Iterate over the pump to receive OutputLines in arrival
+    order; iteration ends when both streams close and the process exits.
+    If the consumer falls behind, the queue fills and reading pauses until
+    it catches up.
+    """
+
+    def __init__(self, cmd: List[str], max_queue: int = 1000):
+        self.cmd = cmd
+        self.returncode: Optional[int] = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._process = None
+        self._loop = None
+        self._stopping = threading.Event()
+        self._started = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def start(self):
+        """Launch the process and start pumping its output."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            raise self._error
+
+    def __iter__(self) -> Iterator[OutputLine]:
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                break
+            yield item
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def terminate(self):
+        """Stop the process; iteration ends once its pipes close."""
+        self._stopping.set()
+        if self._loop is not None and self._process is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._process.terminate)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    def _put(self, item):
+        # Block while the consumer catches up, but give up if we're stopping
+        while True:
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if self._stopping.is_set():
+                    return
+
+    def _put_done(self):
+        # The end marker must always arrive, or the consumer waits forever;
+        # when stopping, unread lines are discarded to make room for it
+        while True:
+            try:
+                self._queue.put(_DONE, timeout=0.5)
+                return
+            except queue.Full:
+                if self._stopping.is_set():
+                    try:
+                        self._queue.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._pump())
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._started.set()
+            self._loop.close()
+            self._put_done()
+
+    async def _pump(self):
+        self._process = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        self._started.set()
+        await asyncio.gather(
+            self._read(self._process.stdout, 'stdout'),
+            self._read(self._process.stderr, 'stderr')
+        )
+        self.returncode = await self._process.wait()
+
+    async def _read(self, stream: asyncio.StreamReader, name: str):
+        splitter = LineSplitter()
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            for line in splitter.feed(chunk):
+                line.stream = name
+                self._put(line)
+        for line in splitter.flush():
+            line.stream = name
+            self._put(line)
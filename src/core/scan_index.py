@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Persistent per-directory scan index for incremental folder analysis."""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class DirRecord:
+    """Totals for the files directly inside one directory."""
+    path: str
+    dev: int
+    inode: int
+    mtime_ns: int
+    own_bytes: int = 0
+    own_files: int = 0
+    own_ignored: int = 0
+    own_ignored_dirs: int = 0
+    subdirs: List[str] = field(default_factory=list)
+    # [name, size, mtime_ns] per included file; only kept for manifest scans
+    files: Optional[List[list]] = None
+
+    def matches(self, stat_result: os.stat_result) -> bool:
+        """Check whether the directory is unchanged since it was recorded."""
+        return (self.mtime_ns == stat_result.st_mtime_ns
+                and self.inode == stat_result.st_ino
+                and self.dev == stat_result.st_dev)
+
+
+class ScanIndex:
+    """SQLite store of DirRecords, keyed by scan and directory path.
+
+    The scan key names the ignore rule set and the folder the scan started
+    from: rules match paths relative to that folder, so the same directory
+    can be filtered differently when it is reached from another root.
+
+    A directory's mtime changes when entries are added, removed or renamed
+    in it, so an unchanged (mtime, inode, device) means its own file list
+    and subdirectory list can be reused without listing it again. Files
+    rewritten in place don't touch their directory's mtime; for totals their
+    old size is kept until something else changes in that directory, while
+    manifest scans re-stat the stored files and list the directory again if
+    any of them changed.
+
+    Per-file listings are only stored for directories scanned while building
+    a manifest, so browsing doesn't turn the index into a copy of the disk.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS dirs (
+                    rules TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    dev INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    own_bytes INTEGER NOT NULL,
+                    own_files INTEGER NOT NULL,
+                    own_ignored INTEGER NOT NULL,
+                    own_ignored_dirs INTEGER NOT NULL,
+                    subdirs TEXT NOT NULL,
+                    files TEXT,
+                    PRIMARY KEY (rules, path)
+                )
+            ''')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(dirs)')]
+            if 'files' not in columns:
+                conn.execute('ALTER TABLE dirs ADD COLUMN files TEXT')
+            # Records from before version 1 counted symlinks as files, before
+            # version 2 they were keyed by the rules alone, and before version 3
+            # they could list the staging area as a subdirectory
+            if conn.execute('PRAGMA user_version').fetchone()[0] < 3:
+                conn.execute('DELETE FROM dirs')
+                conn.execute('PRAGMA user_version = 3')
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one transaction; commits on success."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _subtree_bounds(root: str):
+        prefix = root.rstrip('\\/') + os.sep
+        return prefix, prefix + '\uffff'
+
+    def load(self, rules_key: str, root: str) -> Dict[str, DirRecord]:
+        """Load every recorded directory at or below root."""
+        low, high = self._subtree_bounds(root)
+        records = {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT path, dev, inode, mtime_ns, own_bytes, own_files, own_ignored, '
+                'own_ignored_dirs, subdirs, files FROM dirs '
+                'WHERE rules = ? AND (path = ? OR (path >= ? AND path < ?))',
+                (rules_key, root, low, high)
+            )
+            for row in rows:
+                record = DirRecord(*row[:8], subdirs=json.loads(row[8]),
+                                   files=json.loads(row[9]) if row[9] is not None else None)
+                records[record.path] = record
+        return records
+
+    def replace_subtree(self, rules_key: str, root: str, records: List[DirRecord]):
+        """Replace everything recorded at or below root with a fresh scan."""
+        low, high = self._subtree_bounds(root)
+        with self._connect() as conn:
+            conn.execute(
+                'DELETE FROM dirs WHERE rules = ? AND (path = ? OR (path >= ? AND path < ?))',
+                (rules_key, root, low, high)
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (rules_key, r.path, r.dev, r.inode, r.mtime_ns, r.own_bytes, r.own_files,
+                     r.own_ignored, r.own_ignored_dirs, json.dumps(r.subdirs),
+                     json.dumps(r.files) if r.files is not None else None)
+                    for r in records
+                ]
+            )
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Parallel folder scanner shared by analysis and size calculations."""
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from core.ignore_rules import IgnoreRules
+from core.manifest import ManifestEntry
+from core.scan_index import DirRecord, ScanIndex
+
+
+def default_scan_workers() -> int:
+    """Default worker count - scanning is I/O bound, so oversubscribe the CPUs."""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+@dataclass
+class ScanResult:
+    """Aggregated totals for a scanned folder."""
+    total_size: int = 0
+    file_count: int = 0
+    ignored_count: int = 0
+    ignored_dirs: int = 0
+    error_count: int = 0
+    cancelled: bool = False
+    files: List[ManifestEntry] = field(default_factory=list)
+
+    def merge(self, other: 'ScanResult'):
+        """Add another partial result into this one."""
+        self.files.extend(other.files)
+        self.total_size += other.total_size
+        self.file_count += other.file_count
+        self.ignored_count += other.ignored_count
+        self.ignored_dirs += other.ignored_dirs
+        self.error_count += other.error_count
+
+
+class FolderScanner:
+    """Walks folder trees with os.scandir, splitting subtrees across a thread pool.
+
+    Each directory is listed once and file sizes come from DirEntry.stat(),
+    which on Windows is served from the directory listing itself instead of
+    costing a separate stat call per file. Symlinks are counted as ignored,
+    since rclone copy skips them.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, index: Optional[ScanIndex] = None):
+        self.max_workers = max_workers or default_scan_workers()
+        self.index = index
+
+    def scan(self, folder: str, ignore_rules: Optional[IgnoreRules] = None,
+             cancel_event: Optional[threading.Event] = None,
+             collect_files: bool = False) -> ScanResult:
+        """Scan a folder tree and return its totals.
+
+        Directories matched by ignore_rules are counted in ignored_dirs and
+        never listed. With an index, directories unchanged since the last
+        scan are taken from it instead of being listed again. Setting
+        cancel_event stops the scan early with a partial, cancelled result.
+        collect_files lists every included file in result.files.
+        """
+        ignore_rules = ignore_rules or IgnoreRules()
+        cached = {}
+        if self.index is not None:
+            folder = os.path.abspath(folder)
+            # Rules match paths relative to folder, so records are only valid for this root
+            scan_key = f"{ignore_rules.fingerprint}|{folder}"
+            try:
+                cached = self.index.load(scan_key, folder)
+            except sqlite3.Error:
+                cached = {}
+
+        result = ScanResult()
+        records = []
+
+        def collect(partial, record):
+            result.merge(partial)
+            if record is not None:
+                records.append(record)
+
+        if self.max_workers <= 1:
+            stack = [(folder, '')]
+            while stack:
+                if cancel_event is not None and cancel_event.is_set():
+                    result.cancelled = True
+                    break
+                partial, subdirs, record = self._scan_dir(stack.pop(), ignore_rules, cached, collect_files)
+                collect(partial, record)
+                stack.extend(subdirs)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                pending = {pool.submit(self._scan_dir, (folder, ''), ignore_rules,
+                                       cached, collect_files)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        partial, subdirs, record = future.result()
+                        collect(partial, record)
+                        if cancel_event is not None and cancel_event.is_set():
+                            result.cancelled = True
+                            continue
+                        for subdir in subdirs:
+                            pending.add(pool.submit(self._scan_dir, subdir, ignore_rules,
+                                                    cached, collect_files))
+
+        if self.index is not None and not result.cancelled:
+            try:
+                self.index.replace_subtree(scan_key, folder, records)
+            except sqlite3.Error:
+                pass
+
+        return result
+
+    def _scan_dir(self, directory: Tuple[str, str], ignore_rules: IgnoreRules,
+                  cached: Dict[str, DirRecord], collect_files: bool) -> Tuple[ScanResult, List[Tuple[str, str]], Optional[DirRecord]]:
+        """List one directory, returning its file totals, subdirectories and index record."""
+        path, relative = directory
+        result = ScanResult()
+        subdirs = []
+
+        record = None
+        if self.index is not None:
+            try:
+                dir_stat = os.stat(path)
+            except OSError:
+                result.error_count += 1
+                return result, subdirs, None
+
+            previous = cached.get(path)
+            if (previous is not None and previous.matches(dir_stat)
+                    and (not collect_files or self._files_unchanged(path, previous.files))):
+                if collect_files:
+                    result.files = [
+                        ManifestEntry(f"{relative}/{name}" if relative else name, size, mtime_ns)
+                        for name, size, mtime_ns in previous.files
+                    ]
+                result.total_size = previous.own_bytes
+                result.file_count = previous.own_files
+                result.ignored_count = previous.own_ignored
+                result.ignored_dirs = previous.own_ignored_dirs
+                for name in previous.subdirs:
+                    subdirs.append((os.path.join(path, name),
+                                    f"{relative}/{name}" if relative else name))
+                return result, subdirs, previous
+
+            record = DirRecord(path, dir_stat.st_dev, dir_stat.st_ino, dir_stat.st_mtime_ns)
+
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    entry_relative = f"{relative}/{entry.name}" if relative else entry.name
+                    try:
+                        if entry.is_symlink():
+                            # rclone copy skips symlinks, so they never reach the cloud
+                            result.ignored_count += 1
+                            continue
+
+                        if entry.is_dir(follow_symlinks=False):
+                            if ignore_rules.is_ignored_dir(entry_relative):
+                                result.ignored_dirs += 1
+                            else:
+                                subdirs.append((entry.path, entry_relative))
+                            continue
+
+                        if ignore_rules.is_ignored_file(entry_relative):
+                            result.ignored_count += 1
+                        else:
+                            entry_stat = entry.stat(follow_symlinks=False)
+                            result.total_size += entry_stat.st_size
+                            result.file_count += 1
+                            if collect_files:
+                                result.files.append(ManifestEntry(
+                                    entry_relative, entry_stat.st_size, entry_stat.st_mtime_ns
+                                ))
+                    except OSError:
+                        result.error_count += 1
+        except OSError:
+            result.error_count += 1
+
+        if record is not None and result.error_count == 0:
+            record.own_bytes = result.total_size
+            record.own_files = result.file_count
+            record.own_ignored = result.ignored_count
+            record.own_ignored_dirs = result.ignored_dirs
+            record.subdirs = [os.path.basename(subdir_path) for subdir_path, _ in subdirs]
+            if collect_files:
+                record.files = [
+                    [entry.path.rsplit('/', 1)[-1], entry.size, entry.mtime_ns]
+                    for entry in result.files
+                ]
+        else:
+            record = None
+
+        return result, subdirs, record
+
+    @staticmethod
+    def _files_unchanged(path: str, files: Optional[List[list]]) -> bool:
+        """Re-stat a cached file list, since rewriting a file doesn't change its directory's mtime."""
+        if files is None:
+            return False
+        for name, size, mtime_ns in files:
+            try:
+                file_stat = os.stat(os.path.join(path, name), follow_symlinks=False)
+            except OSError:
+                return False
+            if file_stat.st_size != size or file_stat.st_mtime_ns != mtime_ns:
+                return False
+        return True
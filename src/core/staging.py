@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Rename-then-purge staging for folders that have been moved to the cloud."""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+STAGING_DIR = '.cloud-mover-staging'
+
+
+@dataclass
+class StagedFolder:
+    """A verified folder waiting in the staging area to be purged."""
+    item_id: str
+    original: str
+    staged: str
+    size: int
+    staged_at: float
+    purging: bool = False
+
+
+class StagingArea:
+    """Moves verified folders out of the way instantly and keeps them until purged.
+
+    stage() renames a folder into a hidden directory next to it. That keeps
+    it on the same volume, so the rename is a single atomic step no matter
+    how big the folder is. Each folder is recorded in SQLite before the
+    rename, so recover() can tidy up after a crash between the two. A
+    folder can be listed and restored until the purger starts on it.
+    """
+
+    def __init__(self, db_path: str, purge_delay: float = 15 * 60):
+        self.db_path = db_path
+        self.purge_delay = purge_delay
+        self._lock = threading.Lock()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS staged (
+                    item_id TEXT PRIMARY KEY,
+                    original TEXT NOT NULL,
+                    staged TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    staged_at REAL NOT NULL,
+                    purging INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one transaction; commits on success."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def stage(self, folder: str, size: int = 0) -> StagedFolder:
+        """Rename folder into the staging area; raises OSError if it can't be moved."""
+        folder = os.path.abspath(folder)
+        staging_root = os.path.join(os.path.dirname(folder), STAGING_DIR)
+        os.makedirs(staging_root, exist_ok=True)
+        _hide(staging_root)
+
+        item = StagedFolder(
+            item_id=uuid.uuid4().hex,
+            original=folder,
+            staged='',
+            size=size,
+            staged_at=time.time()
+        )
+        item.staged = os.path.join(staging_root, f"{item.item_id}-{os.path.basename(folder)}")
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute('INSERT INTO staged VALUES (?, ?, ?, ?, ?, 0)',
+                             (item.item_id, item.original, item.staged, item.size, item.staged_at))
+            try:
+                os.rename(folder, item.staged)
+            except OSError:
+                self._forget(item.item_id)
+                raise
+        return item
+
+    def pending(self) -> List[StagedFolder]:
+        """Staged folders not yet purged, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT item_id, original, staged, size, staged_at, purging '
+                                'FROM staged ORDER BY staged_at').fetchall()
+        return [StagedFolder(*row[:5], purging=bool(row[5])) for row in rows]
+
+    def restore(self, item_id: str) -> Tuple[bool, str]:
+        """Move a staged folder back to where it was, unless its purge has started."""
+        with self._lock:
+            item = next((i for i in self.pending() if i.item_id == item_id), None)
+            if item is None:
+                return False, "Folder is no longer staged"
+            if item.purging:
+                return False, "Folder is already being purged"
+            if os.path.exists(item.original):
+                return False, f"{item.original} already exists"
+            try:
+                os.rename(item.staged, item.original)
+            except OSError as e:
+                return False, f"Restore failed: {e}"
+            self._forget(item_id)
+        return True, f"Restored {item.original}"
+
+    def claim_for_purge(self, now: Optional[float] = None) -> Optional[StagedFolder]:
+        """Mark the oldest folder past purge_delay as being purged and return it.
+
+        A folder already marked (its purge was interrupted) is returned
+        first so the purge finishes.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for item in self.pending():
+                if item.purging or item.staged_at + self.purge_delay <= now:
+                    with self._connect() as conn:
+                        conn.execute('UPDATE staged SET purging = 1 WHERE item_id = ?', (item.item_id,))
+                    item.purging = True
+                    return item
+        return None
+
+    def purged(self, item: StagedFolder):
+        """Forget a folder whose staged copy is gone, removing an empty staging directory."""
+        self._forget(item.item_id)
+        try:
+            os.rmdir(os.path.dirname(item.staged))
+        except OSError:
+            pass  # Other folders are still staged there
+
+    def recover(self) -> int:
+        """Drop records whose rename never happened or whose folder is already gone.
+
+        Returns the number of records dropped.
+        """
+        dropped = 0
+        for item in self.pending():
+            if not os.path.exists(item.staged):
+                self._forget(item.item_id)
+                dropped += 1
+        return dropped
+
+    def _forget(self, item_id: str):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM staged WHERE item_id = ?', (item_id,))
+
+
+class Purger:
+    """Deletes staged folders on a background thread at a limited rate.
+
+    Files are unlinked one at a time, at most files_per_second, so purging
+    never competes hard with the user's own disk use. Progress lives on
+    disk, since the staged folder simply shrinks, so after a restart the
+    purger carries on where it stopped.
+    """
+
+    def __init__(self, staging: StagingArea, files_per_second: int = 200,
+                 poll_interval: float = 30.0):
+        self.staging = staging
+        self.files_per_second = files_per_second
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.staging.recover()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            item = self.staging.claim_for_purge()
+            if item is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            if self._purge(item.staged):
+                self.staging.purged(item)
+
+    def _purge(self, path: str) -> bool:
+        """Remove path bottom-up; returns False if stopped or something couldn't be removed."""
+        interval = 1.0 / self.files_per_second if self.files_per_second else 0.0
+        ok = True
+        for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+            for name in filenames + [d for d in dirnames
+                                     if os.path.islink(os.path.join(dirpath, d))]:
+                if self._stop.is_set():
+                    return False
+                try:
+                    os.unlink(os.path.join(dirpath, name))
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    ok = False
+                if interval:
+                    time.sleep(interval)
+            try:
+                os.rmdir(dirpath)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                ok = False
+        if not ok:
+            # Try again on a later pass rather than spinning on it now
+            self._stop.wait(self.poll_interval)
+        return ok and not os.path.exists(path)
+
+
+def _hide(path: str):
+    """Set the hidden attribute on Windows; elsewhere the leading dot is enough."""
+    if os.name != 'nt':
+        return
+    try:
+        import ctypes
+        FILE_ATTRIBUTE_HIDDEN = 0x2
+        ctypes.windll.kernel32.SetFileAttributesW(str(path), FILE_ATTRIBUTE_HIDDEN)
+    except (ImportError, AttributeError, OSError):
+        pass
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Deletes local files while their folder is still uploading."""
+
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Set
+
+from core.job_journal import JobJournal
+from core.manifest import Manifest, ManifestEntry
+
+_DONE = object()
+
+
+class StreamingDeleter:
+    """Frees a folder's space file by file as rclone confirms each upload.
+
+    Confirmed paths are queued, and a background thread takes them in
+    batches. For each batch it lists just those files' remote MD5s and
+    deletes every local file that meets three checks: its size and mtime
+    still match the manifest, its MD5 matches the remote copy, and the
+    remote size matches. Each batch is written to the job journal before
+    any of its files is unlinked. Files that fail a check stay on disk for
+    the folder's normal verify and delete phases.
+    """
+
+    def __init__(self, cloud_ops, journal: JobJournal, folder: str, manifest: Manifest,
+                 destination: str, batch_size: int = 200, batch_interval: float = 5.0,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
+        self.cloud_ops = cloud_ops
+        self.journal = journal
+        self.folder = folder
+        self.manifest = manifest
+        self.destination = destination
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.progress_callback = progress_callback
+        self.deleted: Set[str] = set()
+        self.freed_bytes = 0
+        self._entries = {entry.path: entry for entry in manifest.entries}
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def confirm(self, path: str):
+        """Queue a file rclone reported as copied; paths outside the manifest are ignored."""
+        if path in self._entries:
+            self._queue.put(path)
+
+    def close(self) -> Manifest:
+        """Finish the queued files and return the manifest of files still on disk."""
+        self._queue.put(_DONE)
+        self._thread.join()
+        return Manifest(self.manifest.root,
+                        [e for e in self.manifest.entries if e.path not in self.deleted],
+                        self.manifest.ignored_count)
+
+    def _run(self):
+        batch: List[str] = []
+        deadline = time.time() + self.batch_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                item = None
+            if item is _DONE:
+                break
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or (batch and time.time() >= deadline):
+                self._process(batch)
+                batch = []
+            if time.time() >= deadline:
+                deadline = time.time() + self.batch_interval
+        if batch:
+            self._process(batch)
+
+    def _process(self, paths: List[str]):
+        # A file changed since the scan is not what was uploaded
+        entries = [e for e in (self._entries[p] for p in set(paths)) if self._unchanged(e)]
+        if not entries:
+            return
+
+        batch = Manifest(self.manifest.root, entries)
+        try:
+            local = self.cloud_ops.hash_files([batch.local_path(e) for e in entries])
+        except Exception:
+            return
+        remote = self.cloud_ops.remote_hashes(batch, self.destination)
+        if remote is None:
+            return
+
+        confirmed: List[ManifestEntry] = []
+        for entry in entries:
+            md5 = local.get(batch.local_path(entry))
+            if md5 is not None and remote.get(entry.path) == (entry.size, md5):
+                entry.hash = md5
+                confirmed.append(entry)
+        if not confirmed:
+            return
+
+        self.journal.record_deleted(self.folder, [e.path for e in confirmed])
+        for entry in confirmed:
+            try:
+                os.unlink(batch.local_path(entry))
+            except OSError:
+                continue
+            self.deleted.add(entry.path)
+            self.freed_bytes += entry.size
+        if self.progress_callback:
+            self.progress_callback(len(self.deleted), self.freed_bytes)
+
+    def _unchanged(self, entry: ManifestEntry) -> bool:
+        try:
+            st = os.stat(self.manifest.local_path(entry))
+        except OSError:
+            return False
+        return st.st_size == entry.size and st.st_mtime_ns == entry.mtime_ns
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Pick rclone transfer settings from the file-size distribution of a job."""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+MB = 1024 ** 2
+GB = 1024 ** 3
+
+# rclone keeps a --buffer-size read-ahead buffer per transfer (16M default)
+_BUFFER_PER_TRANSFER = 16 * MB
+
+
+class SizeHistogram:
+    """File counts and bytes in power-of-two size buckets.
+
+    Bucket n holds files with size.bit_length() == n, i.e. sizes in
+    [2**(n-1), 2**n); bucket 0 holds empty files.
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.bytes: Dict[int, int] = {}
+
+    @classmethod
+    def from_sizes(cls, sizes: Iterable[int]) -> 'SizeHistogram':
+        histogram = cls()
+        for size in sizes:
+            histogram.add(size)
+        return histogram
+
+    def add(self, size: int):
+        bucket = size.bit_length()
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.bytes[bucket] = self.bytes.get(bucket, 0) + size
+
+    def merge(self, other: 'SizeHistogram'):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+            self.bytes[bucket] = self.bytes.get(bucket, 0) + other.bytes[bucket]
+
+    @property
+    def file_count(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.bytes.values())
+
+    def fraction_of_files_below(self, size: int) -> float:
+        """Share of files smaller than size (rounded to bucket boundaries)."""
+        if not self.file_count:
+            return 0.0
+        limit = size.bit_length()
+        return sum(c for b, c in self.counts.items() if b < limit) / self.file_count
+
+    def fraction_of_bytes_at_least(self, size: int) -> float:
+        """Share of bytes held by files of at least size (rounded to bucket boundaries)."""
+        if not self.total_bytes:
+            return 0.0
+        limit = size.bit_length()
+        return sum(n for b, n in self.bytes.items() if b >= limit) / self.total_bytes
+
+    def describe(self) -> str:
+        """One-line summary for the activity log."""
+        if not self.file_count:
+            return "no files"
+        return (f"{self.file_count:,} files, "
+                f"{self.fraction_of_files_below(1 * MB):.0%} under 1 MB, "
+                f"{self.fraction_of_bytes_at_least(1 * GB):.0%} of bytes in files of 1 GB+")
+
+
+@dataclass
+class TransferProfile:
+    """A named set of rclone transfer settings."""
+    name: str
+    transfers: int
+    checkers: int
+    drive_chunk_size: int
+    order_by: str
+    multi_thread_streams: int = 4
+    multi_thread_cutoff: int = 256 * MB
+
+    def to_flags(self) -> List[str]:
+        """Command line flags for rclone copy."""
+        return [
+            '--transfers', str(self.transfers),
+            '--checkers', str(self.checkers),
+            '--drive-chunk-size', f"{self.drive_chunk_size // MB}M",
+            '--order-by', self.order_by,
+            '--multi-thread-streams', str(self.multi_thread_streams),
+            '--multi-thread-cutoff', f"{self.multi_thread_cutoff // MB}M",
+        ]
+
+    def to_rc_config(self) -> Dict:
+        """Global options for an rc job's _config."""
+        return {
+            'Transfers': self.transfers,
+            'Checkers': self.checkers,
+            'OrderBy': self.order_by,
+            'MultiThreadStreams': self.multi_thread_streams,
+            'MultiThreadCutoff': self.multi_thread_cutoff,
+        }
+
+    def describe(self) -> str:
+        return (f"{self.name}: transfers={self.transfers}, checkers={self.checkers}, "
+                f"chunk={self.drive_chunk_size // MB}M, order-by={self.order_by}, "
+                f"multi-thread={self.multi_thread_streams}x above {self.multi_thread_cutoff // MB}M")
+
+
+def tune_transfers(histogram: SizeHistogram, memory_limit: int = 512 * MB,
+                   max_transfers: int = 16, max_checkers: int = 32) -> TransferProfile:
+    """Choose transfer settings for a job with the given size distribution.
+
+    Each upload to Drive holds one chunk plus a read-ahead buffer in memory,
+    so transfers x (chunk + buffer) is kept under memory_limit.
+    """
+    max_transfers = max(1, max_transfers)
+    max_checkers = max(1, max_checkers)
+
+    if histogram.fraction_of_bytes_at_least(1 * GB) >= 0.8:
+        # A few huge files: big chunks cut round-trips, few transfers is enough
+        profile = TransferProfile('large-files', transfers=4, checkers=8,
+                                  drive_chunk_size=256 * MB, order_by='size,descending')
+    elif histogram.fraction_of_files_below(1 * MB) >= 0.8:
+        # Lots of tiny files: per-file latency dominates, so run many at once
+        profile = TransferProfile('many-small-files', transfers=16, checkers=32,
+                                  drive_chunk_size=8 * MB, order_by='size,ascending')
+    else:
+        # Big files start first so they overlap with the stream of small ones
+        profile = TransferProfile('mixed', transfers=8, checkers=16,
+                                  drive_chunk_size=64 * MB, order_by='size,mixed,25')
+
+    profile.transfers = min(profile.transfers, max_transfers)
+    profile.checkers = min(profile.checkers, max_checkers)
+
+    # Shrink the chunk first, then transfers, until the job fits the memory ceiling
+    while (profile.transfers * (profile.drive_chunk_size + _BUFFER_PER_TRANSFER) > memory_limit
+           and profile.drive_chunk_size > 8 * MB):
+        profile.drive_chunk_size //= 2
+    while (profile.transfers * (profile.drive_chunk_size + _BUFFER_PER_TRANSFER) > memory_limit
+           and profile.transfers > 1):
+        profile.transfers -= 1
+    return profile
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Concurrent multi-folder upload scheduling."""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from core.dedup_index import DedupPlan
+from core.manifest import Manifest
+from core.progress import TransferStats
+
+
+class UploadScheduler:
+    """Runs several folder uploads at once under one transfer and checker budget.
+
+    The budget is split evenly between the jobs running at the same time,
+    so a batch never opens more than transfer_budget transfers in total no
+    matter how many folders it holds. Folders with a manifest get a transfer
+    profile tuned to their file sizes within that share. Each folder is an
+    independent job: a failure stops only that folder.
+    """
+
+    def __init__(self, cloud_ops, max_concurrent_jobs: int = 3,
+                 transfer_budget: int = 8, checker_budget: int = 16):
+        self.cloud_ops = cloud_ops
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.transfer_budget = transfer_budget
+        self.checker_budget = checker_budget
+
+    def run(self, folders: List[str], progress_callback=None, ignore_file: str = None,
+            manifests: Optional[Dict[str, Manifest]] = None,
+            batch_progress_callback=None, event_callback=None,
+            dedup_plans: Optional[Dict[str, DedupPlan]] = None,
+            folder_done_callback=None) -> Tuple[bool, Dict]:
+        """Upload all folders and return (all_succeeded, details).
+
+        progress_callback gets per-job log messages prefixed with the folder
+        name; batch_progress_callback gets the overall percent, weighted by
+        each folder's manifest size when known. event_callback, if given,
+        is called with (folder, event) for every typed progress event.
+        dedup_plans, from CloudOperations.plan_dedup, are handed to each job.
+        folder_done_callback(folder, success, result) is called as each job
+        ends, so later stages can start on that folder while others upload.
+        """
+        manifests = manifests or {}
+        dedup_plans = dedup_plans or {}
+        total_folders = len(folders)
+        if total_folders == 0:
+            return True, {'message': "No folders to upload", 'results': [], 'failed': []}
+
+        concurrency = max(1, min(self.max_concurrent_jobs, total_folders, self.transfer_budget))
+        transfers = max(1, self.transfer_budget // concurrency)
+        checkers = max(1, self.checker_budget // concurrency)
+
+        weights = {}
+        for folder in folders:
+            manifest = manifests.get(folder)
+            weights[folder] = max(1, manifest.total_size) if manifest is not None else 1
+        total_weight = sum(weights.values())
+
+        lock = threading.Lock()
+        job_percent = {folder: 0 for folder in folders}
+        finished = [0]
+
+        def report(message):
+            if progress_callback:
+                progress_callback(message)
+
+        def update_batch(folder, percent):
+            with lock:
+                job_percent[folder] = percent
+                batch = sum(job_percent[f] * weights[f] for f in folders) / total_weight
+                # Reported under the lock so updates arrive in order
+                if batch_progress_callback:
+                    batch_progress_callback(int(batch))
+
+        memory_share = self.cloud_ops.transfer_memory_limit // concurrency
+
+        def on_event(folder, event):
+            if isinstance(event, TransferStats):
+                update_batch(folder, event.percent)
+            if event_callback:
+                event_callback(folder, event)
+
+        def upload(index, folder):
+            folder_name = os.path.basename(folder)
+            report(f"Uploading folder {index + 1}/{total_folders}: {folder_name}")
+            manifest = manifests.get(folder)
+            dedup_plan = dedup_plans.get(folder)
+            try:
+                profile = None
+                if manifest is not None:
+                    # Tune for what will actually be uploaded
+                    upload_manifest = dedup_plan.upload_manifest if dedup_plan else manifest
+                    profile = self.cloud_ops.tune_upload(upload_manifest, transfers, checkers,
+                                                         memory_share)
+                success, result = self.cloud_ops.upload_folder(
+                    folder,
+                    progress_callback=lambda msg: report(f"{folder_name}: {msg}"),
+                    ignore_file=ignore_file,
+                    manifest=manifest,
+                    transfers=transfers,
+                    checkers=checkers,
+                    event_callback=lambda event: on_event(folder, event),
+                    profile=profile,
+                    dedup_plan=dedup_plan
+                )
+            except Exception as e:
+                success, result = False, {'error': str(e)}
+
+            update_batch(folder, 100)
+            with lock:
+                finished[0] += 1
+                done = finished[0]
+            if success:
+                report(f"✅ {folder_name} uploaded ({done}/{total_folders} folders finished)")
+            else:
+                report(f"❌ {folder_name} failed: {result.get('error', 'Upload failed')} "
+                       f"({done}/{total_folders} folders finished)")
+            if folder_done_callback:
+                folder_done_callback(folder, success, result)
+            return {'folder': folder, 'success': success, 'result': result}
+
+        report(f"Uploading {total_folders} folders, {concurrency} at a time "
+               f"({transfers} transfers, {checkers} checkers each)")
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(upload, i, folder) for i, folder in enumerate(folders)]
+            upload_results = [future.result() for future in futures]
+
+        failed = [r['folder'] for r in upload_results if not r['success']]
+        if failed:
+            return False, {
+                'error': f"Failed to upload {len(failed)} of {total_folders} folders",
+                'results': upload_results,
+                'failed': failed
+            }
+
+        return True, {
+            'message': f"Successfully uploaded {total_folders} folders",
+            'results': upload_results,
+            'failed': []
+        }
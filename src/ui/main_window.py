@@ -6,17 +6,34 @@ from tkinter import ttk, filedialog, font, messagebox
 import os
 import threading
 import time
-from datetime import datetime
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from core.activity_log import ActivityLog, prune_logs
 from core.cloud_operations import CloudOperations
+from core.dedup_index import DedupIndex
+from core.event_bus import (
+    DetailEvent, ErrorEvent, EventBus, FileDoneEvent, PhaseEvent, ProgressEvent
+)
 from core.file_operations import FileOperations
+from core.hash_cache import HashCache
+from core.job_journal import JobJournal, find_unfinished
+from core.manifest import Manifest
+from core.progress import FileTransferred, TransferError, TransferStats, format_eta, format_speed
+from core.quota_cache import QuotaCache
+from core.scan_index import ScanIndex
+from core.scanner import FolderScanner, default_scan_workers
+from core.staging import Purger, StagingArea
+from core.streaming_delete import StreamingDeleter
+from core.transfer_tuning import SizeHistogram
 
 
 class CloudMoverUI:
     """Main UI class for Cloud Mover application."""
     
-    def __init__(self):
+    def __init__(self, use_rc_backend=False, bundle_small_files=False, compress=False,
+                 dedup=False, pipeline=False, delete_as_uploaded=False, staged_delete=False):
         self.root = tk.Tk()
         self.root.title("Cloud Mover - Free Up Space")
         self.root.geometry("800x650")
@@ -27,23 +44,92 @@ class CloudMoverUI:
         self.center_window()
         
         # Initialize core components
-        self.cloud_ops = CloudOperations()
+        self.scan_workers = default_scan_workers()
+        self.scan_index = ScanIndex(os.path.join("config", "scan_index.db"))
+        self.scanner = FolderScanner(max_workers=self.scan_workers, index=self.scan_index)
+        self.cloud_ops = CloudOperations(scanner=self.scanner)
+        self.hash_cache = HashCache(os.path.join("config", "hash_cache.db"))
+        self.cloud_ops.hash_cache = self.hash_cache
+        self.cloud_ops.quota_cache = QuotaCache(os.path.join("config", "quota_cache.json"))
         self.file_ops = FileOperations()
+        self.use_rc_backend = use_rc_backend
+        if bundle_small_files:
+            # Files under 1 MB go into ~256 MB tar bundles
+            self.cloud_ops.bundle_threshold = 1024 * 1024
+        if compress:
+            self.cloud_ops.compression_level = 3
+        if dedup:
+            self.cloud_ops.dedup = DedupIndex(os.path.join("config", "dedup_index.db"))
         
         # Variables
         self.current_folders = []  # Changed to support multiple folders
+        self.manifests = {}  # folder -> Manifest from analysis
+        self.ignore_rules = None  # IgnoreRules the manifests were built with
         self.is_moving = False
+        # Stops local hashing in a running verification when the app closes
+        self.hash_cancel = threading.Event()
+        self.browse_size_workers = 4
+        self._size_cancel = None
+        self._size_pool = None
         self.config_path = os.path.join("config", ".rcloneignore")
         
+        # Each move job keeps a journal so an interrupted move can be resumed
+        self.journal_dir = os.path.join("config", "jobs")
+        self.journal = None
+        self.resume_state = None
+        
+        # Verify and delete each folder as soon as it's uploaded instead of
+        # waiting for the whole batch
+        self.pipeline = pipeline
+        
+        # Delete each file once its upload is confirmed and its MD5 matches the remote
+        self.delete_as_uploaded = delete_as_uploaded
+        
+        # Verified folders can be renamed into a hidden staging area and purged
+        # in the background; the purger always runs so earlier staged folders
+        # are cleared even without the flag
+        self.staged_delete = staged_delete
+        self.staging = StagingArea(os.path.join("config", "staging.db"))
+        self.purger = Purger(self.staging)
+        
+        # Log lines and worker events from any thread are buffered and drawn
+        # in batches every ui_frame_interval ms; the widget keeps the last
+        # log_max_lines and the full log goes to logs/
+        self.log_max_lines = 2000
+        self.ui_frame_interval = 100
+        log_dir = "logs"
+        self.activity_log = ActivityLog(
+            max_pending=self.log_max_lines,
+            log_path=os.path.join(log_dir, f"cloud-mover-{time.strftime('%Y%m%d-%H%M%S')}.log")
+        )
+        # After the new log is created, so the ten kept include it
+        prune_logs(log_dir)
+        self.events = EventBus()
+        
         # Create UI components
         self.setup_styles()
         self.create_header()
         self.create_main_content()
         self.create_footer()
+        self.root.after(self.ui_frame_interval, self._ui_tick)
         
-        # Check configuration
+        # Start the long-lived rclone daemon before anything talks to rclone
+        if self.use_rc_backend:
+            started, message = self.cloud_ops.start_rc_backend()
+            self.log(f"{'✓' if started else '✗'} {message}", 'info' if started else 'warning')
+        
+        # Check configuration in the background so the window paints at once
         self.check_config()
         
+        # Offer to pick up a move that was interrupted last time
+        self.root.after(500, self.offer_resume)
+        
+        # Forget hashes of files that have since been moved or deleted
+        threading.Thread(target=self.hash_cache.evict, daemon=True).start()
+        
+        # Finish purging folders staged in this or an earlier session
+        self.purger.start()
+        
         # Setup drag and drop
         self.setup_drag_drop()
         
@@ -104,6 +190,16 @@ class CloudMoverUI:
             bg='#0a0a0a'
         )
         subtitle.pack(side='left', padx=(15, 0))
+        
+        # Remote quota; the cached value until the live check answers
+        self.quota_label = tk.Label(
+            header_frame,
+            text="",
+            font=('Arial', 10),
+            fg='#7f8c8d',
+            bg='#0a0a0a'
+        )
+        self.quota_label.place(relx=1.0, rely=0.5, anchor='e', x=-20)
     
     def create_main_content(self):
         """Create main content area."""
@@ -395,11 +491,71 @@ class CloudMoverUI:
     
     # Helper methods
     def log(self, message, tag='info'):
-        """Add message to activity log."""
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        self.log_text.insert('end', f"[{timestamp}] {message}\n", tag)
-        self.log_text.see('end')
-        self.root.update()
+        """Add message to activity log; safe to call from any thread."""
+        self.activity_log.write(message, tag)
+    
+    def _ui_tick(self):
+        """Render everything workers have queued since the last frame, then reschedule."""
+        self._flush_log()
+        self._render_events()
+        self.root.after(self.ui_frame_interval, self._ui_tick)
+    
+    def _flush_log(self):
+        """Draw pending log lines in one batch and trim the widget to log_max_lines."""
+        lines, dropped = self.activity_log.drain()
+        if lines:
+            chunks = []
+            if dropped:
+                chunks += [f"... {dropped:,} lines skipped (see the log file)\n", 'warning']
+            for line, tag in lines:
+                chunks += [line + '\n', tag]
+            self.log_text.insert('end', *chunks)
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - self.log_max_lines
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_text.see('end')
+    
+    def _render_events(self):
+        """Apply pending worker events.
+        
+        Every event is dropped once the move has ended, so late reports
+        from workers can't overwrite the final status. The last error is
+        drawn after everything else, since drain() returns the coalesced
+        progress and detail after the ordered events.
+        """
+        events = self.events.drain()
+        if not self.is_moving:
+            return
+        # Uploads start together, so only the per-folder phases after them are named
+        phase_labels = {'verify': "Verifying", 'delete': "Deleting"}
+        last_error = None
+        for event in events:
+            if isinstance(event, ProgressEvent):
+                self.update_progress(event.percent, event.speed, event.eta)
+            elif isinstance(event, DetailEvent):
+                self.progress_detail.config(text=event.text)
+            elif isinstance(event, FileDoneEvent):
+                self.progress_detail.config(text=f"{os.path.basename(event.folder)}: {event.name}")
+            elif isinstance(event, PhaseEvent):
+                if event.status == 'started' and event.phase in phase_labels:
+                    self.status_label.config(
+                        text=f"{phase_labels[event.phase]} {os.path.basename(event.folder)}...")
+            elif isinstance(event, ErrorEvent):
+                last_error = event
+        if last_error is not None:
+            self.progress_detail.config(text=f"⚠ {last_error.message}")
+    
+    def _show_hash_progress(self, folder, progress):
+        """Show how far local hashing has got while a folder is verified."""
+        self.events.publish(DetailEvent(
+            f"{os.path.basename(folder)}: hashing {progress.files_done:,}/{progress.files_total:,} "
+            f"files ({format_speed(progress.bytes_per_second)})"
+        ))
+    
+    def _record_phase(self, folder, phase, status):
+        """Journal a phase change and let the UI show it."""
+        self.journal.record_phase(folder, phase, status)
+        self.events.publish(PhaseEvent(folder, phase, status))
     
     def clear_log(self):
         """Clear the activity log."""
@@ -439,17 +595,63 @@ class CloudMoverUI:
             self.process_folder(files[0])
     
     def check_config(self):
-        """Check rclone configuration."""
-        is_configured, message = self.cloud_ops.check_config()
+        """Check rclone configuration on a worker thread, showing the cached quota meanwhile."""
+        cached = self.cloud_ops.cached_quota()
+        if cached:
+            self.quota_label.config(text=f"☁ {cached}")
+        
+        def worker():
+            is_configured, message = self.cloud_ops.check_config()
+            self.root.after(0, self._config_checked, is_configured, message)
         
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _config_checked(self, is_configured, message):
+        """Show the result of check_config."""
         if is_configured:
+            self.quota_label.config(text=f"☁ {message}")
             self.log(f"✓ Google Drive configured - {message}", 'success')
         else:
+            self.quota_label.config(text="")
             self.log(f"✗ {message}", 'error')
             self.drop_text.config(text="Configuration Required")
             self.drop_subtext.config(text="Run: rclone config")
             self.disable_drop_zone()
     
+    def offer_resume(self):
+        """Ask whether to resume the most recent interrupted move job."""
+        if self.is_moving:
+            return
+        jobs = find_unfinished(self.journal_dir)
+        if not jobs:
+            return
+        state = jobs[0]
+        
+        if not messagebox.askyesno(
+            "Resume Interrupted Move",
+            f"A previous move did not finish:\n\n{state.describe()}\n\n"
+            f"Resume it? Finished uploads are skipped; folders are verified again.\n"
+            f"Choose No to discard it (nothing is deleted)."
+        ):
+            JobJournal(state.path).finish()
+            self.log("Discarded interrupted move job", 'info')
+            return
+        
+        folders = [f for f in state.folders if state.pending_phase(f)]
+        missing = [f for f in folders if not os.path.isdir(f)]
+        for folder in missing:
+            self.log(f"⚠ {os.path.basename(folder)} no longer exists - skipping", 'warning')
+        
+        self.resume_state = state
+        self.current_folders = [f for f in folders if f not in missing]
+        if not self.current_folders:
+            JobJournal(state.path).finish()
+            self.resume_state = None
+            return
+        
+        self.log(f"Resuming move job {state.job_id}", 'info')
+        self.process_folders()
+    
     def disable_drop_zone(self):
         """Disable the drop zone."""
         for widget in [self.drop_frame, self.inner_frame] + self.inner_frame.winfo_children():
@@ -562,6 +764,9 @@ class CloudMoverUI:
         tree.bind('<Button1-Motion>', lambda e: self.on_drag_motion(e, tree))
         tree.bind('<ButtonRelease-1>', lambda e: self.on_drag_release(e, tree, selected_label))
         
+        # Stop background size calculations when the dialog closes
+        dialog.bind('<Destroy>', lambda e: self.cancel_size_workers() if e.widget is dialog else None)
+        
         # Load initial directory
         self.load_directory(self.current_browse_path, tree, path_var)
         
@@ -581,47 +786,95 @@ class CloudMoverUI:
             self.load_directory(path, tree, None)
     
     def load_directory(self, path, tree, path_var=None):
-        """Load directory contents into treeview."""
+        """Load directory contents into treeview.
+        
+        Rows are inserted straight away; folder sizes are calculated by
+        background workers and filled in as they finish.
+        """
+        self.cancel_size_workers()
         tree.delete(*tree.get_children())
         self.selected_folders.clear()
         
         try:
             items = []
-            for item in os.listdir(path):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
+            with os.scandir(path) as entries:
+                for entry in entries:
                     try:
-                        size = self.get_folder_size(item_path)
-                        items.append((item, item_path, size))
-                    except:
-                        items.append((item, item_path, "Access Denied"))
+                        if entry.is_dir():
+                            items.append((entry.name, entry.path))
+                    except OSError:
+                        pass
             
             # Sort directories
             items.sort(key=lambda x: x[0].lower())
             
             # Add to tree
-            for name, full_path, size in items:
-                tree.insert('', 'end', text=f"📁 {name}", 
-                          values=('Folder', size), tags=(full_path,))
+            rows = []
+            for name, full_path in items:
+                row = tree.insert('', 'end', text=f"📁 {name}", 
+                                  values=('Folder', "Calculating…"), tags=(full_path,))
+                rows.append((row, full_path))
                           
         except PermissionError:
             tree.insert('', 'end', text="Access Denied", values=('Error', ''))
+            return
         except Exception as e:
             tree.insert('', 'end', text=f"Error: {str(e)}", values=('Error', ''))
+            return
+        
+        self.start_size_workers(rows, tree)
     
-    def get_folder_size(self, folder_path):
+    def start_size_workers(self, rows, tree):
+        """Calculate folder sizes in the background and post them to the tree in batches."""
+        cancel_event = threading.Event()
+        results = queue.Queue()
+        pool = ThreadPoolExecutor(max_workers=self.browse_size_workers)
+        self._size_cancel = cancel_event
+        self._size_pool = pool
+        
+        def calculate(row, folder_path):
+            if not cancel_event.is_set():
+                results.put((row, self.get_folder_size(folder_path, cancel_event)))
+        
+        for row, folder_path in rows:
+            pool.submit(calculate, row, folder_path)
+        pool.shutdown(wait=False)
+        
+        remaining = [len(rows)]
+        
+        def drain():
+            if cancel_event.is_set():
+                return
+            batch = []
+            try:
+                while len(batch) < 200:
+                    batch.append(results.get_nowait())
+            except queue.Empty:
+                pass
+            for row, size in batch:
+                if tree.exists(row):
+                    tree.set(row, 'Size', size)
+            remaining[0] -= len(batch)
+            if remaining[0] > 0:
+                tree.after(100, drain)
+        
+        if rows:
+            tree.after(100, drain)
+    
+    def cancel_size_workers(self):
+        """Stop size calculations for the directory being left."""
+        if self._size_cancel is not None:
+            self._size_cancel.set()
+            self._size_pool.shutdown(wait=False, cancel_futures=True)
+            self._size_cancel = None
+            self._size_pool = None
+    
+    def get_folder_size(self, folder_path, cancel_event=None):
         """Get ACCURATE folder size - no limits for safety."""
         try:
-            total = 0
-            file_count = 0
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    try:
-                        file_path = os.path.join(root, file)
-                        total += os.path.getsize(file_path)
-                        file_count += 1
-                    except:
-                        pass
+            result = self.scanner.scan(folder_path, cancel_event=cancel_event)
+            total = result.total_size
+            file_count = result.file_count
             
             # Format size
             if total > 1024**3:
@@ -1026,26 +1279,32 @@ class CloudMoverUI:
         total_files = 0
         total_ignored = 0
         
-        # Load ignore patterns
-        ignore_patterns = self.file_ops.load_ignore_patterns(self.config_path)
+        # Load ignore rules
+        ignore_rules = self.file_ops.load_ignore_rules(self.config_path)
+        self.ignore_rules = ignore_rules
+        self.manifests = {}
+        histogram = SizeHistogram()
         
         start_time = time.time()
         
         for i, folder in enumerate(self.current_folders):
-            self.root.after(0, lambda f=folder, idx=i+1, total=len(self.current_folders): 
-                           self.log(f"[{idx}/{total}] Analyzing: {os.path.basename(f)}", 'info'))
+            self.log(f"[{i+1}/{len(self.current_folders)}] Analyzing: {os.path.basename(folder)}", 'info')
             
-            folder_size, folder_files, folder_ignored = self.file_ops.analyze_folder(folder, ignore_patterns)
-            total_size += folder_size
-            total_files += folder_files
-            total_ignored += folder_ignored
+            # One scan per folder; the manifest is reused by upload, verify and delete
+            manifest = self.file_ops.build_manifest(folder, ignore_rules, scanner=self.scanner)
+            self.manifests[folder] = manifest
+            total_size += manifest.total_size
+            total_files += manifest.file_count
+            total_ignored += manifest.ignored_count
+            histogram.merge(manifest.size_histogram())
         
         analysis_time = time.time() - start_time
         size_gb = total_size / (1024 * 1024 * 1024)
         
-        self.root.after(0, self._show_analysis, total_files, size_gb, total_ignored, analysis_time)
+        self.root.after(0, self._show_analysis, total_files, size_gb, total_ignored, analysis_time,
+                        histogram)
     
-    def _show_analysis(self, file_count, size_gb, ignored_count, analysis_time):
+    def _show_analysis(self, file_count, size_gb, ignored_count, analysis_time, histogram=None):
         """Show analysis results for folders."""
         # Update stats
         self.stat_cards['files'].config(text=f"{file_count:,}")
@@ -1061,15 +1320,18 @@ class CloudMoverUI:
             self.drop_text.config(text=f"Ready to move {folder_count} folders")
         
         if ignored_count > 0:
-            self.drop_subtext.config(text=f"Click to start • {ignored_count} files will be ignored")
+            self.drop_subtext.config(text=f"Click to start • {ignored_count} items will be ignored")
             self.log(f"Analysis complete in {analysis_time:.1f}s", 'info')
             self.log(f"Files to move: {file_count:,} ({size_text}) from {folder_count} folders", 'info')
-            self.log(f"Files to ignore: {ignored_count:,}", 'warning')
+            self.log(f"Files and folders to ignore: {ignored_count:,}", 'warning')
         else:
             self.drop_subtext.config(text="Click to start moving")
             self.log(f"Analysis complete in {analysis_time:.1f}s", 'info')
             self.log(f"Files to move: {file_count:,} ({size_text}) from {folder_count} folders", 'info')
         
+        if histogram is not None and histogram.file_count:
+            self.log(f"File sizes: {histogram.describe()}", 'info')
+        
         # Show confirmation
         self.root.after(500, self._confirm_move, file_count, size_gb)
     
@@ -1101,6 +1363,7 @@ class CloudMoverUI:
     
     def reset_ui(self):
         """Reset UI to initial state."""
+        self.resume_state = None
         self.drop_text.config(text="Select folders to move to cloud")
         self.drop_subtext.config(text="Free up disk space instantly • Files moved, not copied")
         self.stat_cards['folders'].config(text="0")
@@ -1113,6 +1376,11 @@ class CloudMoverUI:
         self.is_moving = True
         folder_count = len(self.current_folders)
         
+        if self.resume_state is not None:
+            self.journal = JobJournal(self.resume_state.path)
+        else:
+            self.journal = JobJournal.create(self.journal_dir, list(self.current_folders))
+        
         if folder_count == 1:
             self.drop_text.config(text="Moving to cloud...")
         else:
@@ -1129,7 +1397,8 @@ class CloudMoverUI:
             widget.config(cursor='wait')
         
         # Start upload
-        thread = threading.Thread(target=self._move_process, args=(expected_count,))
+        target = self._move_pipelined if self.pipeline else self._move_process
+        thread = threading.Thread(target=target, args=(expected_count,))
         thread.daemon = True
         thread.start()
     
@@ -1149,49 +1418,325 @@ class CloudMoverUI:
         
         try:
             # Upload multiple folders
-            self.root.after(0, lambda: self.log("📤 Starting move to Google Drive...", 'info'))
+            self.log("📤 Starting move to Google Drive...", 'info')
             
             def progress_callback(message):
-                self.root.after(0, lambda msg=message: self.log(msg, 'info'))
-                # Update progress if it contains percentage
-                if '%' in message:
-                    try:
-                        percent = int(message.split('%')[0].split()[-1])
-                        self.root.after(0, lambda p=percent: self.update_progress(p))
-                    except:
-                        pass
+                self.log(message, 'info')
             
-            if len(self.current_folders) == 1:
+            def event_callback(event):
+                if isinstance(event, TransferStats):
+                    self.events.publish(ProgressEvent(event.percent, format_speed(event.speed),
+                                                      format_eta(event.eta)))
+            
+            deleters = {}
+            
+            def journal_event(folder, event):
+                if isinstance(event, FileTransferred):
+                    self.journal.confirm_uploaded(folder, event.name)
+                    deleter = deleters.get(folder)
+                    if deleter is not None:
+                        deleter.confirm(event.name)
+                    self.events.publish(FileDoneEvent(folder, event.name, event.size))
+                elif isinstance(event, TransferError):
+                    self.events.publish(ErrorEvent(f"{os.path.basename(folder)}: {event.message}"))
+            
+            to_upload, upload_manifests = self._prepare_uploads()
+            deleters.update(self._start_stream_deleters(to_upload, upload_manifests))
+            
+            failed = []
+            if not to_upload:
+                success, result = True, {}
+            elif len(to_upload) == 1:
                 # Single folder upload
+                folder = to_upload[0]
+                
+                def single_event(event):
+                    event_callback(event)
+                    journal_event(folder, event)
+                
                 success, result = self.cloud_ops.upload_folder(
-                    self.current_folders[0], 
+                    folder, 
                     progress_callback=progress_callback,
-                    ignore_file=self.config_path
+                    ignore_file=self.config_path,
+                    manifest=upload_manifests.get(folder),
+                    event_callback=single_event
                 )
+                self._close_stream_deleter(deleters, folder)
+                self._record_phase(folder, 'upload', 'done' if success else 'failed')
+                if not success:
+                    failed = [folder]
             else:
-                # Multiple folder upload
+                # Multiple folder upload - folders run concurrently, so the
+                # progress bar follows the batch total rather than any one job
                 success, result = self.cloud_ops.upload_multiple_folders(
-                    self.current_folders,
+                    to_upload,
                     progress_callback=progress_callback,
-                    ignore_file=self.config_path
+                    ignore_file=self.config_path,
+                    manifests=upload_manifests,
+                    batch_progress_callback=lambda percent: self.events.publish(ProgressEvent(percent)),
+                    event_callback=journal_event
                 )
+                for folder in to_upload:
+                    self._close_stream_deleter(deleters, folder)
+                
+                failed = result.get('failed', [])
+                for folder in to_upload:
+                    self._record_phase(folder, 'upload',
+                                       'failed' if folder in failed else 'done')
+            
+            # A failed folder only stops that folder; carry on with the rest
+            if failed and len(failed) < len(self.current_folders):
+                for folder in failed:
+                    self.log(f"⚠ {os.path.basename(folder)} failed to upload - it will be kept on disk", 'warning')
+                self.current_folders = [f for f in self.current_folders if f not in failed]
+                success = True
             
             if not success:
                 error_msg = result.get('error', 'Upload failed')
                 raise Exception(error_msg)
             
-            self.root.after(0, lambda: self.log("✅ Upload completed successfully!", 'success'))
-            self.root.after(0, lambda: self.log("🔍 Now verifying upload before deleting local files...", 'info'))
-            self.root.after(0, self.update_progress, 100, "", "")
+            self.log("✅ Upload completed successfully!", 'success')
+            self.log("🔍 Now verifying upload before deleting local files...", 'info')
+            self.events.publish(ProgressEvent(100))
             
             # CRITICAL: Verify upload before any deletion
             self.root.after(500, self._verify_before_delete, expected_count)
             
         except Exception as e:
             error_msg = f"Exception during move: {str(e)}"
-            self.root.after(0, lambda: self.log(f"EXCEPTION: {error_msg}", 'error'))
+            self.log(f"EXCEPTION: {error_msg}", 'error')
             self.root.after(0, self._move_failed, error_msg)
     
+    def _prepare_uploads(self):
+        """Folders still to upload and their manifests, recording each upload as started.
+        
+        When resuming, folders already uploaded and files already confirmed
+        are skipped.
+        """
+        state = self.resume_state
+        to_upload = [f for f in self.current_folders
+                     if state is None or not state.is_done(f, 'upload')]
+        upload_manifests = {}
+        for folder in to_upload:
+            manifest = self.manifests.get(folder)
+            confirmed = state.uploaded.get(folder) if state is not None else None
+            if manifest is not None and confirmed:
+                manifest = Manifest(manifest.root,
+                                    [e for e in manifest.entries if e.path not in confirmed],
+                                    manifest.ignored_count)
+            upload_manifests[folder] = manifest
+            self._record_phase(folder, 'upload', 'started')
+        return to_upload, upload_manifests
+    
+    def _start_stream_deleters(self, folders, upload_manifests):
+        """With --delete-as-uploaded, start freeing each folder's files as their upload is confirmed."""
+        if not self.delete_as_uploaded:
+            return {}
+        deleters = {}
+        for folder in folders:
+            manifest = upload_manifests.get(folder)
+            if manifest is None:
+                continue
+            
+            def report(count, freed_bytes, fn=os.path.basename(folder)):
+                size = self.file_ops.format_size(freed_bytes)
+                self.log(f"🗑 {fn}: {count:,} uploaded files deleted so far ({size} freed)", 'info')
+            
+            deleters[folder] = StreamingDeleter(
+                self.cloud_ops, self.journal, folder, manifest,
+                self.cloud_ops.destination_for(folder), progress_callback=report
+            )
+        return deleters
+    
+    def _close_stream_deleter(self, deleters, folder):
+        """Let a folder's deleter finish, then drop the files it removed from the folder's manifest.
+        
+        Returns the bytes the deleter freed, which the trimmed manifest no
+        longer counts.
+        """
+        deleter = deleters.pop(folder, None)
+        if deleter is None:
+            return 0
+        deleter.close()
+        manifest = self.manifests.get(folder)
+        if deleter.deleted and manifest is not None:
+            self.manifests[folder] = Manifest(
+                manifest.root,
+                [e for e in manifest.entries if e.path not in deleter.deleted],
+                manifest.ignored_count
+            )
+        return deleter.freed_bytes
+    
+    def _move_pipelined(self, expected_count):
+        """Move folders through upload, verify and delete one folder at a time.
+        
+        Each folder is verified and deleted as soon as its own upload ends,
+        while the rest of the batch keeps uploading, so space comes back
+        throughout the job. A folder is deleted only after it has passed
+        verification itself; a folder that fails any stage stays on disk.
+        """
+        self.start_time = time.time()
+        finisher = ThreadPoolExecutor(max_workers=1)
+        outcomes = {}  # folder -> 'moved' or the phase it stopped at
+        freed = [0]
+        staged = [0]
+        
+        try:
+            self.log("📤 Starting move to Google Drive "
+                     "(each folder is verified and deleted once uploaded)...", 'info')
+            
+            def progress_callback(message):
+                self.log(message, 'info')
+            
+            deleters = {}
+            
+            def journal_event(folder, event):
+                if isinstance(event, FileTransferred):
+                    self.journal.confirm_uploaded(folder, event.name)
+                    deleter = deleters.get(folder)
+                    if deleter is not None:
+                        deleter.confirm(event.name)
+                    self.events.publish(FileDoneEvent(folder, event.name, event.size))
+                elif isinstance(event, TransferError):
+                    self.events.publish(ErrorEvent(f"{os.path.basename(folder)}: {event.message}"))
+            
+            def finish(folder):
+                phase = ['verify']
+                try:
+                    # Files deleted while uploading are freed whatever happens next
+                    freed[0] += self._close_stream_deleter(deleters, folder)
+                    outcomes[folder] = self._finish_folder(folder, freed, staged, phase)
+                except Exception as e:
+                    # Report the failure under the phase it happened in
+                    outcomes[folder] = phase[0]
+                    self._record_phase(folder, phase[0], 'failed')
+                    self.log(f"⚠ {os.path.basename(folder)}: {e} - it will be kept on disk", 'error')
+            
+            def give_up(folder):
+                # On the finisher too, so freed is only ever updated from one thread
+                freed[0] += self._close_stream_deleter(deleters, folder)
+            
+            def on_folder_done(folder, success, result):
+                # Called from the upload workers; the next stages run on the finisher
+                self._record_phase(folder, 'upload', 'done' if success else 'failed')
+                if success:
+                    finisher.submit(finish, folder)
+                else:
+                    finisher.submit(give_up, folder)
+                    outcomes[folder] = 'upload'
+                    self.log(f"⚠ {os.path.basename(folder)} failed to upload - it will be kept on disk", 'warning')
+            
+            to_upload, upload_manifests = self._prepare_uploads()
+            deleters.update(self._start_stream_deleters(to_upload, upload_manifests))
+            
+            # Folders uploaded before an interruption go straight on to verification
+            for folder in self.current_folders:
+                if folder not in to_upload:
+                    finisher.submit(finish, folder)
+            
+            if to_upload:
+                self.cloud_ops.upload_multiple_folders(
+                    to_upload,
+                    progress_callback=progress_callback,
+                    ignore_file=self.config_path,
+                    manifests=upload_manifests,
+                    batch_progress_callback=lambda percent: self.events.publish(ProgressEvent(percent)),
+                    event_callback=journal_event,
+                    folder_done_callback=on_folder_done
+                )
+                self.events.publish(ProgressEvent(100))
+            
+            finisher.shutdown(wait=True)
+            self._pipeline_finished(outcomes, freed[0], staged[0])
+        
+        except Exception as e:
+            finisher.shutdown(wait=True)
+            error_msg = f"Exception during move: {str(e)}"
+            self.log(f"EXCEPTION: {error_msg}", 'error')
+            self.root.after(0, self._move_failed, error_msg)
+    
+    def _finish_folder(self, folder, freed, staged, phase):
+        """Verify one uploaded folder and delete it if it passed.
+        
+        Returns 'moved', or the phase ('verify' or 'delete') that failed.
+        freed and staged are one-item lists holding the bytes released so
+        far and the bytes waiting in the staging area to be purged; phase
+        is a one-item list set to the phase in progress, so a caller that
+        catches an exception knows which one failed.
+        """
+        folder_name = os.path.basename(folder)
+        manifest = self.manifests.get(folder)
+        
+        # Always verified, even if a resumed job did it before: the manifest
+        # was rebuilt from disk and may hold files that were never checked
+        self._record_phase(folder, 'verify', 'started')
+        success, result = self.cloud_ops.verify_upload(
+            folder, manifest=manifest,
+            progress_callback=lambda progress: self._show_hash_progress(folder, progress),
+            cancel_event=self.hash_cancel
+        )
+        self._record_phase(folder, 'verify', 'done' if success else 'failed')
+        if not success:
+            err = result.get('error', 'Unknown error')
+            self.log(f"❌ VERIFICATION FAILED for {folder_name}: {err} - NOT deleted", 'error')
+            return 'verify'
+        cloud_count, cloud_size_gb = result.get('cloud_count', 0), result.get('cloud_size_gb', 0)
+        self.log(f"✅ {folder_name}: {cloud_count:,} files, {cloud_size_gb:.2f}GB verified in cloud",
+                 'success')
+        
+        def delete_progress(percent, message):
+            self.events.publish(DetailEvent(message))
+        
+        phase[0] = 'delete'
+        self._record_phase(folder, 'delete', 'started')
+        success, message, staged_bytes = self._delete_folder(folder, delete_progress)
+        self._record_phase(folder, 'delete', 'done' if success else 'failed')
+        if not success:
+            self.log(f"⚠ Failed to delete {folder_name}: {message}", 'error')
+            return 'delete'
+        
+        if staged_bytes:
+            staged[0] += staged_bytes
+            total = self.file_ops.format_size(staged[0])
+            self.log(f"📦 STAGED: {folder_name} ({total} waiting to be purged)", 'success')
+            return 'moved'
+        
+        freed[0] += manifest.total_size if manifest is not None else 0
+        total = self.file_ops.format_size(freed[0])
+        self.log(f"🗑 DELETED: {folder_name} ({total} freed so far)", 'success')
+        return 'moved'
+    
+    def _pipeline_finished(self, outcomes, freed_bytes, staged_bytes=0):
+        """Report a pipelined move and hand over to the matching end state."""
+        elapsed_min = (time.time() - self.start_time) / 60
+        total_folders = len(self.current_folders)
+        moved = [f for f in self.current_folders if outcomes.get(f) == 'moved']
+        
+        # Keep the journal while any folder still has work left, so it can be resumed
+        if self.journal.state().finished:
+            self.journal.finish()
+        
+        freed = self.file_ops.format_size(freed_bytes)
+        if staged_bytes:
+            freed += f" ({self.file_ops.format_size(staged_bytes)} more once staged folders are purged)"
+        if len(moved) == total_folders:
+            self.log(
+                f"🎉 SUCCESS: Moved {total_folders}/{total_folders} folders to cloud, {freed} freed", 'success')
+        else:
+            self.log(
+                f"⚠ Partial success: {len(moved)}/{total_folders} folders moved, {freed} freed", 'warning')
+            self.log("📂 Folders that weren't moved are still on disk", 'info')
+        self.log(f"⏱ Total time: {elapsed_min:.1f} minutes", 'info')
+        
+        self.resume_state = None
+        if any(outcomes.get(f) == 'verify' for f in self.current_folders):
+            self.root.after(0, self._upload_verified_but_incomplete)
+        elif not moved:
+            self.root.after(0, self._move_failed, "No folders could be moved")
+        else:
+            self.current_folders = moved
+            self.root.after(0, self._move_complete_safe)
+    
     def _verify_before_delete(self, expected_count):
         """CRITICAL: Verify upload is 100% complete before any deletion."""
         self.status_icon.config(text="🔍", fg='#2196F3')
@@ -1205,49 +1750,62 @@ class CloudMoverUI:
     def _verify_thread_safe(self, expected_count):
         """SAFE verification thread - only delete if 100% verified."""
         try:
-            all_verified = True
-            verification_results = []
+            # Folders verified before an interruption are verified again: their
+            # manifest was rebuilt from disk, and delete removes everything there
+            pending = list(self.current_folders)
             
-            for i, folder in enumerate(self.current_folders):
+            if pending:
+                self.log(
+                    f"Verifying {len(pending)} folders, up to "
+                    f"{self.cloud_ops.max_concurrent_verifications} at a time", 'info')
+            for folder in pending:
+                self._record_phase(folder, 'verify', 'started')
+            
+            finished = []
+            
+            def on_result(folder, success, result):
+                # Called from the verification pool as each folder finishes
+                self._record_phase(folder, 'verify', 'done' if success else 'failed')
+                finished.append(folder)
                 folder_name = os.path.basename(folder)
-                self.root.after(0, lambda fn=folder_name, idx=i+1, total=len(self.current_folders): 
-                               self.log(f"[{idx}/{total}] Verifying: {fn}", 'info'))
-                
-                # Verify this folder
-                success, result = self.cloud_ops.verify_upload(folder)
-                verification_results.append({
-                    'folder': folder,
-                    'success': success,
-                    'result': result
-                })
-                
+                progress = f"[{len(finished)}/{len(pending)}]"
                 if not success:
-                    all_verified = False
-                    self.root.after(0, lambda fn=folder_name, err=result.get('error', 'Unknown error'): 
-                                   self.log(f"❌ VERIFICATION FAILED for {fn}: {err}", 'error'))
+                    err = result.get('error', 'Unknown error')
+                    self.log(f"{progress} ❌ VERIFICATION FAILED for {folder_name}: {err}", 'error')
                 else:
                     cloud_count = result.get('cloud_count', 0)
                     cloud_size_gb = result.get('cloud_size_gb', 0)
-                    self.root.after(0, lambda fn=folder_name, cc=cloud_count, cs=cloud_size_gb: 
-                                   self.log(f"✅ {fn}: {cc:,} files, {cs:.2f}GB verified in cloud", 'success'))
+                    self.log(f"{progress} ✅ {folder_name}: {cloud_count:,} files, "
+                             f"{cloud_size_gb:.2f}GB verified in cloud", 'success')
+            
+            # Every folder is verified even after a failure, so the log shows all problems;
+            # nothing is deleted unless all of them pass
+            all_verified = True
+            if pending:
+                all_verified, _ = self.cloud_ops.verify_multiple_uploads(
+                    pending, manifests=self.manifests, result_callback=on_result,
+                    stop_on_failure=False, progress_callback=self._show_hash_progress,
+                    cancel_event=self.hash_cancel
+                )
             
             if all_verified:
-                self.root.after(0, lambda: self.log("🎉 ALL FILES VERIFIED SUCCESSFULLY IN CLOUD!", 'success'))
-                self.root.after(0, lambda: self.log("⚠️  SAFE TO DELETE: Starting local file deletion...", 'warning'))
+                self.log("🎉 ALL FILES VERIFIED SUCCESSFULLY IN CLOUD!", 'success')
+                self.log("⚠️  SAFE TO DELETE: Starting local file deletion...", 'warning')
                 self.root.after(0, self._delete_local_safe)
             else:
-                self.root.after(0, lambda: self.log("❌ VERIFICATION FAILED - NO FILES WILL BE DELETED", 'error'))
-                self.root.after(0, lambda: self.log("📂 Your files are SAFE on your laptop", 'info'))
+                self.log("❌ VERIFICATION FAILED - NO FILES WILL BE DELETED", 'error')
+                self.log("📂 Your files are SAFE on your laptop", 'info')
                 self.root.after(0, self._upload_verified_but_incomplete)
                 
         except Exception as e:
-            self.root.after(0, lambda: self.log(f"❌ VERIFICATION ERROR: {str(e)}", 'error'))
-            self.root.after(0, lambda: self.log("📂 NO FILES DELETED - Your data is safe", 'info'))
+            self.log(f"❌ VERIFICATION ERROR: {str(e)}", 'error')
+            self.log("📂 NO FILES DELETED - Your data is safe", 'info')
             self.root.after(0, lambda: self._move_failed(f"Verification error: {str(e)}"))
     
     def _upload_verified_but_incomplete(self):
         """Handle case where upload succeeded but verification failed."""
         self.is_moving = False
+        self.resume_state = None
         
         self.status_icon.config(text="⚠️", fg='#f39c12')
         self.status_label.config(text="Upload successful, verification incomplete")
@@ -1264,6 +1822,31 @@ class CloudMoverUI:
         self.progress_percent.config(text="0%")
         self.progress_detail.config(text="")
     
+    def _delete_folder(self, folder, delete_progress, max_logged=20):
+        """Delete one moved folder, logging the paths that could not be removed.
+        
+        Returns (success, message, staged_bytes). With --staged-delete the
+        folder is renamed into the staging area instead and purged later,
+        so its size comes back as staged_bytes rather than freed space; if
+        that rename fails it is deleted here and staged_bytes is 0.
+        """
+        if self.staged_delete:
+            manifest = self.manifests.get(folder)
+            size = manifest.total_size if manifest is not None else 0
+            try:
+                self.staging.stage(folder, size)
+                return True, "Moved to staging; space is freed in the background", size
+            except OSError as e:
+                self.log(f"  Could not stage {os.path.basename(folder)} ({e}), deleting now", 'warning')
+        ignore_rules = self.ignore_rules or self.file_ops.load_ignore_rules(self.config_path)
+        result = self.file_ops.delete_tree(folder, delete_progress, manifest=self.manifests.get(folder),
+                                           ignore_rules=ignore_rules)
+        for path, error in result.failed[:max_logged]:
+            self.log(f"  Could not delete {path}: {error}", 'error')
+        if len(result.failed) > max_logged:
+            self.log(f"  ...and {len(result.failed) - max_logged:,} more", 'error')
+        return result.success, result.describe(), 0
+
     def _delete_local_safe(self):
         """SAFELY delete local files after 100% verification."""
         self.status_icon.config(text="🗑", fg='#e74c3c')
@@ -1285,25 +1868,28 @@ class CloudMoverUI:
         """SAFELY delete files in background thread."""
         try:
             def delete_progress(percent, message):
-                self.root.after(0, lambda: self.progress_detail.config(text=message))
+                self.events.publish(DetailEvent(message))
             
             total_deleted = 0
             failed_deletions = []
             
             for i, folder in enumerate(self.current_folders):
                 folder_name = os.path.basename(folder)
-                self.root.after(0, lambda fn=folder_name, idx=i+1, total=len(self.current_folders): 
-                               self.log(f"[{idx}/{total}] SAFE DELETE: {fn}", 'info'))
+                self.log(f"[{i+1}/{len(self.current_folders)}] SAFE DELETE: {folder_name}", 'info')
                 
-                success, message = self.file_ops.delete_folder(folder, delete_progress)
+                self._record_phase(folder, 'delete', 'started')
+                success, message, staged_bytes = self._delete_folder(folder, delete_progress)
+                self._record_phase(folder, 'delete', 'done' if success else 'failed')
                 
-                if success:
+                if success and staged_bytes:
+                    total_deleted += 1
+                    self.log(f"📦 STAGED: {folder_name} - {message}", 'success')
+                elif success:
                     total_deleted += 1
-                    self.root.after(0, lambda fn=folder_name: self.log(f"✅ DELETED: {fn}", 'success'))
+                    self.log(f"✅ DELETED: {folder_name}", 'success')
                 else:
                     failed_deletions.append((folder_name, message))
-                    self.root.after(0, lambda fn=folder_name, msg=message: 
-                                   self.log(f"⚠ Failed to delete {fn}: {msg}", 'error'))
+                    self.log(f"⚠ Failed to delete {folder_name}: {message}", 'error')
             
             # Calculate time and report results
             elapsed = time.time() - self.start_time
@@ -1311,20 +1897,26 @@ class CloudMoverUI:
             
             total_folders = len(self.current_folders)
             
+            # The job is over once no folder has work left; otherwise keep the
+            # journal so the rest can be resumed
+            if self.journal.state().finished:
+                self.journal.finish()
+            self.resume_state = None
+            
             if total_deleted == total_folders:
-                self.root.after(0, lambda: self.log(f"🎉 SUCCESS: Moved {total_deleted}/{total_folders} folders to cloud", 'success'))
-                self.root.after(0, lambda: self.log(f"⏱ Total time: {elapsed_min:.1f} minutes", 'info'))
+                self.log(f"🎉 SUCCESS: Moved {total_deleted}/{total_folders} folders to cloud", 'success')
+                self.log(f"⏱ Total time: {elapsed_min:.1f} minutes", 'info')
             elif total_deleted > 0:
-                self.root.after(0, lambda: self.log(f"⚠ Partial success: {total_deleted}/{total_folders} folders moved", 'warning'))
-                self.root.after(0, lambda: self.log("Some files are in cloud but still on disk", 'warning'))
+                self.log(f"⚠ Partial success: {total_deleted}/{total_folders} folders moved", 'warning')
+                self.log("Some files are in cloud but still on disk", 'warning')
             else:
-                self.root.after(0, lambda: self.log("⚠ No folders were deleted", 'error'))
-                self.root.after(0, lambda: self.log("Files are safe in cloud but still on disk", 'warning'))
+                self.log("⚠ No folders were deleted", 'error')
+                self.log("Files are safe in cloud but still on disk", 'warning')
             
             self.root.after(0, self._move_complete_safe)
             
         except Exception as e:
-            self.root.after(0, lambda: self.log(f"⚠ Delete error: {str(e)}", 'error'))
+            self.log(f"⚠ Delete error: {str(e)}", 'error')
             self.root.after(0, self._move_complete_safe)
     
     def _move_complete_safe(self):
@@ -1366,29 +1958,37 @@ class CloudMoverUI:
         try:
             if len(self.current_folders) == 1:
                 # Single folder verification
-                success, result = self.cloud_ops.verify_upload(self.current_folders[0])
+                folder = self.current_folders[0]
+                success, result = self.cloud_ops.verify_upload(
+                    folder, manifest=self.manifests.get(folder),
+                    progress_callback=lambda progress: self._show_hash_progress(folder, progress),
+                    cancel_event=self.hash_cancel
+                )
                 
                 if success:
                     cloud_count = result['cloud_count']
                     cloud_size = result['cloud_size_gb']
                     
-                    self.root.after(0, lambda: self.log(
+                    self.log(
                         f"📊 Cloud verification: {cloud_count:,} files, {cloud_size:.2f}GB", 'info'
-                    ))
-                    self.root.after(0, lambda: self.log("✅ All files verified successfully!", 'success'))
+                    )
+                    self.log("✅ All files verified successfully!", 'success')
                     self.root.after(0, lambda: self._delete_local())
                 else:
                     raise Exception(result.get('error', 'Verification failed'))
             else:
                 # Multiple folder verification
-                success, result = self.cloud_ops.verify_multiple_uploads(self.current_folders)
+                success, result = self.cloud_ops.verify_multiple_uploads(
+                    self.current_folders, manifests=self.manifests,
+                    progress_callback=self._show_hash_progress, cancel_event=self.hash_cancel
+                )
                 
                 if success:
                     total_verified = len(result['results'])
-                    self.root.after(0, lambda: self.log(
+                    self.log(
                         f"📊 Verified {total_verified} folders successfully", 'info'
-                    ))
-                    self.root.after(0, lambda: self.log("✅ All files verified successfully!", 'success'))
+                    )
+                    self.log("✅ All files verified successfully!", 'success')
                     self.root.after(0, lambda: self._delete_local())
                 else:
                     raise Exception(result.get('error', 'Verification failed'))
@@ -1417,25 +2017,28 @@ class CloudMoverUI:
         """Delete files in background thread."""
         try:
             def delete_progress(percent, message):
-                self.root.after(0, lambda: self.progress_detail.config(text=message))
+                self.events.publish(DetailEvent(message))
             
             total_deleted = 0
+            total_staged = 0
             failed_deletions = []
             
             for i, folder in enumerate(self.current_folders):
                 folder_name = os.path.basename(folder)
-                self.root.after(0, lambda fn=folder_name, idx=i+1, total=len(self.current_folders): 
-                               self.log(f"[{idx}/{total}] Deleting: {fn}", 'info'))
+                self.log(f"[{i+1}/{len(self.current_folders)}] Deleting: {folder_name}", 'info')
                 
-                success, message = self.file_ops.delete_folder(folder, delete_progress)
+                success, message, staged_bytes = self._delete_folder(folder, delete_progress)
                 
-                if success:
+                if success and staged_bytes:
+                    total_deleted += 1
+                    total_staged += 1
+                    self.log(f"📦 Staged: {folder_name} - {message}", 'success')
+                elif success:
                     total_deleted += 1
-                    self.root.after(0, lambda fn=folder_name: self.log(f"✅ Deleted: {fn}", 'success'))
+                    self.log(f"✅ Deleted: {folder_name}", 'success')
                 else:
                     failed_deletions.append((folder_name, message))
-                    self.root.after(0, lambda fn=folder_name, msg=message: 
-                                   self.log(f"⚠ Failed to delete {fn}: {msg}", 'error'))
+                    self.log(f"⚠ Failed to delete {folder_name}: {message}", 'error')
             
             # Calculate time and report results
             elapsed = time.time() - self.start_time
@@ -1444,28 +2047,27 @@ class CloudMoverUI:
             total_folders = len(self.current_folders)
             
             if total_deleted == total_folders:
-                self.root.after(0, lambda: self.log(f"✅ Successfully deleted {total_deleted}/{total_folders} folders", 'success'))
-                self.root.after(0, lambda: self.log(f"⏱ Total time: {elapsed_min:.1f} minutes", 'info'))
+                self.log(f"✅ Successfully deleted {total_deleted}/{total_folders} folders", 'success')
+                self.log(f"⏱ Total time: {elapsed_min:.1f} minutes", 'info')
             elif total_deleted > 0:
-                self.root.after(0, lambda: self.log(f"⚠ Partially successful: {total_deleted}/{total_folders} folders deleted", 'warning'))
-                self.root.after(0, lambda: self.log("Some files are safe in cloud but still on disk", 'warning'))
+                self.log(f"⚠ Partially successful: {total_deleted}/{total_folders} folders deleted", 'warning')
+                self.log("Some files are safe in cloud but still on disk", 'warning')
             else:
-                self.root.after(0, lambda: self.log("⚠ No folders were deleted", 'error'))
-                self.root.after(0, lambda: self.log("Files are safe in cloud but still on disk", 'warning'))
+                self.log("⚠ No folders were deleted", 'error')
+                self.log("Files are safe in cloud but still on disk", 'warning')
             
             # List failed deletions
             for folder_name, error_msg in failed_deletions:
-                self.root.after(0, lambda fn=folder_name, msg=error_msg: 
-                               self.log(f"Failed: {fn} - {msg}", 'error'))
+                self.log(f"Failed: {folder_name} - {error_msg}", 'error')
             
-            self.root.after(0, self._move_complete)
+            self.root.after(0, self._move_complete, total_staged)
             
         except Exception as e:
-            self.root.after(0, lambda: self.log(f"⚠ Delete error: {str(e)}", 'error'))
+            self.log(f"⚠ Delete error: {str(e)}", 'error')
             self.root.after(0, self._move_complete)
     
-    def _move_complete(self):
-        """Handle move completion."""
+    def _move_complete(self, staged_count=0):
+        """Handle move completion; staged_count folders still wait to be purged."""
         self.is_moving = False
         
         # Success animation
@@ -1475,11 +2077,15 @@ class CloudMoverUI:
         
         # Update drop zone
         folder_count = len(self.current_folders)
-        if folder_count == 1:
+        if staged_count:
+            self.drop_text.config(text="Success! Moved to cloud")
+            self.drop_subtext.config(text="Space is freed in the background as staged folders are purged")
+        elif folder_count == 1:
             self.drop_text.config(text="Success! Space freed up")
+            self.drop_subtext.config(text="Drop more folders to continue")
         else:
             self.drop_text.config(text=f"Success! {folder_count} folders moved")
-        self.drop_subtext.config(text="Drop more folders to continue")
+            self.drop_subtext.config(text="Drop more folders to continue")
         
         # Re-enable interactions
         for widget in [self.drop_frame, self.inner_frame] + self.inner_frame.winfo_children():
@@ -1510,6 +2116,7 @@ class CloudMoverUI:
     def _move_failed(self, error):
         """Handle move failure."""
         self.is_moving = False
+        self.resume_state = None
         
         # Error UI
         self.status_icon.config(text="❌", fg='#e74c3c')
@@ -1572,7 +2179,38 @@ class CloudMoverUI:
             command=lambda: os.system(f'notepad {self.config_path}')
         )
         edit_btn.pack(pady=20)
+        
+        # Folders waiting in the staging area can be restored until they're purged
+        staged = [item for item in self.staging.pending() if not item.purging]
+        if staged:
+            settings.geometry("400x480")
+            tk.Label(settings, text=f"Staged for purge: {len(staged)} folders",
+                    font=('Arial', 10), fg='#7f8c8d', bg='#0a0a0a').pack()
+            
+            staged_list = tk.Listbox(settings, height=6, bg='#1a1a1a', fg='white',
+                                     selectbackground='#3498db', relief='flat')
+            for item in staged:
+                staged_list.insert('end', f"{os.path.basename(item.original)} "
+                                          f"({self.file_ops.format_size(item.size)})")
+            staged_list.pack(fill='x', padx=20, pady=5)
+            
+            def restore_selected():
+                for index in reversed(staged_list.curselection()):
+                    success, message = self.staging.restore(staged[index].item_id)
+                    self.log(f"{'↩' if success else '⚠'} {message}", 'success' if success else 'error')
+                    if success:
+                        staged_list.delete(index)
+                        del staged[index]
+            
+            tk.Button(settings, text="Restore Selected", font=('Arial', 10), fg='white',
+                     bg='#3498db', relief='flat', bd=0, padx=20, pady=8, cursor='hand2',
+                     command=restore_selected).pack(pady=10)
     
     def run(self):
         """Start the application."""
-        self.root.mainloop()
\ No newline at end of file
+        try:
+            self.root.mainloop()
+        finally:
+            self.hash_cancel.set()
+            self.cloud_ops.stop_rc_backend()
+            self.activity_log.close()
\ No newline at end of file
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# Modules import each other as core.*, with src/ on the path as cloud_mover.py sets it up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from core.manifest import Manifest, ManifestEntry
+
+
+@pytest.fixture
+def make_manifest():
+    """Factory that writes {relative path: text} under root and returns their Manifest."""
+    def make(root, files):
+        entries = []
+        for path, content in files.items():
+            full = os.path.join(str(root), *path.split('/'))
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, 'w') as f:
+                f.write(content)
+            entries.append(ManifestEntry(path, len(content), os.stat(full).st_mtime_ns))
+        return Manifest(str(root), entries)
+    return make
@@ -0,0 +1,40 @@
+import os
+
+from core.activity_log import ActivityLog, prune_logs
+
+
+def test_pending_lines_past_the_limit_are_dropped_and_counted():
+    log = ActivityLog(max_pending=3)
+    for i in range(5):
+        log.write(f"line {i}", 'info' if i % 2 else 'error')
+
+    lines, dropped = log.drain()
+
+    assert [line.split('] ', 1)[1] for line, _ in lines] == ['line 2', 'line 3', 'line 4']
+    assert [tag for _, tag in lines] == ['error', 'info', 'error']
+    assert dropped == 2
+    assert log.drain() == ([], 0)
+
+
+def test_every_line_reaches_the_file_even_when_dropped_from_the_ui(tmp_path):
+    path = tmp_path / 'logs' / 'session.log'
+    log = ActivityLog(max_pending=2, log_path=str(path))
+    assert path.exists()
+    for i in range(10):
+        log.write(f"line {i}")
+    log.close()
+
+    written = path.read_text(encoding='utf-8').splitlines()
+    assert [line.split('] ', 1)[1] for line in written] == [f"line {i}" for i in range(10)]
+
+
+def test_prune_keeps_the_newest_session_logs(tmp_path):
+    names = [f"cloud-mover-20240101-0000{i:02d}.log" for i in range(12)]
+    for name in names:
+        (tmp_path / name).write_text('x')
+    (tmp_path / 'notes.txt').write_text('x')
+
+    prune_logs(str(tmp_path), keep=10)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(names[2:] + ['notes.txt'])
+    prune_logs(str(tmp_path / 'missing'))
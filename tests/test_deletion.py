@@ -0,0 +1,90 @@
+import os
+
+from core import deletion
+from core.deletion import DeletionEngine
+from core.ignore_rules import IgnoreRules
+
+
+def test_deletes_manifest_files_leftovers_and_directories(tmp_path, make_manifest):
+    root = tmp_path / 'folder'
+    manifest = make_manifest(root, {'a.txt': 'aaa', 'sub/b.txt': 'bb', 'sub/deeper/c.txt': 'c'})
+    # Not in the manifest because the rules ignore them
+    (root / 'sub' / 'Thumbs.db').write_text('x')
+    (root / 'cache' / 'nested').mkdir(parents=True)
+    (root / 'cache' / 'nested' / 'blob').write_text('x')
+    (root / 'empty' / 'nested').mkdir(parents=True)
+    rules = IgnoreRules(['Thumbs.db', 'cache/'])
+
+    result = DeletionEngine(max_workers=2, chunk_size=1).delete_tree(
+        str(root), manifest, ignore_rules=rules)
+
+    assert result.success
+    assert result.files_deleted == 5
+    assert result.bytes_freed == 8
+    assert result.dirs_removed == 7
+    assert not root.exists()
+
+
+def test_unlisted_files_that_are_not_ignored_are_kept(tmp_path, make_manifest):
+    root = tmp_path / 'folder'
+    manifest = make_manifest(root, {'a.txt': 'aaa', 'sub/b.txt': 'bb', 'other/c.txt': 'c'})
+    # Created after analysis, so it was never uploaded
+    new_file = root / 'sub' / 'deeper' / 'new.txt'
+    new_file.parent.mkdir()
+    new_file.write_text('new')
+    (root / 'sub' / 'Thumbs.db').write_text('x')
+
+    result = DeletionEngine().delete_tree(str(root), manifest, ignore_rules=IgnoreRules(['Thumbs.db']))
+
+    assert not result.success
+    assert result.failed == [(str(new_file), "Not in the manifest; kept")]
+    assert new_file.read_text() == 'new'
+    assert sorted(os.listdir(root)) == ['sub']
+    assert os.listdir(root / 'sub') == ['deeper']
+
+
+def test_files_already_gone_are_not_failures(tmp_path, make_manifest):
+    root = tmp_path / 'folder'
+    manifest = make_manifest(root, {'a.txt': 'aaa', 'b.txt': 'b'})
+    (root / 'b.txt').unlink()
+
+    result = DeletionEngine().delete_tree(str(root), manifest)
+
+    assert result.success
+    assert result.files_deleted == 1
+    assert not root.exists()
+
+
+def test_failures_are_collected_and_their_directories_kept(tmp_path, make_manifest, monkeypatch):
+    root = tmp_path / 'folder'
+    manifest = make_manifest(root, {'keep/locked.txt': 'x', 'other.txt': 'y'})
+    locked = str(root / 'keep' / 'locked.txt')
+    real_unlink = os.unlink
+
+    def unlink(path):
+        if path == locked:
+            raise PermissionError(13, 'Permission denied', path)
+        real_unlink(path)
+
+    monkeypatch.setattr(deletion.os, 'unlink', unlink)
+    monkeypatch.setattr(deletion.os, 'chmod', lambda path, mode: None)
+
+    result = DeletionEngine().delete_tree(str(root), manifest)
+
+    assert not result.success
+    failed = [path for path, _ in result.failed]
+    assert locked in failed
+    assert os.path.exists(locked)
+    assert not (root / 'other.txt').exists()
+    assert 'could not be deleted' in result.describe()
+
+
+def test_progress_reports_final_totals(tmp_path, make_manifest):
+    root = tmp_path / 'folder'
+    manifest = make_manifest(root, {f'f{i}.txt': 'x' * i for i in range(5)})
+    reports = []
+
+    DeletionEngine(report_interval=0).delete_tree(
+        str(root), manifest, lambda result, total: reports.append((result.files_deleted, total)))
+
+    assert reports[-1] == (5, 5)
@@ -0,0 +1,57 @@
+import threading
+
+from core.event_bus import DetailEvent, ErrorEvent, EventBus, FileDoneEvent, PhaseEvent, ProgressEvent
+
+
+def test_coalesced_events_keep_only_the_latest_per_key():
+    bus = EventBus()
+    for percent in range(50):
+        bus.publish(ProgressEvent(percent))
+    bus.publish(FileDoneEvent('/a', 'one.txt', 1))
+    bus.publish(FileDoneEvent('/b', 'two.txt', 2))
+    bus.publish(FileDoneEvent('/a', 'three.txt', 3))
+    bus.publish(DetailEvent('first'))
+    bus.publish(DetailEvent('second'))
+
+    assert bus.drain() == [ProgressEvent(49), FileDoneEvent('/b', 'two.txt', 2),
+                           FileDoneEvent('/a', 'three.txt', 3), DetailEvent('second')]
+    assert bus.drain() == []
+
+
+def test_ordered_events_come_first_in_publish_order():
+    bus = EventBus()
+    bus.publish(ProgressEvent(10))
+    bus.publish(PhaseEvent('/a', 'verify', 'started'))
+    bus.publish(ErrorEvent('boom'))
+    bus.publish(PhaseEvent('/a', 'verify', 'done'))
+
+    assert bus.drain() == [PhaseEvent('/a', 'verify', 'started'), ErrorEvent('boom'),
+                           PhaseEvent('/a', 'verify', 'done'), ProgressEvent(10)]
+
+
+def test_overflow_drops_the_oldest_ordered_events():
+    bus = EventBus(max_events=3)
+    for i in range(5):
+        bus.publish(ErrorEvent(str(i)))
+
+    assert bus.drain() == [ErrorEvent('2'), ErrorEvent('3'), ErrorEvent('4')]
+    assert bus.dropped == 2
+
+
+def test_publishing_from_many_threads_loses_no_ordered_events():
+    bus = EventBus()
+
+    def worker(n):
+        for i in range(100):
+            bus.publish(ProgressEvent(i))
+            bus.publish(PhaseEvent(str(n), 'upload', str(i)))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    events = bus.drain()
+    assert sum(isinstance(e, PhaseEvent) for e in events) == 400
+    assert events[-1] == ProgressEvent(99)
@@ -0,0 +1,66 @@
+import hashlib
+import os
+
+import pytest
+
+from core.hash_cache import HashCache
+
+
+def md5(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for name in ('a.txt', 'b.txt', 'c.txt'):
+        path = tmp_path / name
+        path.write_text(name)
+        paths.append(str(path))
+    return paths
+
+
+def counting(calls):
+    def compute(paths):
+        calls.append(sorted(paths))
+        return {path: md5(os.path.basename(path)) for path in paths}
+    return compute
+
+
+def test_only_new_or_changed_files_are_hashed_again(tmp_path, files):
+    cache = HashCache(str(tmp_path / 'cache.db'))
+    calls = []
+    cache.hash_files(files, compute=counting(calls))
+
+    with open(files[1], 'a') as f:
+        f.write('changed')
+    hashes = cache.hash_files(files, compute=counting(calls))
+
+    assert calls == [sorted(files), [files[1]]]
+    assert hashes[files[0]] == md5('a.txt')
+
+
+def test_evict_drops_files_that_are_gone(tmp_path, files):
+    cache = HashCache(str(tmp_path / 'cache.db'))
+    cache.hash_files(files, compute=counting([]))
+    os.remove(files[0])
+
+    assert cache.evict() == 1
+    calls = []
+    cache.hash_files(files[1:], compute=counting(calls))
+    assert calls == []
+
+
+def test_evict_trims_the_least_recently_used(tmp_path, files, monkeypatch):
+    cache = HashCache(str(tmp_path / 'cache.db'), max_entries=2)
+    for used, path in enumerate(files):
+        monkeypatch.setattr('core.hash_cache.time.time', lambda used=used: 1000 + used)
+        cache.hash_files([path], compute=counting([]))
+    # Reading a.txt again makes b.txt the least recently used
+    monkeypatch.setattr('core.hash_cache.time.time', lambda: 2000)
+    cache.hash_files([files[0]], compute=counting([]))
+
+    assert cache.evict() == 1
+    calls = []
+    cache.hash_files(files, compute=counting(calls))
+    assert calls == [[files[1]]]
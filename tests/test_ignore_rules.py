@@ -0,0 +1,64 @@
+import pytest
+
+from core.ignore_rules import IgnoreRules
+
+
+@pytest.mark.parametrize('pattern, path, ignored', [
+    ('*.tmp', 'a.tmp', True),
+    ('*.tmp', 'a/b/c.tmp', True),
+    ('*.tmp', 'a.tmp.txt', False),
+    ('/top.txt', 'top.txt', True),
+    ('/top.txt', 'sub/top.txt', False),
+    ('docs/*.md', 'docs/a.md', True),
+    ('docs/*.md', 'docs/deep/a.md', False),
+    ('docs/**.md', 'docs/deep/a.md', True),
+    ('/build/**', 'build/out/a.o', True),
+    ('/build/**', 'proj/build/a.o', False),
+    ('**/cache/x', 'cache/x', True),
+    ('**/cache/x', 'a/b/cache/x', True),
+    ('file?.log', 'file1.log', True),
+    ('file?.log', 'file10.log', False),
+    ('file?.log', 'a/file/.log', False),
+    ('[ab].txt', 'b.txt', True),
+    ('[!ab].txt', 'b.txt', False),
+    ('[!ab].txt', 'c.txt', True),
+    ('*.{jpg,png}', 'x/y.png', True),
+    ('*.{jpg,png}', 'x/y.gif', False),
+    ('a+b (1).txt', 'a+b (1).txt', True),
+    ('unclosed[.txt', 'unclosed[.txt', True),
+])
+def test_glob_translation(pattern, path, ignored):
+    assert IgnoreRules([pattern]).is_ignored_file(path) is ignored
+
+
+def test_directory_rules_only_match_directories():
+    rules = IgnoreRules(['node_modules/', '/dist/'])
+
+    assert rules.is_ignored_dir('node_modules')
+    assert rules.is_ignored_dir('web/node_modules')
+    assert rules.is_ignored_dir('dist')
+    assert not rules.is_ignored_dir('web/dist')
+    assert not rules.is_ignored_file('node_modules')
+    assert rules.is_ignored('web/node_modules/pkg/index.js')
+    assert not rules.is_ignored('web/dist/index.js')
+
+
+def test_backslashes_are_treated_as_separators():
+    rules = IgnoreRules(['cache\\'])
+
+    assert rules.is_ignored('a\\cache\\file.bin')
+
+
+def test_from_file_skips_comments_and_blank_lines(tmp_path):
+    path = tmp_path / '.rcloneignore'
+    path.write_text('# comment\n; also a comment\n\n*.tmp\n  Thumbs.db  \n')
+
+    rules = IgnoreRules.from_file(str(path))
+
+    assert rules.patterns == ['*.tmp', 'Thumbs.db']
+    assert IgnoreRules.from_file(str(tmp_path / 'missing')).patterns == []
+
+
+def test_fingerprint_follows_the_patterns():
+    assert IgnoreRules(['*.tmp']).fingerprint == IgnoreRules([' *.tmp ', '']).fingerprint
+    assert IgnoreRules(['*.tmp']).fingerprint != IgnoreRules(['*.log']).fingerprint
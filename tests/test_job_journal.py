@@ -0,0 +1,61 @@
+import os
+
+from core.job_journal import JobJournal, find_unfinished, replay
+
+
+def test_replay_rebuilds_phases_uploads_and_deletions(tmp_path):
+    journal = JobJournal.create(str(tmp_path), ['/data/a', '/data/b'])
+    journal.record_phase('/data/a', 'upload', 'started')
+    journal.confirm_uploaded('/data/a', 'one.txt')
+    journal.confirm_uploaded('/data/a', 'two.txt')
+    journal.record_phase('/data/a', 'upload', 'done')
+    journal.record_deleted('/data/a', ['one.txt'])
+    journal.record_phase('/data/a', 'verify', 'failed')
+
+    state = replay(journal.path)
+
+    assert state.folders == ['/data/a', '/data/b']
+    assert state.uploaded == {'/data/a': {'one.txt', 'two.txt'}}
+    assert state.deleted == {'/data/a': {'one.txt'}}
+    assert state.is_done('/data/a', 'upload')
+    assert state.pending_phase('/data/a') == 'verify'
+    assert state.pending_phase('/data/b') == 'upload'
+    assert not state.finished
+    assert '1 files already deleted after upload' in state.describe()
+
+
+def test_torn_last_line_is_ignored_and_repaired(tmp_path):
+    journal = JobJournal.create(str(tmp_path), ['/data/a'])
+    journal.record_phase('/data/a', 'upload', 'done')
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "phase", "folder": "/data/a", "pha')
+
+    reopened = JobJournal(journal.path)
+    reopened.record_phase('/data/a', 'verify', 'done')
+    state = replay(journal.path)
+
+    assert state.is_done('/data/a', 'upload')
+    assert state.is_done('/data/a', 'verify')
+    assert state.pending_phase('/data/a') == 'delete'
+
+
+def test_unflushed_confirmations_are_written_by_state(tmp_path):
+    journal = JobJournal.create(str(tmp_path), ['/data/a'])
+    journal.flush_interval = 3600
+    journal.confirm_uploaded('/data/a', 'one.txt')
+
+    assert replay(journal.path).uploaded == {}
+    assert journal.state().uploaded == {'/data/a': {'one.txt'}}
+
+
+def test_find_unfinished_drops_finished_jobs(tmp_path):
+    done = JobJournal.create(str(tmp_path), ['/data/a'])
+    for phase in ('upload', 'verify', 'delete'):
+        done.record_phase('/data/a', phase, 'done')
+    open_job = JobJournal.create(str(tmp_path), ['/data/b'])
+    open_job.record_phase('/data/b', 'upload', 'done')
+
+    states = find_unfinished(str(tmp_path))
+
+    assert [s.job_id for s in states] == [open_job.job_id]
+    assert not os.path.exists(done.path)
@@ -0,0 +1,70 @@
+from core.event_bus import DetailEvent, ErrorEvent, EventBus, ProgressEvent
+from ui.main_window import CloudMoverUI
+
+
+class Label:
+    def __init__(self):
+        self.text = ''
+
+    def config(self, text):
+        self.text = text
+
+
+def make_ui(is_moving=True):
+    """A window without Tk: only what _render_events touches."""
+    ui = CloudMoverUI.__new__(CloudMoverUI)
+    ui.events = EventBus()
+    ui.is_moving = is_moving
+    ui.progress_detail = Label()
+    ui.status_label = Label()
+    ui.progress = []
+    ui.update_progress = lambda percent, speed, eta: ui.progress.append(percent)
+    return ui
+
+
+def test_error_is_not_overwritten_by_detail_in_the_same_frame():
+    ui = make_ui()
+    ui.events.publish(ErrorEvent('a.txt: upload failed'))
+    ui.events.publish(DetailEvent('Deleting... 10%'))
+    ui.events.publish(ProgressEvent(40))
+
+    ui._render_events()
+
+    assert ui.progress_detail.text == "⚠ a.txt: upload failed"
+    assert ui.progress == [40]
+
+
+def test_events_after_the_move_are_dropped():
+    ui = make_ui(is_moving=False)
+    ui.events.publish(ErrorEvent('late'))
+    ui.events.publish(ProgressEvent(40))
+
+    ui._render_events()
+
+    assert ui.progress_detail.text == ''
+    assert ui.progress == []
+    assert ui.events.drain() == []
+
+
+class StubDeleter:
+    def __init__(self, deleted, freed_bytes):
+        self.deleted = deleted
+        self.freed_bytes = freed_bytes
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_closing_a_stream_deleter_returns_what_it_freed(tmp_path, make_manifest):
+    ui = make_ui()
+    folder = str(tmp_path)
+    ui.manifests = {folder: make_manifest(tmp_path, {'a.txt': 'aaa', 'b.txt': 'bbbbb'})}
+    deleter = StubDeleter({'a.txt'}, 3)
+    deleters = {folder: deleter}
+
+    assert ui._close_stream_deleter(deleters, folder) == 3
+    assert deleter.closed and deleters == {}
+    # The rest of the folder is counted from the trimmed manifest
+    assert ui.manifests[folder].total_size == 5
+    assert ui._close_stream_deleter(deleters, folder) == 0
@@ -0,0 +1,60 @@
+import json
+
+from core.progress import (
+    FileProgress, FileTransferred, LogMessage, TransferError, TransferStats, format_eta,
+    parse_json_log_line
+)
+
+
+def log_line(**record):
+    return json.dumps(record) + '\n'
+
+
+def test_stats_record_becomes_transfer_stats():
+    event = parse_json_log_line(log_line(level='info', msg='stats', stats={
+        'bytes': 50, 'totalBytes': 200, 'speed': 10.5, 'eta': 15, 'transfers': 1,
+        'totalTransfers': 4, 'errors': 0,
+        'transferring': [{'name': 'a.bin', 'bytes': 5, 'size': 20, 'speed': None}]
+    }))
+
+    assert isinstance(event, TransferStats)
+    assert event.percent == 25
+    assert (event.speed, event.eta, event.total_transfers) == (10.5, 15, 4)
+    assert event.transferring == [FileProgress('a.bin', 5, 20, 0.0)]
+
+
+def test_percent_without_a_total_is_zero():
+    assert TransferStats(bytes=10).percent == 0
+    assert TransferStats(bytes=300, total_bytes=200).percent == 100
+
+
+def test_copied_file_becomes_file_transferred():
+    event = parse_json_log_line(log_line(level='info', msg='Copied (new)', object='dir/a.txt', size=12))
+
+    assert event == FileTransferred('dir/a.txt', 12, 'Copied (new)')
+
+
+def test_error_levels_become_transfer_errors():
+    for level in ('error', 'critical', 'fatal'):
+        event = parse_json_log_line(log_line(level=level, msg=' Failed to copy: quota exceeded ',
+                                             object='a.txt'))
+        assert event == TransferError('Failed to copy: quota exceeded', 'a.txt')
+
+
+def test_other_records_and_plain_text_become_log_messages():
+    assert parse_json_log_line(log_line(level='notice', msg='Updated modification time',
+                                        object='a.txt')) == \
+        LogMessage('notice', 'Updated modification time', 'a.txt')
+    # A message mentioning a copy without an object is not a finished file
+    assert parse_json_log_line(log_line(level='info', msg='Copied 3 files')) == \
+        LogMessage('info', 'Copied 3 files')
+    assert parse_json_log_line('2024/01/01 NOTICE: plain text\n') == \
+        LogMessage('info', '2024/01/01 NOTICE: plain text')
+    assert parse_json_log_line('[1, 2]') == LogMessage('info', '[1, 2]')
+    assert parse_json_log_line('  \n') is None
+
+
+def test_format_eta():
+    assert format_eta(None) == ""
+    assert format_eta(75) == "1:15"
+    assert format_eta(3 * 3600 + 5) == "3:00:05"
@@ -0,0 +1,39 @@
+import json
+
+from core.quota_cache import QuotaCache
+
+ABOUT = {'total': 2 * 1024**3, 'used': 1024**3}
+
+
+def test_saved_quota_is_returned_until_it_expires(tmp_path, monkeypatch):
+    cache = QuotaCache(str(tmp_path / 'config' / 'quota_cache.json'), ttl=60)
+    monkeypatch.setattr('core.quota_cache.time.time', lambda: 1000.0)
+    cache.save('gdrive', ABOUT)
+
+    assert cache.load('gdrive', now=1060) == ABOUT
+    assert cache.load('gdrive', now=1061) is None
+    assert cache.load('other', now=1000) is None
+
+
+def test_saving_one_remote_keeps_the_others(tmp_path):
+    cache = QuotaCache(str(tmp_path / 'quota_cache.json'))
+    cache.save('gdrive', ABOUT)
+    cache.save('backup', {'total': 1})
+
+    assert cache.load('gdrive') == ABOUT
+    assert cache.load('backup') == {'total': 1}
+    assert not (tmp_path / 'quota_cache.json.tmp').exists()
+
+
+def test_missing_or_corrupt_cache_is_treated_as_empty(tmp_path):
+    path = tmp_path / 'quota_cache.json'
+    cache = QuotaCache(str(path))
+    assert cache.load('gdrive') is None
+
+    path.write_text('{"gdrive": {"checked_at"')
+    assert cache.load('gdrive') is None
+    cache.save('gdrive', ABOUT)
+    assert json.loads(path.read_text())['gdrive']['about'] == ABOUT
+
+    path.write_text('[1, 2]')
+    assert cache.load('gdrive') is None
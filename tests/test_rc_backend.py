@@ -0,0 +1,150 @@
+import base64
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.cloud_operations import CloudOperations
+from core.rc_backend import RcBackend, RcClient, RcError, RcTimeout
+
+
+class StubRcServer:
+    """Stand-in for `rclone rcd`: each method name maps to a function of the request params."""
+
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.lstrip('/')
+                params = json.loads(self.rfile.read(int(self.headers['Content-Length'])) or b'{}')
+                stub.calls.append((method, params, self.headers.get('Authorization')))
+                route = stub.routes.get(method)
+                status, reply = route(params) if route else (404, {'error': f"no route {method}"})
+                body = json.dumps(reply).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05},
+                         daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def rc():
+    server = StubRcServer()
+    yield server
+    server.close()
+
+
+def async_job(rc, output=None, finished=True, success=True, error=''):
+    """Route job/status so every async call becomes job 7 with the given result."""
+    rc.routes['job/status'] = lambda params: (200, {
+        'id': params['jobid'], 'finished': finished, 'success': success,
+        'error': error, 'output': output
+    })
+    rc.routes['job/stop'] = lambda params: (200, {})
+    return lambda params: (200, {'jobid': 7}) if params.get('_async') else (400, {'error': 'not async'})
+
+
+def test_call_posts_json_with_basic_auth(rc):
+    rc.routes['rc/noop'] = lambda params: (200, params)
+    client = RcClient(rc.url, 'user', 'secret')
+
+    assert client.call('rc/noop', a=1) == {'a': 1}
+    _, params, auth = rc.calls[0]
+    assert params == {'a': 1}
+    assert auth == 'Basic ' + base64.b64encode(b'user:secret').decode('ascii')
+
+
+def test_call_raises_rc_error_with_server_message(rc):
+    rc.routes['operations/about'] = lambda params: (500, {'error': 'token expired'})
+
+    with pytest.raises(RcError, match='token expired'):
+        RcClient(rc.url).call('operations/about', fs='gdrive:')
+
+
+def test_list_runs_as_async_job(rc):
+    items = [{'Path': 'a.txt', 'Size': 3, 'Hashes': {'md5': 'abc'}}]
+    rc.routes['operations/list'] = async_job(rc, output={'list': items})
+    backend = RcBackend(RcClient(rc.url), poll_interval=0.01)
+
+    result = backend.list('gdrive:archived/x', filter_opts={'FilesFromRaw': ['/tmp/list']},
+                          timeout=5, recurse=True)
+
+    assert result == items
+    _, params, _ = rc.calls[0]
+    assert params['_async'] is True
+    assert params['_filter'] == {'FilesFromRaw': ['/tmp/list']}
+    assert params['opt'] == {'recurse': True}
+
+
+def test_size_runs_as_async_job(rc):
+    rc.routes['operations/size'] = async_job(rc, output={'count': 2, 'bytes': 10})
+    backend = RcBackend(RcClient(rc.url), poll_interval=0.01)
+
+    assert backend.size('gdrive:archived/x') == {'count': 2, 'bytes': 10}
+
+
+def test_job_past_timeout_is_stopped(rc):
+    rc.routes['operations/list'] = async_job(rc, finished=False)
+    backend = RcBackend(RcClient(rc.url), poll_interval=0.01)
+
+    with pytest.raises(RcTimeout):
+        backend.list('gdrive:archived/x', timeout=0.05)
+    assert ('job/stop', {'jobid': 7}, None) in rc.calls
+
+
+def test_failed_job_raises_rc_error(rc):
+    rc.routes['operations/size'] = async_job(rc, success=False, error='directory not found')
+    backend = RcBackend(RcClient(rc.url), poll_interval=0.01)
+
+    with pytest.raises(RcError, match='directory not found') as excinfo:
+        backend.size('gdrive:archived/x')
+    assert not isinstance(excinfo.value, RcTimeout)
+
+
+def test_check_reports_differences(rc):
+    rc.routes['operations/check'] = async_job(rc, output={'success': False, 'status': '2 differences found'})
+    backend = RcBackend(RcClient(rc.url), poll_interval=0.01)
+
+    assert backend.check('/local', 'gdrive:archived/x') == (False, {'error': '2 differences found'})
+
+
+def test_scan_remote_turns_rc_timeout_into_timeout_expired(rc):
+    rc.routes['operations/list'] = async_job(rc, finished=False)
+    cloud_ops = CloudOperations(rclone_path='rclone-missing')
+    cloud_ops.rc = RcBackend(RcClient(rc.url), poll_interval=0.01)
+    cloud_ops.verify_timeout = 0.05
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        cloud_ops._scan_remote('gdrive:archived/x', lambda item: None)
+
+
+def test_check_config_through_rc(rc):
+    rc.routes['config/listremotes'] = lambda params: (200, {'remotes': ['gdrive']})
+    rc.routes['operations/about'] = lambda params: (200, {'total': 2 * 1024**3, 'used': 1024**3})
+    cloud_ops = CloudOperations(rclone_path='rclone-missing')
+    cloud_ops.rc = RcBackend(RcClient(rc.url))
+
+    assert cloud_ops.check_config() == (True, "1.0GB free of 2.0GB")
+
+    rc.routes['config/listremotes'] = lambda params: (200, {'remotes': ['other']})
+    configured, message = cloud_ops.check_config()
+    assert not configured
+    assert 'gdrive remote not configured' in message
@@ -0,0 +1,105 @@
+import json
+import sys
+
+import pytest
+
+from core.rclone_output import JsonArrayReader, LineSplitter, OutputLine, RcloneOutputPump
+
+
+def lines(splitter, *chunks):
+    found = []
+    for chunk in chunks:
+        found += [(line.text, line.terminator) for line in splitter.feed(chunk)]
+    return found
+
+
+def test_splits_on_every_kind_of_line_break():
+    splitter = LineSplitter()
+
+    assert lines(splitter, b'one\ntwo\r\nthree\rfour') == [
+        ('one', '\n'), ('two', '\r\n'), ('three', '\r')]
+    assert [(line.text, line.terminator) for line in splitter.flush()] == [('four', '')]
+
+
+def test_crlf_split_across_chunks_is_one_break():
+    splitter = LineSplitter()
+
+    assert lines(splitter, b'stats\r', b'\nnext\n') == [('stats', '\r\n'), ('next', '\n')]
+
+
+def test_trailing_cr_is_a_stats_update_at_end_of_stream():
+    splitter = LineSplitter()
+
+    assert lines(splitter, b'45%\r') == []
+    assert splitter.flush() == [OutputLine('', '45%', '\r')]
+
+
+def test_multibyte_characters_split_across_chunks():
+    splitter = LineSplitter()
+    data = 'Copied (new) é.txt\n'.encode('utf-8')
+    cut = data.index(b'\xa9')
+
+    assert lines(splitter, data[:cut], data[cut:]) == [('Copied (new) é.txt', '\n')]
+
+
+def test_pump_delivers_both_streams_and_the_exit_code():
+    script = ("import sys\n"
+              "for i in range(3000): print(i)\n"
+              "sys.stderr.write('err line\\n' * 3000)\n"
+              "sys.exit(3)")
+    pump = RcloneOutputPump([sys.executable, '-c', script], max_queue=10)
+    pump.start()
+
+    received = list(pump)
+
+    assert [line.text for line in received if line.stream == 'stdout'] == [str(i) for i in range(3000)]
+    assert sum(line.stream == 'stderr' for line in received) == 3000
+    assert pump.returncode == 3
+
+
+def test_terminate_ends_iteration_even_with_a_full_queue():
+    script = "import time\nfor i in range(100): print(i, flush=True)\ntime.sleep(30)"
+    pump = RcloneOutputPump([sys.executable, '-c', script], max_queue=5)
+    pump.start()
+
+    received = []
+    for line in pump:
+        received.append(line)
+        if len(received) == 1:
+            pump.terminate()
+
+    assert received[0].text == '0'
+    assert pump.returncode is not None
+
+
+def test_json_array_items_come_out_as_they_complete():
+    listing = [{'Path': f'dir/{i}.txt', 'Size': i, 'Hashes': {'md5': 'x' * 32}} for i in range(50)]
+    text = json.dumps(listing, indent=1)
+    reader = JsonArrayReader()
+
+    items = []
+    for start in range(0, len(text), 7):
+        items += reader.feed(text[start:start + 7])
+
+    assert items == listing
+    assert reader.finished
+
+
+def test_json_array_string_with_brackets_and_commas():
+    reader = JsonArrayReader()
+
+    assert reader.feed('[{"Path": "a, [b]"') == []
+    assert reader.feed('}, 2, "x"]') == [{'Path': 'a, [b]'}, 2, 'x']
+    assert reader.finished
+
+
+def test_empty_json_array():
+    reader = JsonArrayReader()
+
+    assert reader.feed('[\n]\n') == []
+    assert reader.finished
+
+
+def test_json_array_reader_rejects_other_output():
+    with pytest.raises(ValueError):
+        JsonArrayReader().feed('ERROR : directory not found')
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from core.ignore_rules import IgnoreRules
+from core.scan_index import ScanIndex
+from core.scanner import FolderScanner
+
+
+@pytest.fixture
+def scanner(tmp_path):
+    return FolderScanner(max_workers=1, index=ScanIndex(str(tmp_path / 'index.db')))
+
+
+def test_unchanged_directories_come_from_the_index(tmp_path, scanner, monkeypatch):
+    root = tmp_path / 'data'
+    (root / 'sub').mkdir(parents=True)
+    (root / 'sub' / 'a.txt').write_text('aaa')
+    scanner.scan(str(root))
+
+    def no_listing(path):
+        raise AssertionError(f"listed {path} again")
+
+    monkeypatch.setattr('core.scanner.os.scandir', no_listing)
+    result = scanner.scan(str(root))
+
+    assert (result.total_size, result.file_count) == (3, 1)
+
+
+def test_changed_directory_is_listed_again(tmp_path, scanner):
+    root = tmp_path / 'data'
+    (root / 'sub').mkdir(parents=True)
+    (root / 'sub' / 'a.txt').write_text('aaa')
+    scanner.scan(str(root))
+
+    (root / 'sub' / 'b.txt').write_text('bb')
+    os.utime(root / 'sub', ns=(1, 1))
+    result = scanner.scan(str(root))
+
+    assert (result.total_size, result.file_count) == (5, 2)
+
+
+def test_anchored_rules_are_not_reused_from_another_root(tmp_path, scanner):
+    parent = tmp_path / 'parent'
+    (parent / 'proj' / 'build').mkdir(parents=True)
+    (parent / 'proj' / 'build' / 'out.bin').write_text('x' * 100)
+    (parent / 'proj' / 'src.txt').write_text('s')
+    rules = IgnoreRules(['/build/**'])
+
+    assert scanner.scan(str(parent / 'proj'), rules).total_size == 1
+    # /build/** is anchored at the scan root, so from parent nothing is ignored
+    assert scanner.scan(str(parent), rules).total_size == 101
+    assert FolderScanner(max_workers=1).scan(str(parent), rules).total_size == 101
+
+
+def test_manifest_scan_sees_files_rewritten_in_place(tmp_path, scanner):
+    root = tmp_path / 'data'
+    root.mkdir()
+    (root / 'a.txt').write_text('aaa')
+    scanner.scan(str(root), collect_files=True)
+
+    dir_mtime = os.stat(root).st_mtime_ns
+    with open(root / 'a.txt', 'a') as f:
+        f.write('more')
+    os.utime(root, ns=(dir_mtime, dir_mtime))
+    result = scanner.scan(str(root), collect_files=True)
+
+    [entry] = result.files
+    assert entry.size == 7
+    assert entry.mtime_ns == os.stat(root / 'a.txt').st_mtime_ns
+    assert result.total_size == 7
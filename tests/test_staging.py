@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from core.ignore_rules import IgnoreRules
+from core.scanner import FolderScanner
+from core.staging import STAGING_DIR, Purger, StagingArea
+
+
+@pytest.fixture
+def staging(tmp_path):
+    return StagingArea(str(tmp_path / 'staging.db'), purge_delay=0)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / 'parent' / 'photos'
+    (folder / 'sub').mkdir(parents=True)
+    (folder / 'a.jpg').write_text('aaa')
+    (folder / 'sub' / 'b.jpg').write_text('bb')
+    return folder
+
+
+def test_restore_puts_the_folder_back(staging, folder):
+    item = staging.stage(str(folder), 5)
+
+    assert not folder.exists()
+    assert staging.restore(item.item_id) == (True, f"Restored {folder}")
+    assert (folder / 'sub' / 'b.jpg').read_text() == 'bb'
+    assert staging.pending() == []
+    assert staging.claim_for_purge() is None
+
+
+def test_restore_is_refused_once_the_purge_has_claimed_the_folder(staging, folder):
+    item = staging.stage(str(folder), 5)
+
+    claimed = staging.claim_for_purge()
+
+    assert claimed.item_id == item.item_id
+    assert staging.restore(item.item_id) == (False, "Folder is already being purged")
+    assert not folder.exists()
+
+
+def test_restore_and_purge_race_has_one_winner(tmp_path, staging):
+    for attempt in range(20):
+        folder = tmp_path / 'parent' / f'folder{attempt}'
+        folder.mkdir(parents=True)
+        (folder / 'f.txt').write_text('x')
+        item = staging.stage(str(folder))
+        barrier = threading.Barrier(2)
+        outcome = {}
+
+        def restore():
+            barrier.wait()
+            outcome['restored'] = staging.restore(item.item_id)[0]
+
+        def claim():
+            barrier.wait()
+            outcome['claimed'] = staging.claim_for_purge() is not None
+
+        threads = [threading.Thread(target=restore), threading.Thread(target=claim)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert outcome['restored'] != outcome['claimed']
+        assert folder.exists() == outcome['restored']
+        if outcome['claimed']:
+            staging.purged(staging.pending()[0])
+
+
+def test_purge_removes_the_staged_folder_and_empty_staging_dir(staging, folder):
+    item = staging.stage(str(folder), 5)
+    purger = Purger(staging, files_per_second=0)
+
+    claimed = staging.claim_for_purge()
+    assert purger._purge(claimed.staged)
+    staging.purged(claimed)
+
+    assert staging.pending() == []
+    assert not (folder.parent / STAGING_DIR).exists()
+    assert staging.restore(item.item_id) == (False, "Folder is no longer staged")
+
+
+def test_scans_skip_the_staging_area(staging, folder):
+    other = folder.parent / 'music'
+    other.mkdir()
+    (other / 'song.mp3').write_text('song')
+    staging.stage(str(other))
+
+    result = FolderScanner(max_workers=1).scan(str(folder.parent), IgnoreRules(), collect_files=True)
+
+    assert sorted(e.path for e in result.files) == ['photos/a.jpg', 'photos/sub/b.jpg']
+    assert result.ignored_dirs == 1
+    assert IgnoreRules().is_ignored(f"{STAGING_DIR}/x-music/song.mp3")
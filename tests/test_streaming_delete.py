@@ -0,0 +1,99 @@
+import hashlib
+import os
+
+import pytest
+
+from core.hashing import HashingEngine
+from core.job_journal import JobJournal
+from core.streaming_delete import StreamingDeleter
+
+
+class FakeCloud:
+    """Local MD5s from disk and a fixed remote listing of path -> (size, md5)."""
+
+    def __init__(self, remote):
+        self.remote = remote
+
+    def hash_files(self, paths):
+        return HashingEngine(max_workers=2).hash_files(paths)
+
+    def remote_hashes(self, manifest, destination):
+        if self.remote is None:
+            return None
+        return {e.path: self.remote[e.path] for e in manifest.entries if e.path in self.remote}
+
+
+def md5(manifest, entry):
+    with open(manifest.local_path(entry), 'rb') as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+@pytest.fixture
+def start(tmp_path, make_manifest):
+    """Starts a deleter over five files, with the remote listing that remote(manifest) returns."""
+    def start(remote):
+        folder = tmp_path / 'folder'
+        manifest = make_manifest(folder, {name: name * 3 for name in
+                                          ('a.txt', 'b.txt', 'c.txt', 'd.txt', 'e.txt')})
+        journal = JobJournal.create(str(tmp_path / 'jobs'), [str(folder)])
+        cloud = FakeCloud(remote(manifest) if remote else None)
+        deleter = StreamingDeleter(cloud, journal, str(folder), manifest, 'gdrive:archived/folder',
+                                   batch_interval=0.05)
+        return folder, manifest, journal, deleter
+    return start
+
+
+def test_deletes_only_files_confirmed_unchanged_with_matching_remote_md5(start):
+    def remote(manifest):
+        listing = {e.path: (e.size, md5(manifest, e)) for e in manifest.entries}
+        listing['b.txt'] = (listing['b.txt'][0], '0' * 32)
+        del listing['c.txt']
+        return listing
+
+    folder, manifest, journal, deleter = start(remote)
+    # Changed on disk after the scan, so not what was uploaded
+    os.utime(folder / 'd.txt', ns=(1, 1))
+
+    for name in ('a.txt', 'b.txt', 'c.txt', 'd.txt', 'not-in-manifest.txt'):
+        deleter.confirm(name)
+    remaining = deleter.close()
+
+    assert deleter.deleted == {'a.txt'}
+    assert deleter.freed_bytes == 15
+    assert not (folder / 'a.txt').exists()
+    for name in ('b.txt', 'c.txt', 'd.txt', 'e.txt'):
+        assert (folder / name).exists()
+    assert sorted(e.path for e in remaining.entries) == ['b.txt', 'c.txt', 'd.txt', 'e.txt']
+    assert journal.state().deleted == {str(folder): {'a.txt'}}
+
+
+def test_nothing_is_deleted_when_the_remote_listing_fails(start):
+    folder, manifest, journal, deleter = start(None)
+
+    deleter.confirm('a.txt')
+    remaining = deleter.close()
+
+    assert deleter.deleted == set()
+    assert (folder / 'a.txt').exists()
+    assert remaining.file_count == 5
+    assert journal.state().deleted == {}
+
+
+def test_deletions_are_journaled_before_files_are_unlinked(start, monkeypatch):
+    def remote(manifest):
+        return {e.path: (e.size, md5(manifest, e)) for e in manifest.entries}
+
+    folder, manifest, journal, deleter = start(remote)
+    seen_in_journal = []
+    real_unlink = os.unlink
+
+    def unlink(path):
+        seen_in_journal.append(os.path.basename(path) in journal.state().deleted.get(str(folder), set()))
+        real_unlink(path)
+
+    monkeypatch.setattr('core.streaming_delete.os.unlink', unlink)
+    deleter.confirm('a.txt')
+    deleter.confirm('e.txt')
+    deleter.close()
+
+    assert seen_in_journal == [True, True]
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from core.bundles import BUNDLE_DIR, INDEX_NAME, BundledFile, BundleIndex, BundleInfo
+from core.cloud_operations import CloudOperations
+from core.hashing import HashProgress
+
+BUNDLE = 'bundle-00001.tar'
+BUNDLE_MD5 = hashlib.md5(b'bundle bytes').hexdigest()
+
+
+def md5(text):
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+@pytest.fixture
+def folder(tmp_path, make_manifest):
+    """A folder with one large file uploaded as is and two small files packed into one bundle."""
+    manifest = make_manifest(tmp_path, {'big.bin': 'B' * 100,
+                                        'small/s1.txt': 'one', 'small/s2.txt': 'two'})
+
+    index = BundleIndex()
+    index.bundles[BUNDLE] = BundleInfo(BUNDLE, 512, BUNDLE_MD5, 2)
+    for offset, entry in enumerate(manifest.entries[1:]):
+        index.files[entry.path] = BundledFile(BUNDLE, offset * 512, entry.size, entry.mtime_ns)
+
+    remote = {
+        'big.bin': (100, md5('B' * 100)),
+        f"{BUNDLE_DIR}/{BUNDLE}": (512, BUNDLE_MD5),
+        f"{BUNDLE_DIR}/{INDEX_NAME}": (10, None),
+    }
+    return manifest, index, remote
+
+
+def verify(manifest, index, remote, **kwargs):
+    cloud_ops = CloudOperations(rclone_path='rclone-missing')
+
+    def scan_remote(fs, on_item, with_hashes=False, files_from=None):
+        for path, (size, md5_hex) in remote.items():
+            on_item({'Path': path, 'Size': size, 'Hashes': {'md5': md5_hex} if md5_hex else {}})
+        return True
+
+    def check(*args):
+        raise AssertionError("every file has a remote MD5, so rclone check should not run")
+
+    cloud_ops._scan_remote = scan_remote
+    cloud_ops._check = check
+    cloud_ops.bundles.fetch_index = lambda destination: index
+    return cloud_ops._verify_against_manifest(manifest, 'gdrive:archived/folder', **kwargs)
+
+
+def test_passes_when_bundles_and_files_match(folder):
+    success, details = verify(*folder)
+
+    assert success, details
+    assert details['verification_passed']
+
+
+def test_fails_when_bundle_md5_differs(folder):
+    manifest, index, remote = folder
+    remote[f"{BUNDLE_DIR}/{BUNDLE}"] = (512, md5('corrupted'))
+
+    success, details = verify(manifest, index, remote)
+
+    assert not success
+    assert details['bundle_errors'] == [f"{BUNDLE}: bundle MD5 missing or different in cloud"]
+
+
+def test_fails_when_bundle_md5_is_missing(folder):
+    manifest, index, remote = folder
+    remote[f"{BUNDLE_DIR}/{BUNDLE}"] = (512, None)
+
+    success, details = verify(manifest, index, remote)
+
+    assert not success
+    assert details['bundle_errors']
+
+
+def test_fails_when_bundle_is_missing(folder):
+    manifest, index, remote = folder
+    del remote[f"{BUNDLE_DIR}/{BUNDLE}"]
+
+    success, details = verify(manifest, index, remote)
+
+    assert not success
+    assert details['bundle_errors'] == [f"{BUNDLE}: bundle missing or wrong size"]
+
+
+def test_fails_when_bundled_file_changed_since_packing(folder):
+    manifest, index, remote = folder
+    os.utime(manifest.local_path(manifest.entries[1]), ns=(1, 1))
+
+    success, details = verify(manifest, index, remote)
+
+    assert not success
+    assert details['bundle_errors'] == ["small/s1.txt: changed since it was bundled"]
+
+
+def test_fails_on_plain_file_hash_mismatch(folder):
+    manifest, index, remote = folder
+    remote['big.bin'] = (100, md5('different content'))
+
+    success, details = verify(manifest, index, remote)
+
+    assert not success
+    assert details['hash_mismatch'] == ['big.bin']
+
+
+def test_local_hashing_reports_progress(folder):
+    reports = []
+
+    success, _ = verify(*folder, progress_callback=reports.append)
+
+    assert success
+    assert isinstance(reports[-1], HashProgress)
+    assert (reports[-1].files_done, reports[-1].files_total) == (3, 3)
+
+
+def test_cancelled_hashing_fails_verification(folder):
+    cancel = threading.Event()
+    cancel.set()
+
+    success, details = verify(*folder, cancel_event=cancel)
+
+    assert not success
+    assert details['error'] == "Verification cancelled"